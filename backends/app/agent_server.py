@@ -2,18 +2,38 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from contextlib import asynccontextmanager
+from typing import Annotated, Any, AsyncIterator, Dict, List, Literal, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from pydantic import BaseModel, Field
 
+from app import metrics
+from app.config import settings
+from app.middleware import MetricsMiddleware, ProfilingMiddleware
 from app.services.agent_router import agent_router, AgentResult
 
+PROVIDER_PATTERN = "^(fetchai|janitorai|wordware|letta)$"
+
+
 class AgentRequest(BaseModel):
-    provider: str = Field(pattern="^(fetchai|janitorai|wordware|letta)$", description="Target agent provider")
+    provider: str = Field(pattern=PROVIDER_PATTERN, description="Target agent provider")
     model: Optional[str] = Field(default=None, description="Requested model identifier (provider-specific)")
     user_input: str = Field(min_length=1, description="Natural language prompt/intention")
     metadata: Optional[Dict[str, Any]] = Field(default=None, description="Optional extra parameters")
+    providers: Optional[List[Annotated[str, Field(pattern=PROVIDER_PATTERN)]]] = Field(
+        default=None,
+        description="Extra providers to race or hedge against `provider` (tried in this order)",
+    )
+    strategy: Literal["single", "race", "hedge"] = Field(
+        default="single",
+        description=(
+            "single = `provider` only; race = all at once; hedge = next provider after a delay"
+        ),
+    )
+    hedge_delay_ms: Optional[float] = Field(
+        default=None, ge=0, description="Override the p95-based hedge delay (hedge strategy only)"
+    )
 
 
 class AgentResponse(BaseModel):
@@ -22,6 +42,7 @@ class AgentResponse(BaseModel):
     output: str
     raw: Any
     used_fallback: bool = False
+    attempts: List[Dict[str, Any]] = Field(default_factory=list)
 
     @classmethod
     def from_result(cls, result: AgentResult) -> "AgentResponse":
@@ -31,23 +52,63 @@ class AgentResponse(BaseModel):
             output=result.output,
             raw=result.raw,
             used_fallback=result.used_fallback,
+            attempts=result.attempts,
         )
 
 
-app = FastAPI(title="Agent Relay", version="0.1.0")
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # opening one pooled upstream client per provider for the lifetime of the server.
+    await agent_router.startup()
+    try:
+        yield
+    finally:
+        await agent_router.shutdown()
+
+
+app = FastAPI(title="Agent Relay", version="0.1.0", lifespan=lifespan)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.post("/agents/run", response_model=AgentResponse)
 async def run_agent(request: AgentRequest) -> AgentResponse:
-    result = await agent_router.run(
-        provider=request.provider,
-        model=request.model,
-        user_input=request.user_input,
-        metadata=request.metadata,
-    )
+    if request.strategy == "single":
+        result = await agent_router.run(
+            provider=request.provider,
+            model=request.model,
+            user_input=request.user_input,
+            metadata=request.metadata,
+        )
+    else:
+        result = await agent_router.run_many(
+            providers=[request.provider, *(request.providers or [])],
+            strategy=request.strategy,
+            model=request.model,
+            user_input=request.user_input,
+            metadata=request.metadata,
+            hedge_delay=None if request.hedge_delay_ms is None else request.hedge_delay_ms / 1000,
+        )
     return AgentResponse.from_result(result)
 
 
+@app.get("/agents/status")
+def agents_status() -> dict[str, Any]:
+    """Circuit breaker state, rolling error/latency counters and race/hedge wins per provider."""
+    return {
+        "providers": agent_router.status(),
+        "multi": agent_router.multi_status(),
+        "fallback": agent_router.fallback.stats(),
+    }
+
+
 @app.get("/health", tags=["Health"])
 def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics_endpoint() -> Response:
+    """Request latency histograms in the Prometheus text format."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -13,22 +13,123 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
+import json
+import logging
+from typing import Any, AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import schemas
-from app.database import get_session
-from app.services import ai_service, todo_service
+from app.database import async_session_scope, get_async_session
+from app.services import ai_service, job_service, todo_service
+from app.services.job_service import ai_job_runner
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ai", tags=["AI"])
 
 
 # generate todos
 @router.post("/generate", response_model=schemas.AIGenerateResponse)
-def generate_todos(payload: schemas.AIGenerateRequest, session: Session = Depends(get_session)):
-    todos = ai_service.generate_structured_todos(payload.user_input)
+async def generate_todos(
+    payload: schemas.AIGenerateRequest,
+    session: AsyncSession = Depends(get_async_session),
+):
+    todos = await ai_service.generate_structured_todos_async(
+        payload.user_input, use_cache=payload.use_cache
+    )
     persisted_ids: list[int] = []
     if payload.save:
-        created = todo_service.save_generated_tree(todos, session)
+        created = await todo_service.save_generated_tree_async(todos, session)
         persisted_ids = [todo.id for todo in created]
     return schemas.AIGenerateResponse(todos=todos, persisted_ids=persisted_ids)
+
+
+# formatting one server-sent event.
+def _sse(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# streaming the generation as server-sent events, one per top-level todo.
+async def _stream_events(payload: schemas.AIGenerateRequest) -> AsyncIterator[str]:
+    persisted_ids: list[int] = []
+    count = 0
+    try:
+        async for node in ai_service.stream_structured_todos(
+            payload.user_input, use_cache=payload.use_cache
+        ):
+            node_ids: list[int] = []
+            if payload.save:
+                # committing each node as it arrives, so a dropped stream keeps what was shown.
+                async with async_session_scope() as session:
+                    created = await todo_service.save_generated_tree_async([node], session)
+                    node_ids = [todo.id for todo in created]
+                persisted_ids.extend(node_ids)
+            yield _sse(
+                "todo",
+                {"index": count, "todo": node.model_dump(mode="json"), "persisted_ids": node_ids},
+            )
+            count += 1
+    # the response has already started, so failures become an error event that also reports
+    # what was saved; a stream without "done" or "error" means the connection dropped.
+    except HTTPException as exc:
+        yield _sse(
+            "error",
+            {"status_code": exc.status_code, "detail": exc.detail, "persisted_ids": persisted_ids},
+        )
+        return
+    except Exception:
+        logger.exception("Streaming generation failed after %d todo(s)", count)
+        yield _sse(
+            "error",
+            {
+                "status_code": 500,
+                "detail": "Streaming generation failed",
+                "persisted_ids": persisted_ids,
+            },
+        )
+        return
+    yield _sse("done", {"count": count, "persisted_ids": persisted_ids})
+
+
+# generate todos as a stream
+@router.post("/generate/stream")
+async def generate_todos_stream(payload: schemas.AIGenerateRequest) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_events(payload),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# submit a background generation job
+@router.post("/jobs", response_model=schemas.AIJobRead, status_code=202)
+async def create_ai_job(payload: schemas.AIGenerateRequest) -> schemas.AIJobRead:
+    job = await ai_job_runner.submit(payload)
+    return job_service.to_read(job)
+
+
+# job queue stats
+@router.get("/jobs/stats")
+async def ai_job_stats() -> dict:
+    return await ai_job_runner.stats()
+
+
+# poll a background generation job
+@router.get("/jobs/{job_id}", response_model=schemas.AIJobRead)
+async def get_ai_job(job_id: str) -> schemas.AIJobRead:
+    job = await ai_job_runner.get(job_id)
+    return job_service.to_read(job)
+
+
+# response cache stats
+@router.get("/cache/stats")
+def ai_cache_stats() -> dict:
+    return {
+        "response_cache": ai_service.cache_stats(),
+        "semantic_cache": ai_service.semantic_cache_stats(),
+        "single_flight": ai_service.single_flight_stats(),
+        "mock": ai_service.mock_stats(),
+    }
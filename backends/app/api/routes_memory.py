@@ -36,3 +36,9 @@ def search_memory(payload: schemas.MemorySearchRequest):
         for item in raw
     ]
     return schemas.MemorySearchResponse(results=results)
+
+
+# embedding cache stats
+@router.get("/stats")
+def memory_stats() -> dict:
+    return {"embedding_cache": chroma_service.embedding_cache_stats()}
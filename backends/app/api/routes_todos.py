@@ -13,12 +13,12 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, Query, Response
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
+from app.database import get_async_session
 from app import schemas
 from app.services import todo_service
 
@@ -26,43 +26,76 @@ router = APIRouter(prefix="/todos", tags=["Todos"])
 
 # create todo
 @router.post("", response_model=schemas.TodoRead, status_code=201)
-def create_todo(todo: schemas.TodoCreate, session: Session = Depends(get_session)):
-    return todo_service.create_todo(todo, session)
+async def create_todo(todo: schemas.TodoCreate, session: AsyncSession = Depends(get_async_session)):
+    return await todo_service.create_todo_async(todo, session)
 
-# list todos
-@router.get("", response_model=List[schemas.TodoRead])
-def list_todos(
+# list todos (a plain array, or one page when any paging option is passed)
+@router.get("", response_model=Union[List[schemas.TodoRead], schemas.TodoPage])
+async def list_todos(
     status: Optional[schemas.Status] = Query(default=None),
     priority: Optional[schemas.Priority] = Query(default=None),
     due_before: Optional[datetime] = Query(default=None),
     due_after: Optional[datetime] = Query(default=None),
-    session: Session = Depends(get_session),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000, description="Page size, default 100"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    order_by: Optional[schemas.TodoSort] = Query(default=None, description="Keyset order"),
+    fields: Optional[str] = Query(
+        default=None, description="Comma-separated columns to return, e.g. id,title,status"
+    ),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    return todo_service.list_todos(
+    filters = {
+        "status_filter": status,
+        "priority_filter": priority,
+        "due_before": due_before,
+        "due_after": due_after,
+    }
+    if limit is None and cursor is None and order_by is None and fields is None:
+        return await todo_service.list_todos_async(session, **filters)
+    return await todo_service.list_todos_page_async(
         session,
-        status_filter=status,
-        priority_filter=priority,
-        due_before=due_before,
-        due_after=due_after,
+        **filters,
+        limit=limit or 100,
+        cursor=cursor,
+        order_by=order_by or "updated_at",
+        fields=[field.strip() for field in fields.split(",") if field.strip()] if fields else None,
     )
 
 # get todo tree
 @router.get("/tree", response_model=schemas.TodoTreeResponse)
-def get_tree(session: Session = Depends(get_session)):
-    return schemas.TodoTreeResponse(todos=todo_service.get_tree(session))
+async def get_tree(session: AsyncSession = Depends(get_async_session)):
+    return schemas.TodoTreeResponse(todos=await todo_service.get_tree_async(session))
+
+# get a single subtree
+@router.get("/{todo_id}/tree", response_model=schemas.TodoTreeNode)
+async def get_subtree(
+    todo_id: int,
+    max_depth: Optional[int] = Query(default=None, ge=0),
+    session: AsyncSession = Depends(get_async_session),
+):
+    return await todo_service.get_subtree_async(todo_id, session, max_depth=max_depth)
+
+# get the ancestor path of a todo
+@router.get("/{todo_id}/ancestors", response_model=List[schemas.TodoRead])
+async def get_ancestors(todo_id: int, session: AsyncSession = Depends(get_async_session)):
+    return await todo_service.get_ancestors_async(todo_id, session)
 
 # update todo
 @router.put("/{todo_id}", response_model=schemas.TodoRead)
-def update_todo(todo_id: int, payload: schemas.TodoUpdate, session: Session = Depends(get_session)):
-    return todo_service.update_todo(todo_id, payload, session)
+async def update_todo(
+    todo_id: int,
+    payload: schemas.TodoUpdate,
+    session: AsyncSession = Depends(get_async_session),
+):
+    return await todo_service.update_todo_async(todo_id, payload, session)
 
 # delete todo
 @router.delete("/{todo_id}", status_code=204)
-def delete_todo(todo_id: int, session: Session = Depends(get_session)):
-    todo_service.delete_todo(todo_id, session)
+async def delete_todo(todo_id: int, session: AsyncSession = Depends(get_async_session)):
+    await todo_service.delete_todo_async(todo_id, session)
     return Response(status_code=204)
 
 
 @router.post("/{todo_id}/complete", response_model=schemas.TodoRead)
-def complete_todo(todo_id: int, session: Session = Depends(get_session)):
-    return todo_service.complete_todo(todo_id, session)
+async def complete_todo(todo_id: int, session: AsyncSession = Depends(get_async_session)):
+    return await todo_service.complete_todo_async(todo_id, session)
@@ -21,15 +21,64 @@ class Settings(BaseSettings):
     OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
     DEFAULT_MODEL: str = "anthropic/claude-3.5-haiku"
     MOCK_AI_RESPONSES_FILE: str | None = None
+    AI_MAX_CONCURRENCY: int = 8
+    AI_REQUEST_TIMEOUT: float = 60.0
+    AI_MAX_ATTEMPTS: int = 3
+    AI_RETRY_BUDGET_RATIO: float = 0.2
+    AI_RETRY_BUDGET_MIN_PER_SECOND: float = 0.5
+    AI_RETRY_BUDGET_MAX: float = 10.0
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_SIZE: int = 1024
+    AI_CACHE_TTL_SECONDS: float = 86_400.0
+    AI_CACHE_PATH: str | None = None
+    AI_CACHE_DISK_SIZE: int = 50_000
+    AI_SEMANTIC_CACHE_ENABLED: bool = False
+    AI_SEMANTIC_CACHE_THRESHOLD: float = 0.12
+    AI_SEMANTIC_CACHE_SIZE: int = 5_000
+    AI_SEMANTIC_CACHE_TTL_SECONDS: float = 604_800.0
+    AI_JOB_WORKERS: int = 4
+    AI_JOB_MAX_QUEUE: int = 100
+    AI_JOB_RESULT_TTL_SECONDS: float = 3_600.0
+    AI_JOB_SWEEP_INTERVAL_SECONDS: float = 60.0
+    AI_JOB_MAX_ATTEMPTS: int = 3
+    AI_JOB_LEASE_SECONDS: float = 60.0
 
     DB_URL: str = "sqlite:///./todos.db"
+    # "default" keeps SQLAlchemy defaults; "production" enables WAL, pragmas and an explicit pool.
+    DB_PROFILE: str = "default"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_BUSY_TIMEOUT_MS: int = 5_000
+    DB_MMAP_SIZE: int = 268_435_456
+    DB_CACHE_SIZE_KB: int = 65_536
 
     CHROMA_DIR: str = "./chroma_data"
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_CACHE_SIZE: int = 4096
+    EMBEDDING_CACHE_PATH: str | None = None
+    EMBEDDING_CACHE_DISK_SIZE: int = 100_000
+    INDEX_ASYNC: bool = True
+    INDEX_QUEUE_MAXSIZE: int = 10_000
+    INDEX_QUEUE_PUT_TIMEOUT: float = 5.0
+    INDEX_QUEUE_DRAIN_TIMEOUT: float = 10.0
 
     DEBUG: bool = True
     RATE_LIMIT_REQUESTS: int = 60
     RATE_LIMIT_WINDOW_SECONDS: int = 60
+    RATE_LIMIT_MAX_KEYS: int = 10_000
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SQLITE_PATH: str = "./rate_limit.sqlite"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    # opt-in sampling profiler (X-Profile: 1 header or ?profile=1 from an allowed client).
+    PROFILING_ENABLED: bool = False
+    PROFILING_ALLOWED_CLIENTS: str = "127.0.0.1,::1"
+    PROFILING_DIR: str = "./profiles"
+    PROFILING_INTERVAL_MS: float = 1.0
+    PROFILING_MAX_FILES: int = 50
+    PROFILING_MAX_BYTES: int = 50_000_000
+    PROFILING_MCP_TOOLS: str = ""
 
     FETCHAI_API_KEY: str | None = None
     FETCHAI_BASE_URL: str | None = None
@@ -40,7 +89,25 @@ class Settings(BaseSettings):
     LETTA_API_KEY: str | None = None
     LETTA_BASE_URL: str | None = None
     AGENT_HTTP_TIMEOUT: float = 30.0
+    AGENT_HTTP_MAX_CONNECTIONS: int = 100
+    AGENT_HTTP_MAX_KEEPALIVE: int = 20
+    AGENT_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    AGENT_HTTP2: bool = False
     AGENT_FALLBACK_ENABLED: bool = True
+    AGENT_FALLBACK_WORKERS: int = 4
+    AGENT_FALLBACK_MAX_PENDING: int = 32
+    AGENT_FALLBACK_TIMEOUT: float = 60.0
+    AGENT_BREAKER_ENABLED: bool = True
+    AGENT_BREAKER_WINDOW_SECONDS: float = 60.0
+    AGENT_BREAKER_MIN_CALLS: int = 5
+    AGENT_BREAKER_FAILURE_RATE: float = 0.5
+    AGENT_BREAKER_SLOW_CALL_SECONDS: float = 10.0
+    AGENT_BREAKER_SLOW_CALL_RATE: float = 0.8
+    AGENT_BREAKER_OPEN_SECONDS: float = 30.0
+    AGENT_BREAKER_HALF_OPEN_CALLS: int = 1
+    AGENT_HEDGE_DEFAULT_DELAY_MS: float = 300.0
+    AGENT_HEDGE_MIN_DELAY_MS: float = 20.0
+    AGENT_HEDGE_MAX_DELAY_MS: float = 5_000.0
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
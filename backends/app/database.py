@@ -11,24 +11,119 @@
 '''
 
 
-from contextlib import contextmanager
-from typing import Iterator
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.config import settings
 
 
+# applying the production pragmas to every new sqlite connection.
+def _apply_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.DB_MMAP_SIZE)}")
+        # negative cache_size is interpreted by sqlite as KiB rather than pages.
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.DB_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
 # creating the engine for the database.
-def _create_engine():
-    connect_args = {"check_same_thread": False} if settings.DB_URL.startswith("sqlite") else {}
-    return create_engine(settings.DB_URL, echo=settings.DEBUG, connect_args=connect_args)
+def _create_engine(url: str | None = None, profile: str | None = None):
+    url = url or settings.DB_URL
+    profile = profile or settings.DB_PROFILE
+    is_sqlite = url.startswith("sqlite")
+    connect_args = {"check_same_thread": False} if is_sqlite else {}
+    # in-memory databases are per-connection, so pooling and WAL do not apply to them.
+    in_memory = is_sqlite and make_url(url).database in (None, "", ":memory:")
+    if profile != "production" or in_memory:
+        return create_engine(url, echo=settings.DEBUG, connect_args=connect_args)
+
+    kwargs = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+    if not is_sqlite:
+        return create_engine(url, echo=settings.DEBUG, connect_args=connect_args, **kwargs)
+    # sqlite3's own lock wait, in seconds, mirrors busy_timeout for the connect step itself.
+    connect_args["timeout"] = settings.DB_BUSY_TIMEOUT_MS / 1000
+    engine = create_engine(
+        url, echo=settings.DEBUG, connect_args=connect_args, poolclass=QueuePool, **kwargs
+    )
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return engine
 
 
 # exporting the engine for use in the application.
 engine = _create_engine()
 
 
+# mapping a sync database url onto its async driver.
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.drivername in ("sqlite", "sqlite+pysqlite"):
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+# creating the async engine for the database.
+def _create_async_engine(url: str | None = None, profile: str | None = None) -> AsyncEngine:
+    url = _async_url(url or settings.DB_URL)
+    profile = profile or settings.DB_PROFILE
+    is_sqlite = url.startswith("sqlite")
+    in_memory = is_sqlite and make_url(url).database in (None, "", ":memory:")
+    if profile != "production" or in_memory:
+        return create_async_engine(url, echo=settings.DEBUG)
+
+    kwargs = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+    if not is_sqlite:
+        return create_async_engine(url, echo=settings.DEBUG, **kwargs)
+    async_engine = create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        connect_args={"timeout": settings.DB_BUSY_TIMEOUT_MS / 1000},
+        poolclass=AsyncAdaptedQueuePool,
+        **kwargs,
+    )
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return async_engine
+
+
+# defining the async engine and session factory, created on first use.
+_async_engine: AsyncEngine | None = None
+_async_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+
+
+# getting the async engine for the database.
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        _async_engine = _create_async_engine()
+        # keeping attributes loaded after commit; lazy refreshes are not allowed on async sessions.
+        _async_sessionmaker = async_sessionmaker(
+            _async_engine, class_=AsyncSession, expire_on_commit=False
+        )
+    return _async_engine
+
+
 # creating the tables on startup.
 def init_db() -> None:
     """Create tables on startup."""
@@ -55,3 +150,34 @@ def session_scope() -> Iterator[Session]:
 def get_session() -> Iterator[Session]:
     with session_scope() as session:
         yield session
+
+
+# creating an async session for the database.
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[AsyncSession]:
+    get_async_engine()
+    assert _async_sessionmaker is not None
+    session = _async_sessionmaker()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+# exporting the async session for use in async routes.
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    async with async_session_scope() as session:
+        yield session
+
+
+# disposing the async engine on shutdown.
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_sessionmaker = None
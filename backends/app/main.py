@@ -11,18 +11,27 @@
 '''
 
 
-from fastapi import FastAPI, HTTPException
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import select
 
-from app import models
+from app import metrics, models
 from app.config import settings
-from app.database import init_db, session_scope
-from app.middleware import RateLimiterMiddleware
+from app.database import dispose_async_engine, init_db, session_scope
+from app.middleware import MetricsMiddleware, ProfilingMiddleware, RateLimiterMiddleware
+from app.rate_limit import create_rate_limiter
 from app.api import routes_ai, routes_memory, routes_todos
+from app.services import chroma_service
+from app.services.index_queue import index_queue
+from app.services.job_service import ai_job_runner
 
 # creating the FastAPI app.
 app = FastAPI(title="AI Task Backend", version="0.1.0")
+# innermost, so rate limiting still applies to profiled requests; not installed at all when off.
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -30,21 +39,40 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# RATE_LIMIT_BACKEND picks where client budgets live (shared backends hold across workers).
+rate_limiter = create_rate_limiter()
 app.add_middleware(
     RateLimiterMiddleware,
     limit=settings.RATE_LIMIT_REQUESTS,
     window_seconds=settings.RATE_LIMIT_WINDOW_SECONDS,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS,
+    limiter=rate_limiter,
 )
+# outermost, so latency includes every other middleware.
+app.add_middleware(MetricsMiddleware)
 # including the routes.
 app.include_router(routes_todos.router)
 app.include_router(routes_ai.router)
 app.include_router(routes_memory.router)
 
 
-# initializing the database on startup.
+# initializing the database and background workers on startup.
 @app.on_event("startup")
-def _startup() -> None:
+async def _startup() -> None:
     init_db()
+    index_queue.start()
+    # requeues jobs left over from the previous run.
+    await ai_job_runner.start()
+
+
+# stopping the job workers and draining the background indexer on shutdown.
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    await ai_job_runner.stop()
+    index_queue.stop()
+    chroma_service.flush_embedding_cache()
+    await rate_limiter.aclose()
+    await dispose_async_engine()
 
 
 # healthcheck endpoint.
@@ -53,12 +81,25 @@ def healthcheck() -> dict[str, str]:
     return {"status": "ok", "debug": str(settings.DEBUG).lower()}
 
 
+# prometheus scrape endpoint.
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics_endpoint() -> Response:
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # readiness endpoint.
 @app.get("/ready", tags=["Health"])
-def readiness() -> dict[str, str]:
+def readiness(
+    index_timeout: float = Query(
+        default=0.0, ge=0.0, le=60.0, description="Seconds to wait for the index to catch up"
+    ),
+) -> dict[str, Any]:
     try:
         with session_scope() as session:
             session.exec(select(models.TodoItem.id).limit(1))
     except Exception as exc:  # pragma: no cover - surfaces infra bugs
         raise HTTPException(status_code=503, detail="Database unavailable") from exc
-    return {"status": "ready"}
+    # optionally waiting for the background indexer to drain.
+    if index_timeout and not index_queue.flush(timeout=index_timeout):
+        raise HTTPException(status_code=503, detail="Index is still catching up")
+    return {"status": "ready", "index": index_queue.stats()}
@@ -10,8 +10,9 @@ import fastmcp
 from fastmcp import FastMCP
 
 from app import models, schemas
+from app.profiling import profile_tool
 from app.config import settings
-from app.database import session_scope
+from app.database import async_session_scope, session_scope
 from app.services import ai_service, chroma_service, todo_service
 
 
@@ -52,12 +53,14 @@ def health() -> dict[str, str]:
     return {"status": "ok", "debug": str(settings.DEBUG).lower()}
 
 
-def ai_generate(user_input: str, save: bool = False) -> dict[str, Any]:
-    todos = ai_service.generate_structured_todos(user_input)
+async def ai_generate(
+    user_input: str, save: bool = False, use_cache: bool = True
+) -> dict[str, Any]:
+    todos = await ai_service.generate_structured_todos_async(user_input, use_cache=use_cache)
     persisted: list[int] = []
     if save:
-        with session_scope() as session:
-            created = todo_service.save_generated_tree(todos, session)
+        async with async_session_scope() as session:
+            created = await todo_service.save_generated_tree_async(todos, session)
             persisted = [todo.id for todo in created]
     return {
         "todos": _generated_to_dict(todos),
@@ -77,18 +80,32 @@ def list_todos(
     priority: schemas.Priority | None = None,
     due_before: str | None = None,
     due_after: str | None = None,
-) -> list[dict[str, Any]]:
+    limit: int | None = None,
+    cursor: str | None = None,
+    order_by: schemas.TodoSort | None = None,
+    fields: list[str] | None = None,
+) -> list[dict[str, Any]] | dict[str, Any]:
     parsed_before = schemas.TodoUpdate(deadline=due_before).deadline if due_before else None
     parsed_after = schemas.TodoUpdate(deadline=due_after).deadline if due_after else None
+    filters = {
+        "status_filter": status,
+        "priority_filter": priority,
+        "due_before": parsed_before,
+        "due_after": parsed_after,
+    }
     with session_scope() as session:
-        records = todo_service.list_todos(
+        # without paging options the tool keeps returning the full list.
+        if limit is None and cursor is None and order_by is None and fields is None:
+            return [_todo_to_dict(record) for record in todo_service.list_todos(session, **filters)]
+        page = todo_service.list_todos_page(
             session,
-            status_filter=status,
-            priority_filter=priority,
-            due_before=parsed_before,
-            due_after=parsed_after,
+            **filters,
+            limit=max(1, min(limit or 100, 1000)),
+            cursor=cursor,
+            order_by=order_by or "updated_at",
+            fields=fields,
         )
-        return [_todo_to_dict(record) for record in records]
+        return page.model_dump(mode="json")
 
 
 def update_todo(todo_id: int, fields: dict[str, Any]) -> dict[str, Any]:
@@ -116,20 +133,41 @@ def todo_tree() -> list[dict[str, Any]]:
         return _tree_to_dict(tree)
 
 
+def todo_subtree(todo_id: int, max_depth: int | None = None) -> dict[str, Any]:
+    with session_scope() as session:
+        node = todo_service.get_subtree(todo_id, session, max_depth=max_depth)
+        return node.model_dump(mode="json")
+
+
+def todo_ancestors(todo_id: int) -> list[dict[str, Any]]:
+    with session_scope() as session:
+        records = todo_service.get_ancestors(todo_id, session)
+        return [_todo_to_dict(record) for record in records]
+
+
 def memory_search(query: str, limit: int = 5) -> list[dict[str, Any]]:
     results = chroma_service.search_memory(query, limit=limit)
     return results
 
 
-mcp.tool(description="Health probe mirroring FastAPI /health")(health)
-mcp.tool(description="Generate hierarchical todos via Claude/OpenRouter")(ai_generate)
-mcp.tool(description="Create a single todo node")(create_todo)
-mcp.tool(description="List todos with optional filters")(list_todos)
-mcp.tool(description="Update a todo by id")(update_todo)
-mcp.tool(description="Delete a todo by id")(delete_todo)
-mcp.tool(description="Mark a todo as complete")(complete_todo)
-mcp.tool(description="Return the nested todo tree")(todo_tree)
-mcp.tool(description="Semantic task search backed by ChromaDB embeddings")(memory_search)
+# profile_tool is a no-op unless PROFILING_MCP_TOOLS names the tool (or is "*").
+mcp.tool(description="Health probe mirroring FastAPI /health")(profile_tool(health))
+mcp.tool(description="Generate hierarchical todos via Claude/OpenRouter")(profile_tool(ai_generate))
+mcp.tool(description="Create a single todo node")(profile_tool(create_todo))
+mcp.tool(
+    description="List todos with optional filters; limit/cursor return a page {items, next_cursor}"
+)(profile_tool(list_todos))
+mcp.tool(description="Update a todo by id")(profile_tool(update_todo))
+mcp.tool(description="Delete a todo by id")(profile_tool(delete_todo))
+mcp.tool(description="Mark a todo as complete")(profile_tool(complete_todo))
+mcp.tool(description="Return the nested todo tree")(profile_tool(todo_tree))
+mcp.tool(
+    description="Return one todo and its descendants, optionally limited to max_depth levels"
+)(profile_tool(todo_subtree))
+mcp.tool(description="Return the ancestors of a todo, root first")(profile_tool(todo_ancestors))
+mcp.tool(
+    description="Semantic task search backed by ChromaDB embeddings"
+)(profile_tool(memory_search))
 
 
 @mcp.resource("mcp://docs/api", description="REST contract for the AI Task backend")
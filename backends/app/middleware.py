@@ -3,7 +3,7 @@
 '''
 @File    :   middleware.py
 @Time    :   2025/10/25 15:55:38
-@Author  :   Ethan Pan 
+@Author  :   Ethan Pan
 @Version :   1.0
 @Contact :   epan@cs.wisc.edu
 @License :   (C)Copyright 2020-2025, Ethan Pan
@@ -13,41 +13,190 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import math
 import time
-from collections import defaultdict, deque
-from typing import Deque, DefaultDict
+from typing import Any, Optional
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import metrics, profiling
+from app.rate_limit import MemoryRateLimiter, RateLimitDecision, RateLimiter
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
 
 # rate limiter middleware.
-class RateLimiterMiddleware(BaseHTTPMiddleware):
-    """Naive in-memory rate limiter suitable for local/dev usage."""
-    # initializing the rate limiter.
-    def __init__(self, app, limit: int, window_seconds: int) -> None:  # type: ignore[override]
-        super().__init__(app)
+class RateLimiterMiddleware:
+    """Pure ASGI rate limiter: per-client GCRA with ``X-RateLimit-*`` and ``Retry-After`` headers.
+
+    Unlike ``BaseHTTPMiddleware`` it never wraps the request or response body, so
+    streamed responses (SSE) pass straight through and the per-request cost is one
+    limiter check (a dictionary update with the default memory backend) plus a few headers.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limit: int,
+        window_seconds: int,
+        max_keys: int = 10_000,
+        limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self.app = app
         self.limit = limit
-        self.window = window_seconds
-        self._hits: DefaultDict[str, Deque[float]] = defaultdict(deque)
+        # a shared backend (see app.rate_limit) makes one limit hold across uvicorn workers.
+        if limiter is None:
+            limiter = MemoryRateLimiter(limit, window_seconds, max_keys=max_keys)
+        self.limiter = limiter
 
-    # dispatching the request.
-    async def dispatch(self, request: Request, call_next) -> Response:  # type: ignore[override]
-        if self.limit <= 0:
-            return await call_next(request)
+    # handling the request.
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.limit <= 0:
+            await self.app(scope, receive, send)
+            return
         # getting the key for the request.
-        key = request.client.host if request.client else "global"
-        # getting the current time.
-        now = time.monotonic()
-        window_start = now - self.window
-        # getting the bucket for the request.
-        bucket = self._hits[key]
-        # removing old hits from the bucket.
-        while bucket and bucket[0] < window_start:
-            bucket.popleft()
-        # checking if the rate limit has been exceeded.
-        if len(bucket) >= self.limit:
-            return JSONResponse({"detail": "Rate limit exceeded"}, status_code=429)
-        bucket.append(now)
-        # calling the next middleware.
-        return await call_next(request)
+        client = scope.get("client")
+        key = client[0] if client else "global"
+        decision = await self.limiter.acquire(key)
+        headers = _headers(decision)
+        # rejecting the request before it reaches the app.
+        if not decision.allowed:
+            body = json.dumps({"detail": "Rate limit exceeded"}).encode()
+            headers.append((b"retry-after", str(math.ceil(decision.retry_after)).encode()))
+            headers.append((b"content-type", b"application/json"))
+            headers.append((b"content-length", str(len(body)).encode()))
+            await send({"type": "http.response.start", "status": 429, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        # adding the rate-limit headers to the app's response.
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+# building the X-RateLimit-* headers for a decision.
+def _headers(decision: RateLimitDecision) -> list[tuple[bytes, bytes]]:
+    return [
+        (b"x-ratelimit-limit", str(decision.limit).encode()),
+        (b"x-ratelimit-remaining", str(decision.remaining).encode()),
+        (b"x-ratelimit-reset", str(math.ceil(decision.reset_after)).encode()),
+    ]
+
+
+# request metrics middleware.
+class MetricsMiddleware:
+    """Pure ASGI request metrics: a latency histogram and status counter per route, plus in-flight.
+
+    Requests are labelled with the route template (``/todos/{todo_id}``), never the raw
+    path, so the number of series stays bounded; anything that did not match a route
+    (404s, requests rejected by outer middleware) is counted as ``unmatched``.
+    """
+
+    def __init__(self, app: ASGIApp, skip_paths: tuple[str, ...] = ("/metrics",)) -> None:
+        self.app = app
+        self.skip_paths = skip_paths
+        self._in_flight = metrics.HTTP_IN_FLIGHT.labels()
+        # (method, route) -> latency series and (method, route, status) -> counter, resolved
+        # once each.
+        self._latency: dict[tuple[str, str], Any] = {}
+        self._requests: dict[tuple[str, str, int], Any] = {}
+
+    # handling the request.
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        started = time.perf_counter()
+
+        # remembering the status the app answered with.
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self._in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self._in_flight.dec()
+            # FastAPI leaves the matched route in the scope once routing is done.
+            route = scope.get("route")
+            key = (scope["method"], getattr(route, "path", None) or "unmatched")
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = metrics.HTTP_REQUEST_SECONDS.labels(method=key[0], route=key[1])
+                self._latency[key] = latency
+            latency.observe(time.perf_counter() - started)
+            counter_key = (*key, status_code)
+            requests = self._requests.get(counter_key)
+            if requests is None:
+                requests = self._requests[counter_key] = metrics.HTTP_REQUESTS.labels(
+                    method=key[0], route=key[1], status=str(status_code)
+                )
+            requests.inc()
+
+
+# opt-in request profiling middleware.
+class ProfilingMiddleware:
+    """Pure ASGI profiler hook: runs flagged requests under ``app.profiling.SamplingProfiler``.
+
+    A request is profiled when it carries ``X-Profile: 1`` or ``?profile=1`` and its client
+    is in PROFILING_ALLOWED_CLIENTS; the profile covers the whole request, body included,
+    and its file name comes back in ``X-Profile-File``. Everything else passes straight
+    through after one header scan.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    # handling the request.
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+        client = scope.get("client")
+        if not profiling.client_allowed(client[0] if client else None):
+            await self.app(scope, receive, send)
+            return
+        profiler = profiling.try_start(f"{scope['method']} {scope['path']}")
+        if profiler is None:
+            # another profile is running; serve the request unprofiled and say so.
+            await self.app(scope, receive, _with_header(send, b"busy"))
+            return
+        name = profiler.path.name.encode() if profiler.path is not None else b""
+        try:
+            await self.app(scope, receive, _with_header(send, name))
+        finally:
+            # writing the file happens off the loop; the response has already gone out.
+            await asyncio.to_thread(profiling.finish, profiler)
+
+
+# checking the X-Profile header and the profile query flag.
+def _profile_requested(scope: Scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile":
+            return value.strip() in (b"1", b"true")
+    query = scope.get("query_string", b"")
+    if b"profile" not in query:
+        return False
+    return any(
+        key == "profile" and value in ("1", "true")
+        for key, value in parse_qsl(query.decode("latin-1"))
+    )
+
+
+# naming the profile file (or "busy" when none was taken) on the response.
+def _with_header(send: Send, value: bytes) -> Send:
+    async def send_with_header(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            message["headers"] = list(message.get("headers", [])) + [(b"x-profile-file", value)]
+        await send(message)
+
+    return send_with_header
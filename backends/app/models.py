@@ -16,6 +16,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -23,6 +24,14 @@ from sqlmodel import Field, SQLModel
 class TodoItem(SQLModel, table=True):
     # defining the table name.
     __tablename__ = "todo_items"
+    # defining composite indexes that match the list_todos filter + keyset combinations.
+    __table_args__ = (
+        Index("ix_todo_items_status_priority_updated_at", "status", "priority", "updated_at", "id"),
+        Index("ix_todo_items_status_updated_at", "status", "updated_at", "id"),
+        Index("ix_todo_items_priority_updated_at", "priority", "updated_at", "id"),
+        Index("ix_todo_items_deadline", "deadline", "id"),
+        Index("ix_todo_items_updated_at", "updated_at", "id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     # defining the foreign key for the parent id.
@@ -46,3 +55,39 @@ class TodoItem(SQLModel, table=True):
     def touch(self) -> None:
         # updating the updated at timestamp.
         self.updated_at = datetime.now(timezone.utc)
+
+
+# background ai generation job model.
+class AIJob(SQLModel, table=True):
+    # defining the table name.
+    __tablename__ = "ai_jobs"
+    # defining indexes for requeueing pending jobs and sweeping expired results.
+    __table_args__ = (
+        Index("ix_ai_jobs_status_created_at", "status", "created_at"),
+        Index("ix_ai_jobs_expires_at", "expires_at"),
+    )
+
+    # defining the opaque job id handed back to clients.
+    id: str = Field(primary_key=True, max_length=32)
+    # defining the status for the job (queued, running, succeeded, failed).
+    status: str = Field(default="queued", max_length=16)
+    # defining the request fields for the job.
+    user_input: str
+    save: bool = Field(default=True)
+    use_cache: bool = Field(default=True)
+    # defining how many times a worker has picked the job up.
+    attempts: int = Field(default=0)
+    # defining the JSON-encoded AIGenerateResponse once the job succeeds.
+    result: Optional[str] = Field(default=None)
+    # defining the failure detail and status code once the job fails.
+    error: Optional[str] = Field(default=None)
+    error_status: Optional[int] = Field(default=None)
+
+    # defining the lifecycle timestamps.
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
+    started_at: Optional[datetime] = Field(default=None)
+    finished_at: Optional[datetime] = Field(default=None)
+    # defining until when the running worker holds the job; it renews this while it works.
+    lease_expires_at: Optional[datetime] = Field(default=None)
+    # defining when a finished job's result is discarded.
+    expires_at: Optional[datetime] = Field(default=None)
@@ -0,0 +1,223 @@
+"""Opt-in sampling profiler.
+
+Writes collapsed stacks (flamegraph.pl / speedscope) per request or tool call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import itertools
+import ipaddress
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any, Callable, Optional, TypeVar
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+_sequence = itertools.count(1)
+# one profile at a time: a second sampler would double the overhead and blur both profiles.
+_active = threading.Lock()
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame: FrameType) -> bool:
+    # pool workers parked on their work queue are not part of anybody's request.
+    for _ in range(4):
+        if frame is None:
+            return False
+        if frame.f_code.co_name == "get" and frame.f_code.co_filename.endswith("queue.py"):
+            return True
+        frame = frame.f_back  # type: ignore[assignment]
+    return False
+
+
+class SamplingProfiler:
+    """Sample every thread's stack each ``interval`` seconds and count identical stacks.
+
+    Wall-clock sampling covers async routes (the event loop thread) and sync routes (the
+    threadpool worker) alike; time spent waiting on I/O shows up as the loop's selector.
+    Stacks are prefixed with the thread name. Other requests running at the same time
+    appear too, so profile on a quiet instance when the numbers matter.
+    """
+
+    def __init__(
+        self, interval: float = 0.001, max_depth: int = 128, path: Optional[Path] = None
+    ) -> None:
+        self.interval = interval
+        # where ``finish`` writes the profile; named up front so responses can point at it.
+        self.path = path
+        self.max_depth = max_depth
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_idle(frame):
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                labels = []
+                current: Optional[FrameType] = frame
+                while current is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(current))
+                    current = current.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """``root;...;leaf count`` lines, the input format of flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def client_allowed(host: Optional[str]) -> bool:
+    """Whether ``host`` falls inside PROFILING_ALLOWED_CLIENTS (comma-separated IPs or CIDRs)."""
+    if not host:
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return host in {entry.strip() for entry in settings.PROFILING_ALLOWED_CLIENTS.split(",")}
+    for entry in settings.PROFILING_ALLOWED_CLIENTS.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            if address in ipaddress.ip_network(entry, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def try_start(label: str) -> Optional[SamplingProfiler]:
+    """Start a profiler unless one is already running (then the caller runs unprofiled)."""
+    if not _active.acquire(blocking=False):
+        return None
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    slug = _SLUG.sub("-", label).strip("-")[:80] or "profile"
+    name = f"{stamp}-{os.getpid()}-{next(_sequence)}-{slug}.collapsed"
+    path = Path(settings.PROFILING_DIR) / name
+    profiler = SamplingProfiler(interval=settings.PROFILING_INTERVAL_MS / 1000, path=path)
+    profiler.start()
+    return profiler
+
+
+def finish(profiler: SamplingProfiler) -> Optional[Path]:
+    """Stop ``profiler``, write its collapsed stacks to ``profiler.path`` and prune old profiles."""
+    try:
+        profiler.stop()
+    finally:
+        _active.release()
+    path = profiler.path
+    if path is None:
+        return None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(profiler.collapsed(), encoding="utf-8")
+        prune(path.parent, keep=path)
+    except OSError:
+        logger.warning("Could not write profile %s", path, exc_info=True)
+        return None
+    logger.info(
+        "Wrote profile %s (%d samples over %.1f ms)",
+        path,
+        profiler.samples,
+        profiler.duration * 1000,
+    )
+    return path
+
+
+def prune(directory: Path, keep: Optional[Path] = None) -> None:
+    """Keep at most PROFILING_MAX_FILES profiles and PROFILING_MAX_BYTES in total, newest first.
+
+    ``keep`` (the profile just written, already named in a response header) is never removed,
+    even when it alone exceeds the byte budget; it still counts against both limits.
+    """
+    entries = []
+    for path in directory.glob("*.collapsed"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            # another worker pruned it first.
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+    entries.sort(key=lambda entry: (entry[2] == keep, entry[0]), reverse=True)
+    total = 0
+    for idx, (_mtime, size, path) in enumerate(entries):
+        total += size
+        if path == keep:
+            continue
+        if idx >= settings.PROFILING_MAX_FILES or total > settings.PROFILING_MAX_BYTES:
+            path.unlink(missing_ok=True)
+
+
+def profile_tool(fn: F) -> F:
+    """Profile every call of an MCP tool listed in PROFILING_MCP_TOOLS (``*`` for all).
+
+    Tools that are not listed are returned unchanged, so there is no cost when it is off.
+    """
+    enabled = {name.strip() for name in settings.PROFILING_MCP_TOOLS.split(",") if name.strip()}
+    if not settings.PROFILING_ENABLED or not (enabled & {fn.__name__, "*"}):
+        return fn
+    label = f"mcp {fn.__name__}"
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            profiler = try_start(label)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                if profiler is not None:
+                    await asyncio.to_thread(finish, profiler)
+
+        return async_wrapper  # type: ignore[return-value]
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        profiler = try_start(label)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                finish(profiler)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,295 @@
+"""GCRA rate limiter backends: in-process memory, a SQLite file shared by workers, or Redis."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# the outcome of one rate-limit check.
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    # seconds until the next request would be allowed (0 when allowed).
+    retry_after: float
+    # seconds until the client's full burst is available again.
+    reset_after: float
+
+
+# base class shared by every backend.
+class RateLimiter:
+    """GCRA: ``limit`` requests per ``window_seconds`` per key.
+
+    Each key is stored as one theoretical arrival time. A request costs ``window / limit``
+    seconds; it is allowed while the key's arrival time is at most one window ahead of now.
+    Backends only differ in where that float lives and how it is updated atomically.
+    ``acquire`` is what the middleware awaits: the memory backend answers inline from
+    ``hit``, the shared backends never block the event loop.
+    """
+
+    name = "base"
+
+    def __init__(
+        self, limit: int, window_seconds: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.limit = limit
+        self.window = float(window_seconds)
+        self._clock = clock
+        # emission interval: one request "costs" this many seconds of the window.
+        self._interval = self.window / limit if limit > 0 else 0.0
+        # checks that could not reach the store and were let through.
+        self.errors = 0
+
+    def hit(self, key: str) -> RateLimitDecision:
+        raise NotImplementedError
+
+    async def acquire(self, key: str) -> RateLimitDecision:
+        return self.hit(key)
+
+    def _allowed(self, new_tat: float, now: float) -> RateLimitDecision:
+        remaining = int((now + self.window - new_tat) / self._interval + 1e-9)
+        return RateLimitDecision(True, self.limit, max(remaining, 0), 0.0, new_tat - now)
+
+    def _rejected(self, tat: float, now: float) -> RateLimitDecision:
+        retry_after = tat + self._interval - self.window - now
+        return RateLimitDecision(False, self.limit, 0, retry_after, tat - now)
+
+    def _fail_open(self, key: str) -> RateLimitDecision:
+        # an unreachable store must not take the API down with it.
+        self.errors += 1
+        logger.warning(
+            "Rate limit store unavailable (%s backend); allowing %s", self.name, key, exc_info=True
+        )
+        return RateLimitDecision(True, self.limit, self.limit, 0.0, 0.0)
+
+    async def aclose(self) -> None:
+        return None
+
+
+# in-memory limiter (one per process).
+class MemoryRateLimiter(RateLimiter):
+    """Per-process GCRA state in an LRU capped at ``max_keys``.
+
+    A key whose arrival time has passed carries no state worth keeping. Expiry is
+    opportunistic: each request checks up to ``EXPIRE_SCAN`` keys at the cold end, drops
+    the expired ones and moves keys that still owe time to the warm end, so one client
+    with a long burst debt cannot hide the expired keys behind it. Whatever this misses
+    is bounded by ``max_keys``. With ``--workers N`` every worker has its own table, so
+    use a shared backend there.
+    """
+
+    name = "memory"
+
+    # keys inspected for expiry per request.
+    EXPIRE_SCAN = 8
+
+    def __init__(
+        self,
+        limit: int,
+        window_seconds: float,
+        max_keys: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(limit, window_seconds, clock)
+        self.max_keys = max_keys
+        self._tat: OrderedDict[str, float] = OrderedDict()
+        self.evictions = 0
+
+    def hit(self, key: str) -> RateLimitDecision:
+        now = self._clock()
+        self._expire(now)
+        tat = max(self._tat.get(key, now), now)
+        new_tat = tat + self._interval
+        if new_tat - self.window > now:
+            # rejected requests do not consume capacity.
+            return self._rejected(tat, now)
+        self._tat[key] = new_tat
+        self._tat.move_to_end(key)
+        if len(self._tat) > self.max_keys:
+            # the coldest client loses its history, i.e. gets a fresh burst.
+            self._tat.popitem(last=False)
+            self.evictions += 1
+        return self._allowed(new_tat, now)
+
+    def _expire(self, now: float) -> None:
+        # bounded work per request; the table is in last-allowed order, not arrival-time order.
+        for key, tat in list(islice(self._tat.items(), self.EXPIRE_SCAN)):
+            if tat <= now:
+                del self._tat[key]
+            else:
+                self._tat.move_to_end(key)
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+
+# shared sqlite limiter (all workers on one host).
+class SQLiteRateLimiter(RateLimiter):
+    """GCRA state in a SQLite file shared by every worker process on the host.
+
+    Each check is a single ``INSERT ... ON CONFLICT DO UPDATE ... WHERE ... RETURNING``
+    statement, so the read-modify-write is atomic across processes without explicit
+    locking; a rejected request returns no row and changes nothing. The file uses WAL
+    with ``synchronous=OFF`` because losing limiter state in a crash is harmless.
+    ``acquire`` runs the check on a worker thread, since it can wait up to
+    ``busy_timeout_ms`` for another process's write lock.
+    """
+
+    name = "sqlite"
+
+    # deleting refilled keys every this many checks (per process).
+    PURGE_EVERY = 1024
+
+    _UPSERT = (
+        "INSERT INTO rate_limits (key, tat) VALUES (:key, :now + :interval) "
+        "ON CONFLICT(key) DO UPDATE SET tat = max(tat, :now) + :interval "
+        "WHERE max(tat, :now) + :interval - :window <= :now "
+        "RETURNING tat"
+    )
+
+    def __init__(
+        self,
+        limit: int,
+        window_seconds: float,
+        path: str,
+        busy_timeout_ms: int = 200,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        # wall-clock time: monotonic clocks are not comparable between processes everywhere.
+        super().__init__(limit, window_seconds, clock)
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._checks = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        # one connection per thread and process; forked workers must not share the parent's.
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(
+                self.path, isolation_level=None, timeout=self.busy_timeout_ms / 1000
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits "
+                "(key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key: str) -> RateLimitDecision:
+        now = self._clock()
+        params = {"key": key, "now": now, "interval": self._interval, "window": self.window}
+        try:
+            conn = self._connection()
+            # fetchall steps the statement to completion, which commits and releases the write lock.
+            rows = conn.execute(self._UPSERT, params).fetchall()
+            if not rows:
+                current = conn.execute(
+                    "SELECT tat FROM rate_limits WHERE key = ?", (key,)
+                ).fetchall()
+                return self._rejected(max(current[0][0] if current else now, now), now)
+            self._checks += 1
+            if self._checks % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+        except sqlite3.Error:
+            return self._fail_open(key)
+        return self._allowed(rows[0][0], now)
+
+    async def acquire(self, key: str) -> RateLimitDecision:
+        # each worker thread keeps its own connection (see _connection).
+        return await asyncio.to_thread(self.hit, key)
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM rate_limits").fetchone()[0]
+
+
+# shared redis limiter (any Redis-protocol server).
+class RedisRateLimiter(RateLimiter):
+    """GCRA state in Redis, updated by one Lua script so the check is atomic across hosts.
+
+    The script reads the server's ``TIME``, so workers never compare their own clocks,
+    and sets a TTL equal to the remaining debt so idle keys expire on their own. Works
+    with anything that speaks the Redis protocol and runs ``EVALSHA`` (Redis, Valkey,
+    KeyDB, Dragonfly). Needs the ``redis`` extra.
+    """
+
+    name = "redis"
+
+    _SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + interval
+if new_tat - window > now then
+  return {0, tostring(tat - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, tostring(new_tat - now)}
+"""
+
+    def __init__(
+        self, limit: int, window_seconds: float, url: str, prefix: str = "ratelimit:"
+    ) -> None:
+        super().__init__(limit, window_seconds)
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:  # pragma: no cover - depends on the optional extra
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis needs the 'redis' extra (uv sync --extra redis)"
+            ) from exc
+        self.url = url
+        self.prefix = prefix
+        self._client: Any = redis_asyncio.Redis.from_url(url)
+        self._script = self._client.register_script(self._SCRIPT)
+
+    # the middleware awaits acquire, so this is never reached in practice.
+    def hit(self, key: str) -> RateLimitDecision:  # pragma: no cover
+        raise TypeError("RedisRateLimiter is async-only; await acquire()")
+
+    async def acquire(self, key: str) -> RateLimitDecision:
+        try:
+            allowed, offset = await self._script(
+                keys=[self.prefix + key], args=[self._interval, self.window]
+            )
+        except Exception:
+            return self._fail_open(key)
+        # the script reports times relative to the server's clock, so "now" is 0 here.
+        if int(allowed):
+            return self._allowed(float(offset), 0.0)
+        return self._rejected(float(offset), 0.0)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# building the limiter selected by RATE_LIMIT_BACKEND.
+def create_rate_limiter(backend: Optional[str] = None) -> RateLimiter:
+    backend = (backend or settings.RATE_LIMIT_BACKEND).lower()
+    limit, window = settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_WINDOW_SECONDS
+    if backend == "memory":
+        return MemoryRateLimiter(limit, window, max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    if backend == "sqlite":
+        return SQLiteRateLimiter(limit, window, path=settings.RATE_LIMIT_SQLITE_PATH)
+    if backend == "redis":
+        return RedisRateLimiter(limit, window, url=settings.RATE_LIMIT_REDIS_URL)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND {backend!r} (expected memory, sqlite or redis)")
@@ -14,12 +14,13 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
 Priority = Literal["low", "medium", "high"]
 Status = Literal["pending", "in-progress", "done"]
+TodoSort = Literal["updated_at", "deadline"]
 
 
 # todo base model.
@@ -69,6 +70,14 @@ class TodoRead(TodoBase):
     model_config = {"from_attributes": True}
 
 
+# todo page model.
+class TodoPage(BaseModel):
+    # defining the (optionally projected) todos for the page.
+    items: List[Dict[str, Any]] = Field(default_factory=list)
+    # defining the opaque cursor for the next page, None on the last page.
+    next_cursor: Optional[str] = None
+
+
 # todo tree node model.
 class TodoTreeNode(BaseModel):
     # defining the id for the todo item.
@@ -100,6 +109,8 @@ class AIGenerateRequest(BaseModel):
     user_input: str = Field(min_length=4)
     # defining the save flag for the ai generate request.
     save: bool = True
+    # defining the cache flag (False forces a fresh completion) for the ai generate request.
+    use_cache: bool = True
 
 
 # generated todo node model.
@@ -136,6 +147,24 @@ class AIGenerateResponse(BaseModel):
     persisted_ids: List[int] = Field(default_factory=list)
 
 
+# ai job model.
+class AIJobRead(BaseModel):
+    # defining the id and status for the ai job.
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    # defining the attempts for the ai job.
+    attempts: int = 0
+    # defining the result (succeeded jobs) and error (failed jobs) for the ai job.
+    result: Optional[AIGenerateResponse] = None
+    error: Optional[str] = None
+    error_status: Optional[int] = None
+    # defining the lifecycle timestamps for the ai job.
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+
 # memory search request model.
 class MemorySearchRequest(BaseModel):
     # defining the query for the memory search request.
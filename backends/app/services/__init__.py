@@ -1,5 +1,5 @@
 """Service layer exports."""
 
-from . import ai_service, chroma_service, todo_service
+from . import ai_service, chroma_service, index_queue, todo_service
 
-__all__ = ["ai_service", "chroma_service", "todo_service"]
+__all__ = ["ai_service", "chroma_service", "index_queue", "todo_service"]
@@ -2,20 +2,29 @@
 
 from __future__ import annotations
 
+import asyncio
+import importlib.util
 import json
 import logging
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional
 
 import httpx
 from fastapi import HTTPException, status
 
 from app.config import settings
 from app.services import ai_service
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
 ProviderName = str
+MultiStrategy = Literal["race", "hedge"]
 
 
 @dataclass
@@ -25,6 +34,8 @@ class AgentResult:
     output: str
     raw: Any
     used_fallback: bool = False
+    # per-provider timings for raced/hedged runs: provider, started_ms, elapsed_ms, outcome, error.
+    attempts: List[Dict[str, Any]] = field(default_factory=list)
 
 
 class ProviderConfigError(RuntimeError):
@@ -50,12 +61,60 @@ def _extract_text(payload: Any) -> str:
     return ""
 
 
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
 class HTTPAgentProvider:
-    def __init__(self, name: str, base_url: Optional[str], api_key: Optional[str], default_model: Optional[str] = None):
+    def __init__(
+        self,
+        name: str,
+        base_url: Optional[str],
+        api_key: Optional[str],
+        default_model: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         self.name = name
         self.base_url = base_url
         self.api_key = api_key
         self.default_model = default_model
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.AGENT_HTTP2
+        if http2 and not _http2_available():
+            logger.warning(
+                "AGENT_HTTP2 is enabled but 'h2' is not installed; %s stays on HTTP/1.1", self.name
+            )
+            http2 = False
+        limits = httpx.Limits(
+            max_connections=settings.AGENT_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AGENT_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.AGENT_HTTP_KEEPALIVE_EXPIRY,
+        )
+        return httpx.AsyncClient(
+            timeout=settings.AGENT_HTTP_TIMEOUT,
+            limits=limits,
+            http2=http2,
+            transport=self.transport,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Long-lived pooled client; created lazily if the lifespan has not opened it."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def open(self) -> None:
+        if self.base_url and self._client is None:
+            self._client = self._build_client()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def run(self, model: Optional[str], user_input: str, metadata: Optional[Dict[str, Any]]) -> AgentResult:
         if not self.base_url:
@@ -71,14 +130,13 @@ class HTTPAgentProvider:
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
 
-        async with httpx.AsyncClient(timeout=settings.AGENT_HTTP_TIMEOUT) as client:
-            response = await client.post(self.base_url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            text = _extract_text(data)
-            if not text:
-                text = json.dumps(data)
-            return AgentResult(provider=self.name, model=final_model, output=text, raw=data)
+        response = await self.client.post(self.base_url, json=payload, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        text = _extract_text(data)
+        if not text:
+            text = json.dumps(data)
+        return AgentResult(provider=self.name, model=final_model, output=text, raw=data)
 
 
 def _fallback_response(user_input: str) -> AgentResult:
@@ -95,6 +153,92 @@ def _fallback_response(user_input: str) -> AgentResult:
     return AgentResult(provider="fallback", model=None, output=text, raw=[node.model_dump() for node in todos], used_fallback=True)
 
 
+class FallbackExecutor:
+    """Runs the blocking local planner on its own bounded thread pool.
+
+    ``generate_structured_todos`` uses the sync OpenAI client and tenacity sleeps, so
+    calling it on the event loop stalls every other relay request. Here at most
+    ``max_workers`` fallbacks run at once, at most ``max_pending`` may be queued or
+    running before new ones are refused with 503, and callers stop waiting after
+    ``timeout`` seconds (504); the worker thread itself cannot be interrupted and
+    finishes in the background.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.max_workers = settings.AGENT_FALLBACK_WORKERS if max_workers is None else max_workers
+        self.max_pending = (
+            settings.AGENT_FALLBACK_MAX_PENDING if max_pending is None else max_pending
+        )
+        self.timeout = settings.AGENT_FALLBACK_TIMEOUT if timeout is None else timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._cancelled = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="agent-fallback"
+                )
+            return self._executor
+
+    def _done(self, future: Any) -> None:
+        with self._lock:
+            self._pending -= 1
+            # a caller that timed out while the job was still queued cancels it before it runs.
+            if future.cancelled():
+                self._cancelled += 1
+            else:
+                self._completed += 1
+
+    async def run(self, user_input: str) -> AgentResult:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Fallback planner is saturated, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        future = self._get_executor().submit(_fallback_response, user_input)
+        future.add_done_callback(self._done)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timed_out += 1
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Fallback planner timed out"
+            )
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "pending": self._pending,
+                "completed": self._completed,
+                "cancelled": self._cancelled,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
 class AgentRouter:
     def __init__(self) -> None:
         self.providers: dict[str, HTTPAgentProvider] = {
@@ -119,29 +263,224 @@ class AgentRouter:
                 api_key=settings.LETTA_API_KEY,
             ),
         }
+        self.breakers: dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(name) for name in self.providers
+        }
+        self._wins: Counter[str] = Counter()
+        self._multi_runs = 0
+        self._hedges_fired = 0
+        self._all_failed = 0
+        self.fallback = FallbackExecutor()
+
+    async def startup(self) -> None:
+        for handler in self.providers.values():
+            await handler.open()
+
+    async def shutdown(self) -> None:
+        for handler in self.providers.values():
+            await handler.aclose()
+        self.fallback.shutdown()
+
+    def status(self) -> dict[str, Any]:
+        return {
+            name: {
+                "configured": bool(handler.base_url),
+                "wins": self._wins[name],
+                **self.breakers[name].snapshot(),
+            }
+            for name, handler in self.providers.items()
+        }
+
+    def multi_status(self) -> dict[str, int]:
+        return {
+            "runs": self._multi_runs,
+            "hedges_fired": self._hedges_fired,
+            "all_failed": self._all_failed,
+        }
 
-    async def run(self, provider: str, model: Optional[str], user_input: str, metadata: Optional[Dict[str, Any]]) -> AgentResult:
+    def _resolve(self, provider: str) -> str:
         normalized = provider.lower()
-        handler = self.providers.get(normalized)
-        if not handler:
+        if normalized not in self.providers:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported provider '{provider}'")
+        return normalized
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on ``provider`` before hedging.
+
+        That is its rolling p95 latency, clamped to the configured bounds.
+        """
+        p95 = self.breakers[provider].snapshot()["latency_p95"]
+        delay_ms = settings.AGENT_HEDGE_DEFAULT_DELAY_MS if p95 is None else p95 * 1000
+        delay_ms = min(
+            max(delay_ms, settings.AGENT_HEDGE_MIN_DELAY_MS), settings.AGENT_HEDGE_MAX_DELAY_MS
+        )
+        return delay_ms / 1000
+
+    async def _call(
+        self, name: str, model: Optional[str], user_input: str, metadata: Optional[Dict[str, Any]]
+    ) -> AgentResult:
+        """One upstream attempt with circuit breaker bookkeeping; failures are raised."""
+        handler = self.providers[name]
+        breaker = self.breakers[name]
+        ticket = breaker.before_call()
+        started = time.perf_counter()
         try:
-            return await handler.run(model, user_input, metadata)
-        except ProviderConfigError as exc:
+            result = await handler.run(model, user_input, metadata)
+        except ProviderConfigError:
+            breaker.release(ticket)
+            raise
+        except httpx.HTTPStatusError as exc:
+            code = exc.response.status_code
+            # 4xx means the upstream is up and rejected this request; only 5xx and 429
+            # count against it.
+            if code >= 500 or code == status.HTTP_429_TOO_MANY_REQUESTS:
+                breaker.record_failure(time.perf_counter() - started, f"HTTP {code}", ticket)
+            else:
+                breaker.record_success(time.perf_counter() - started, ticket)
+            raise
+        except Exception as exc:
+            breaker.record_failure(time.perf_counter() - started, type(exc).__name__, ticket)
+            raise
+        except BaseException:
+            # cancelled mid-flight (e.g. a lost race): says nothing about the upstream.
+            breaker.release(ticket)
+            raise
+        breaker.record_success(time.perf_counter() - started, ticket)
+        return result
+
+    async def _handle_failure(self, exc: Exception, provider: str, user_input: str) -> AgentResult:
+        """Fall back to the local planner or map the upstream error to an HTTPException."""
+        if isinstance(exc, CircuitOpenError):
+            # shedding the upstream: no connection attempt, no timeout to wait out.
+            logger.warning("%s", exc)
+            if settings.AGENT_FALLBACK_ENABLED:
+                return await self.fallback.run(user_input)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(exc),
+                headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+            )
+        if isinstance(exc, ProviderConfigError):
             logger.warning("%s", exc)
             if settings.AGENT_FALLBACK_ENABLED:
-                return _fallback_response(user_input)
+                return await self.fallback.run(user_input)
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc))
-        except httpx.HTTPStatusError as exc:
-            logger.exception("Agent provider %s returned error", provider)
+        if isinstance(exc, httpx.HTTPStatusError):
+            logger.error("Agent provider %s returned error", provider, exc_info=exc)
             if settings.AGENT_FALLBACK_ENABLED:
-                return _fallback_response(user_input)
+                return await self.fallback.run(user_input)
             raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc))
+        logger.error("Agent provider %s failed", provider, exc_info=exc)
+        if settings.AGENT_FALLBACK_ENABLED:
+            return await self.fallback.run(user_input)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc))
+
+    async def run(
+        self,
+        provider: str,
+        model: Optional[str],
+        user_input: str,
+        metadata: Optional[Dict[str, Any]],
+    ) -> AgentResult:
+        normalized = self._resolve(provider)
+        try:
+            return await self._call(normalized, model, user_input, metadata)
         except Exception as exc:
-            logger.exception("Agent provider %s failed", provider)
-            if settings.AGENT_FALLBACK_ENABLED:
-                return _fallback_response(user_input)
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc))
+            return await self._handle_failure(exc, provider, user_input)
+
+    async def run_many(
+        self,
+        providers: List[str],
+        strategy: MultiStrategy,
+        model: Optional[str],
+        user_input: str,
+        metadata: Optional[Dict[str, Any]],
+        hedge_delay: Optional[float] = None,
+    ) -> AgentResult:
+        """Send one prompt to several providers and return the first success.
+
+        ``race`` starts every provider at once. ``hedge`` starts them one at a time in the
+        given order, launching the next when the current attempts outlive the hedge delay
+        (the first provider's rolling p95 unless ``hedge_delay`` is given) or as soon as one
+        fails. Losing attempts are cancelled; every attempt's timing is recorded on the result.
+        """
+        names = list(dict.fromkeys(self._resolve(name) for name in providers))
+        if not names:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="No providers given"
+            )
+        delay = self.hedge_delay(names[0]) if hedge_delay is None else hedge_delay
+        self._multi_runs += 1
+
+        began = time.perf_counter()
+        queue = list(names)
+        pending: dict[asyncio.Task[AgentResult], tuple[str, float]] = {}
+        attempts: List[Dict[str, Any]] = []
+        last_error: Optional[tuple[str, Exception]] = None
+
+        def _launch() -> None:
+            name = queue.pop(0)
+            task = asyncio.create_task(self._call(name, model, user_input, metadata))
+            pending[task] = (name, time.perf_counter())
+
+        def _attempt(
+            name: str, started: float, outcome: str, error: Optional[str] = None
+        ) -> Dict[str, Any]:
+            return {
+                "provider": name,
+                "started_ms": round((started - began) * 1000, 3),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+                "outcome": outcome,
+                "error": error,
+            }
+
+        _launch()
+        while strategy == "race" and queue:
+            _launch()
+
+        winner: Optional[AgentResult] = None
+        try:
+            while pending and winner is None:
+                timeout = delay if strategy == "hedge" and queue else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # the hedge timer fired before anything came back.
+                    self._hedges_fired += 1
+                    _launch()
+                    continue
+                for task in done:
+                    name, started = pending.pop(task)
+                    exc = task.exception()
+                    if exc is None and winner is None:
+                        winner = task.result()
+                        attempts.append(_attempt(name, started, "won"))
+                    elif exc is None:
+                        attempts.append(_attempt(name, started, "lost"))
+                    else:
+                        error = str(exc) or type(exc).__name__
+                        attempts.append(_attempt(name, started, "error", error))
+                        last_error = (name, exc)
+                        if queue and winner is None:
+                            _launch()
+        finally:
+            for task, (name, started) in pending.items():
+                task.cancel()
+                attempts.append(_attempt(name, started, "cancelled"))
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is not None:
+            self._wins[winner.provider] += 1
+            winner.attempts = attempts
+            logger.info("Agent %s won by %s: %s", strategy, winner.provider, attempts)
+            return winner
 
+        self._all_failed += 1
+        assert last_error is not None
+        result = await self._handle_failure(last_error[1], last_error[0], user_input)
+        result.attempts = attempts
+        return result
 
 agent_router = AgentRouter()
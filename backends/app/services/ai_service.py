@@ -13,17 +13,32 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from pathlib import Path
-from typing import List, Optional
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, List, Optional
 
 from fastapi import HTTPException, status
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+from openai import AsyncOpenAI, OpenAI
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 from app.config import settings
-from app import schemas
+from app import metrics, schemas
+from app.services import chroma_service
+from app.services.mock_responses import MockResponses
+from app.services.response_cache import ResponseCache, cache_key
+from app.services.semantic_cache import SemanticCache
+from app.services.single_flight import SingleFlight
+from app.services.todo_stream import TodoStreamParser
 
 logger = logging.getLogger(__name__)
 
@@ -35,43 +50,104 @@ _SYSTEM_PROMPT = (
 
 # defining the client for the ai service.
 _client: OpenAI | None = None
+# defining the async client for the ai service (retries are ours, not the SDK's).
+_async_client: AsyncOpenAI | None = None
+# defining the mock response engine (created lazily for MOCK_AI_RESPONSES_FILE).
+_mock_responses: MockResponses | None = None
+# defining the exact-match response cache (created lazily from the settings).
+_response_cache: ResponseCache | None = None
+# defining the semantic (paraphrase) cache (created lazily from the settings).
+_semantic_cache: SemanticCache | None = None
+# defining the single-flight group that coalesces identical concurrent generations.
+_in_flight = SingleFlight()
+# one semaphore per event loop; in practice the server runs a single loop, so this is the
+# global cap.
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class RetryBudget:
+    """Token bucket shared by every async completion.
+
+    Each first attempt deposits ``ratio`` tokens and each retry withdraws one, with a
+    small time-based floor of ``min_per_second`` so a quiet service can still retry.
+    When the upstream is failing, retries are capped at roughly ``ratio`` of the
+    traffic instead of multiplying it by the attempt count.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, max_balance: float) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+        self._balance = max_balance
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.exhausted = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        earned = (now - self._updated) * self.min_per_second
+        self._balance = min(self.max_balance, self._balance + earned)
+        self._updated = now
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill()
+            self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._balance < 1:
+                self.exhausted += 1
+                return False
+            self._balance -= 1
+            self.retries += 1
+            return True
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            self._refill()
+            return {
+                "balance": round(self._balance, 3),
+                "retries": self.retries,
+                "exhausted": self.exhausted,
+            }
+
+
+# defining the backoff between async attempts (same curve as the sync path).
+_RETRY_WAIT = wait_exponential(multiplier=1, min=1, max=8)
+
+# defining the retry budget shared across requests.
+_retry_budget = RetryBudget(
+    ratio=settings.AI_RETRY_BUDGET_RATIO,
+    min_per_second=settings.AI_RETRY_BUDGET_MIN_PER_SECOND,
+    max_balance=settings.AI_RETRY_BUDGET_MAX,
+)
 
 
 # defining a function to mock the todos for the ai service.
-def _mock_todos() -> Optional[List[schemas.GeneratedTodoNode]]:
+def _mock_todos(user_input: str) -> Optional[List[schemas.GeneratedTodoNode]]:
     # getting the mock file for the ai service.
     mock_file = settings.MOCK_AI_RESPONSES_FILE
     # if the mock file is not set, return None.
     if not mock_file:
         return None
-    # getting the path for the mock file.
-    path = Path(mock_file)
-    # if the path does not exist, log a warning and return None.
-    if not path.exists():
-        logger.warning("Mock AI file %s not found", mock_file)
+    # parsing the file once per path; the engine reloads it only when it changes on disk.
+    global _mock_responses
+    engine = _mock_responses
+    if engine is None or str(engine.path) != mock_file:
+        engine = _mock_responses = MockResponses(mock_file)
+    return engine.select(user_input)
+
+
+# defining a function to report mock-file usage (None when no mock file is configured).
+def mock_stats() -> Optional[dict]:
+    if not settings.MOCK_AI_RESPONSES_FILE or _mock_responses is None:
         return None
-    # loading the data from the mock file.
-    data = json.loads(path.read_text())
-    # if the data is a list, pick the first payload that contains todos.
-    if isinstance(data, list):
-        # if file stores a list of responses, pick the first payload that contains todos
-        for candidate in data:
-            if isinstance(candidate, dict) and "todos" in candidate:
-                data = candidate
-                break
-    # if the data is a dictionary and contains todos, get the todos.
-    if isinstance(data, dict) and "todos" in data:
-        todos_raw = data["todos"]
-    # if the data is a list, get the todos.
-    elif isinstance(data, list):
-        todos_raw = data
-    # otherwise, raise an error.
-    else:
-        raise ValueError("Mock AI file must contain either {\"todos\": [...]} or a list of nodes")
-    # logging the serving of the ai todos from the mock file.
-    logger.info("Serving AI todos from mock file %s", mock_file)
-    # returning the todos.
-    return [schemas.GeneratedTodoNode(**item) for item in todos_raw]
+    return _mock_responses.stats()
 
 
 # defining a function to get the client for the ai service.
@@ -88,21 +164,89 @@ def _get_client() -> OpenAI:
     return _client
 
 
+# defining a function to get the async client for the ai service.
+def _get_async_client() -> AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        # if the client is not set, raise an error.
+        if not settings.OPENROUTER_API_KEY:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="OPENROUTER_API_KEY missing",
+            )
+        # max_retries=0 so the shared retry budget below is the only retry policy.
+        _async_client = AsyncOpenAI(
+            api_key=settings.OPENROUTER_API_KEY,
+            base_url=settings.OPENROUTER_BASE_URL,
+            timeout=settings.AI_REQUEST_TIMEOUT,
+            max_retries=0,
+        )
+    return _async_client
+
+
+# defining a function to get the in-flight completion semaphore for the running loop.
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+# defining a function to build the completion messages.
+def _messages(user_input: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": user_input},
+    ]
+
+
+# defining a function to count completion attempts and retries for /metrics.
+def _record_attempt(mode: str, attempt_number: int) -> None:
+    metrics.AI_COMPLETION_ATTEMPTS.inc(mode=mode)
+    if attempt_number > 1:
+        metrics.AI_COMPLETION_RETRIES.inc(mode=mode)
+
+
+# defining a function to time one completion round trip.
+async def _timed_create(client: AsyncOpenAI, mode: str, **kwargs):
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        response = await client.chat.completions.create(**kwargs)
+        outcome = "ok"
+        return response
+    finally:
+        metrics.AI_COMPLETION_SECONDS.observe(
+            time.perf_counter() - started, mode=mode, outcome=outcome
+        )
+
+
 # defining a function to get the raw completion for the ai service.
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=8))
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=8),
+    before=lambda retry_state: _record_attempt("sync", retry_state.attempt_number),
+)
 def _raw_completion(user_input: str) -> str:
     # getting the client for the ai service.
     client = _get_client()
-    # getting the response from the ai service.
-    response = client.chat.completions.create(
-        model=settings.DEFAULT_MODEL,
-        temperature=0.2,
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": _SYSTEM_PROMPT},
-            {"role": "user", "content": user_input},
-        ],
-    )
+    # getting the response from the ai service (timed per attempt).
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        response = client.chat.completions.create(
+            model=settings.DEFAULT_MODEL,
+            temperature=0.2,
+            response_format={"type": "json_object"},
+            messages=_messages(user_input),
+        )
+        outcome = "ok"
+    finally:
+        metrics.AI_COMPLETION_SECONDS.observe(
+            time.perf_counter() - started, mode="sync", outcome=outcome
+        )
     # getting the content from the response.
     content = response.choices[0].message.content
     # if the content is empty, raise an error.
@@ -112,6 +256,56 @@ def _raw_completion(user_input: str) -> str:
     return content
 
 
+# defining a function to decide whether a failed async completion may be retried.
+def _should_retry(retry_state: RetryCallState) -> bool:
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    # successes and configuration errors are final.
+    if exc is None or isinstance(exc, HTTPException):
+        return False
+    # tenacity asks before it checks stop, so the last attempt must not pay for a retry.
+    if retry_state.attempt_number >= settings.AI_MAX_ATTEMPTS:
+        return False
+    # otherwise, retry only while the shared budget allows it.
+    return _retry_budget.try_withdraw()
+
+
+# defining a function to get the raw completion without blocking the event loop.
+async def _raw_completion_async(user_input: str) -> str:
+    # getting the async client for the ai service.
+    client = _get_async_client()
+    # every request pays into the budget once; retries draw from it.
+    _retry_budget.deposit()
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(settings.AI_MAX_ATTEMPTS),
+        wait=_RETRY_WAIT,
+        retry=_should_retry,
+        reraise=True,
+    ):
+        with attempt:
+            _record_attempt("async", attempt.retry_state.attempt_number)
+            # holding a slot only for the round trip, never across backoff sleeps.
+            async with _get_semaphore():
+                response = await _timed_create(
+                    client,
+                    "async",
+                    model=settings.DEFAULT_MODEL,
+                    temperature=0.2,
+                    response_format={"type": "json_object"},
+                    messages=_messages(user_input),
+                )
+            # getting the content from the response.
+            content = response.choices[0].message.content
+            # if the content is empty, raise an error.
+            if not content:
+                raise RuntimeError("Claude returned empty content")
+    return content
+
+
+# defining a function to report the async completion limits.
+def completion_stats() -> dict[str, float]:
+    return {"max_concurrency": settings.AI_MAX_CONCURRENCY, **_retry_budget.stats()}
+
+
 # defining a function to generate the structured todos for the ai service.
 def _strip_code_fence(payload: str) -> str:
     """Remove markdown fences (```json ... ```) often returned by models."""
@@ -127,20 +321,124 @@ def _strip_code_fence(payload: str) -> str:
     return cleaned
 
 
-def generate_structured_todos(user_input: str) -> List[schemas.GeneratedTodoNode]:
-    # getting the mock response for the ai service.
-    mock_response = _mock_todos()
-    # if the mock response is not None, return the mock response.
-    if mock_response is not None:
-        return mock_response
+# defining a function to parse the completion payload into todo nodes.
+def _parse_todos(raw: str) -> List[schemas.GeneratedTodoNode]:
+    # getting the payload from the ai service.
+    payload = _strip_code_fence(raw)
+    # loading the data from the payload.
+    data = json.loads(payload)
+    # getting the todos from the data.
+    todos_raw = data.get("todos", [])
+    return [schemas.GeneratedTodoNode(**item) for item in todos_raw]
+
+
+# defining a function to get the response cache for the ai service.
+def _get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            max_entries=settings.AI_CACHE_SIZE,
+            ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+            path=settings.AI_CACHE_PATH,
+            max_disk_entries=settings.AI_CACHE_DISK_SIZE,
+        )
+    return _response_cache
+
+
+# defining a function to look up a cached plan; returns the cache key (None when bypassed)
+# and any hit.
+def _cache_lookup(
+    user_input: str, use_cache: bool
+) -> tuple[Optional[str], Optional[List[schemas.GeneratedTodoNode]]]:
+    if not settings.AI_CACHE_ENABLED:
+        return None, None
+    cache = _get_response_cache()
+    if not use_cache:
+        cache.record_bypass()
+        return None, None
+    key = cache_key(user_input, settings.DEFAULT_MODEL, _SYSTEM_PROMPT)
+    payload = cache.get(key)
+    if payload is None:
+        return key, None
+    return key, [schemas.GeneratedTodoNode(**item) for item in payload]
+
+
+# defining a function to store a freshly generated plan.
+def _cache_store(key: Optional[str], todos: List[schemas.GeneratedTodoNode]) -> None:
+    # empty plans are usually a bad completion, so they are not worth replaying.
+    if key is None or not todos:
+        return
+    _get_response_cache().put(key, [node.model_dump(mode="json") for node in todos])
+
+
+# defining the event-loop variants: a file-backed cache does SQLite I/O under its lock, so
+# those calls go through a thread; a memory-only cache answers inline.
+async def _cache_lookup_async(
+    user_input: str, use_cache: bool
+) -> tuple[Optional[str], Optional[List[schemas.GeneratedTodoNode]]]:
+    if settings.AI_CACHE_ENABLED and use_cache and _get_response_cache().persistent:
+        return await asyncio.to_thread(_cache_lookup, user_input, use_cache)
+    return _cache_lookup(user_input, use_cache)
+
+
+async def _cache_store_async(key: Optional[str], todos: List[schemas.GeneratedTodoNode]) -> None:
+    if key is not None and todos and _get_response_cache().persistent:
+        await asyncio.to_thread(_cache_store, key, todos)
+    else:
+        _cache_store(key, todos)
+
+
+# defining a function to get the semantic cache for the ai service.
+def _get_semantic_cache() -> SemanticCache:
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            collection_getter=chroma_service.get_prompt_collection,
+            embed=chroma_service.embed_texts,
+            threshold=settings.AI_SEMANTIC_CACHE_THRESHOLD,
+            max_entries=settings.AI_SEMANTIC_CACHE_SIZE,
+            ttl_seconds=settings.AI_SEMANTIC_CACHE_TTL_SECONDS,
+            model=settings.DEFAULT_MODEL,
+            system_prompt=_SYSTEM_PROMPT,
+        )
+    return _semantic_cache
+
+
+# defining a function to look up a plan generated for a paraphrase of the prompt.
+def _semantic_lookup(user_input: str, use_cache: bool) -> Optional[List[schemas.GeneratedTodoNode]]:
+    if not (settings.AI_SEMANTIC_CACHE_ENABLED and use_cache):
+        return None
+    hit = _get_semantic_cache().lookup(user_input)
+    if hit is None:
+        return None
+    payload, distance = hit
+    logger.info("Semantic cache hit at distance %.4f", distance)
+    return [schemas.GeneratedTodoNode(**item) for item in payload]
+
+
+# defining a function to remember a freshly generated plan for future paraphrases.
+def _semantic_store(user_input: str, todos: List[schemas.GeneratedTodoNode]) -> None:
+    if not settings.AI_SEMANTIC_CACHE_ENABLED or not todos:
+        return
+    _get_semantic_cache().store(user_input, [node.model_dump(mode="json") for node in todos])
+
+
+# defining a function to report the response cache stats.
+def cache_stats() -> dict[str, object]:
+    return {"enabled": settings.AI_CACHE_ENABLED, **_get_response_cache().stats()}
+
+
+# defining a function to report the semantic cache stats.
+def semantic_cache_stats() -> dict[str, object]:
+    if not settings.AI_SEMANTIC_CACHE_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **_get_semantic_cache().stats()}
+
+
+# defining a function to call the model and remember the plan (run once per flight).
+def _generate(user_input: str, key: Optional[str]) -> List[schemas.GeneratedTodoNode]:
     try:
-        # getting the payload from the ai service.
-        payload = _strip_code_fence(_raw_completion(user_input))
-        # loading the data from the payload.
-        data = json.loads(payload)
-        # getting the todos from the data.
-        todos_raw = data.get("todos", [])
-        return [schemas.GeneratedTodoNode(**item) for item in todos_raw]
+        todos = _parse_todos(_raw_completion(user_input))
     except HTTPException:
         # if the exception is an HTTP exception, raise it.
         raise
@@ -148,3 +446,185 @@ def generate_structured_todos(user_input: str) -> List[schemas.GeneratedTodoNode
         # if the exception is not an HTTP exception, log the exception and raise an HTTP exception.
         logger.exception("AI generation failed")
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    _cache_store(key, todos)
+    _semantic_store(user_input, todos)
+    return todos
+
+
+# defining a function to call the model and remember the plan without blocking the event loop.
+async def _generate_async(user_input: str, key: Optional[str]) -> List[schemas.GeneratedTodoNode]:
+    try:
+        todos = _parse_todos(await _raw_completion_async(user_input))
+    except HTTPException:
+        # if the exception is an HTTP exception, raise it.
+        raise
+    except Exception as exc:
+        # if the exception is not an HTTP exception, log the exception and raise an HTTP exception.
+        logger.exception("AI generation failed")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    await _cache_store_async(key, todos)
+    await asyncio.to_thread(_semantic_store, user_input, todos)
+    return todos
+
+
+# defining a function to give each caller of a coalesced flight its own copy of the plan.
+def _copy_nodes(todos: List[schemas.GeneratedTodoNode]) -> List[schemas.GeneratedTodoNode]:
+    return [node.model_copy(deep=True) for node in todos]
+
+
+# defining a function to report how many generations were coalesced.
+def single_flight_stats() -> dict[str, int]:
+    return _in_flight.stats()
+
+
+def generate_structured_todos(
+    user_input: str, use_cache: bool = True
+) -> List[schemas.GeneratedTodoNode]:
+    # getting the mock response for the ai service.
+    mock_response = _mock_todos(user_input)
+    # if the mock response is not None, return the mock response.
+    if mock_response is not None:
+        return mock_response
+    # serving repeated goals from the cache.
+    key, cached = _cache_lookup(user_input, use_cache)
+    if cached is not None:
+        return cached
+    # falling back to a plan generated for a paraphrase of the same goal.
+    cached = _semantic_lookup(user_input, use_cache)
+    if cached is not None:
+        _cache_store(key, cached)
+        return cached
+    # identical concurrent prompts share one upstream call.
+    flight_key = cache_key(user_input, settings.DEFAULT_MODEL, _SYSTEM_PROMPT)
+    return _copy_nodes(_in_flight.do(flight_key, lambda: _generate(user_input, key)))
+
+
+async def generate_structured_todos_async(
+    user_input: str, use_cache: bool = True
+) -> List[schemas.GeneratedTodoNode]:
+    # getting the mock response for the ai service.
+    mock_response = _mock_todos(user_input)
+    # if the mock response is not None, return the mock response.
+    if mock_response is not None:
+        return mock_response
+    # serving repeated goals from the cache.
+    key, cached = await _cache_lookup_async(user_input, use_cache)
+    if cached is not None:
+        return cached
+    # falling back to a plan generated for a paraphrase (embedding is CPU-bound, so off the loop).
+    cached = await asyncio.to_thread(_semantic_lookup, user_input, use_cache)
+    if cached is not None:
+        await _cache_store_async(key, cached)
+        return cached
+    # identical concurrent prompts share one upstream call.
+    flight_key = cache_key(user_input, settings.DEFAULT_MODEL, _SYSTEM_PROMPT)
+    return _copy_nodes(
+        await _in_flight.do_async(flight_key, lambda: _generate_async(user_input, key))
+    )
+
+
+# defining a function to open a streamed completion (retrying only until the stream starts).
+# on success the caller owns a completion slot and releases it once the stream is closed.
+async def _open_completion_stream(user_input: str):
+    client = _get_async_client()
+    _retry_budget.deposit()
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(settings.AI_MAX_ATTEMPTS),
+        wait=_RETRY_WAIT,
+        retry=_should_retry,
+        reraise=True,
+    ):
+        with attempt:
+            _record_attempt("stream", attempt.retry_state.attempt_number)
+            # taking a slot per attempt, so backoff sleeps between attempts hold none.
+            semaphore = _get_semaphore()
+            await semaphore.acquire()
+            try:
+                # for streams the timed round trip ends when the response starts.
+                return await _timed_create(
+                    client,
+                    "stream",
+                    model=settings.DEFAULT_MODEL,
+                    temperature=0.2,
+                    response_format={"type": "json_object"},
+                    messages=_messages(user_input),
+                    stream=True,
+                )
+            except BaseException:
+                semaphore.release()
+                raise
+
+
+# defining a function to read a streamed completion at the upstream's pace.
+async def _pump_completion_stream(
+    user_input: str, parser: TodoStreamParser, items: "asyncio.Queue[dict[str, Any]]"
+) -> None:
+    stream = await _open_completion_stream(user_input)
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                for item in parser.feed(delta):
+                    items.put_nowait(item)
+    finally:
+        # the slot covers the open upstream stream only, however slowly the client reads.
+        _get_semaphore().release()
+        # openai's AsyncStream has close(); plain async generators have aclose().
+        close = getattr(stream, "close", None) or getattr(stream, "aclose", None)
+        if close is not None:
+            await close()
+
+
+async def stream_structured_todos(
+    user_input: str, use_cache: bool = True
+) -> AsyncIterator[schemas.GeneratedTodoNode]:
+    """Yield each top-level todo (with its subitems) as soon as the model finishes writing it."""
+    # mock and cached plans are already complete, so they are replayed node by node.
+    mock_response = _mock_todos(user_input)
+    if mock_response is not None:
+        for node in mock_response:
+            yield node
+        return
+    key, cached = await _cache_lookup_async(user_input, use_cache)
+    if cached is None:
+        cached = await asyncio.to_thread(_semantic_lookup, user_input, use_cache)
+        if cached is not None:
+            await _cache_store_async(key, cached)
+    if cached is not None:
+        for node in cached:
+            yield node
+        return
+
+    parser = TodoStreamParser()
+    todos: List[schemas.GeneratedTodoNode] = []
+    items: "asyncio.Queue[dict[str, Any]]" = asyncio.Queue()
+    done = object()
+    # the upstream is read by its own task, so a slow consumer never keeps the stream (and its
+    # completion slot) open; a consumer that goes away cancels it.
+    pump = asyncio.create_task(_pump_completion_stream(user_input, parser, items))
+    pump.add_done_callback(lambda _task: items.put_nowait(done))  # type: ignore[arg-type]
+    try:
+        while (item := await items.get()) is not done:
+            node = schemas.GeneratedTodoNode(**item)
+            todos.append(node)
+            yield node
+        # re-raising whatever ended the upstream read.
+        pump.result()
+        # a completion the incremental parser could not follow is parsed whole, as before.
+        if not parser.emitted:
+            if not parser.text.strip():
+                raise RuntimeError("Claude returned empty content")
+            todos = _parse_todos(parser.text)
+            for node in todos:
+                yield node
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.exception("AI streaming generation failed")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    finally:
+        pump.cancel()
+    await _cache_store_async(key, todos)
+    await asyncio.to_thread(_semantic_store, user_input, todos)
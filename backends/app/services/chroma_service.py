@@ -15,7 +15,7 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import List
+from typing import Iterable
 
 import chromadb
 from chromadb.api.models.Collection import Collection
@@ -25,36 +25,63 @@ try:  # sentence-transformers is an optional heavy dep; fail late with a clear e
 except ImportError:  # pragma: no cover - handled at runtime
     SentenceTransformer = None  # type: ignore
 
+from app import metrics
 from app.config import settings
 from app.models import TodoItem
+from app.services.embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
 # defining the collection name for the chroma service.
 _COLLECTION_NAME = "todo_memory"
+# defining the collection name for the semantic prompt cache (kept apart from todo memory).
+_PROMPT_COLLECTION_NAME = "prompt_cache"
 # defining the client for the chroma service.
 _client: chromadb.PersistentClient | None = None
 # defining the collection for the chroma service.
 _collection: Collection | None = None
+# defining the prompt cache collection for the chroma service.
+_prompt_collection: Collection | None = None
 # defining the embedder for the chroma service.
 _embedder: SentenceTransformer | None = None
+# defining the embedding cache for the chroma service.
+_embedding_cache: EmbeddingCache | None = None
 
 
-# defining a function to get the collection for the chroma service.
-def _get_collection() -> Collection:
-    # getting the client and collection for the chroma service.
-    global _client, _collection
-    if _collection is None:
-        # if the collection is not set, create the directory for the chroma service.
+# defining a function to get the client for the chroma service.
+def _get_client() -> chromadb.PersistentClient:
+    global _client
+    if _client is None:
+        # if the client is not set, create the directory for the chroma service.
         Path(settings.CHROMA_DIR).mkdir(parents=True, exist_ok=True)
         # creating the client for the chroma service.
         _client = chromadb.PersistentClient(path=settings.CHROMA_DIR)
+    # returning the client.
+    return _client
+
+
+# defining a function to get the collection for the chroma service.
+def _get_collection() -> Collection:
+    # getting the collection for the chroma service.
+    global _collection
+    if _collection is None:
         # creating the collection for the chroma service.
-        _collection = _client.get_or_create_collection(name=_COLLECTION_NAME)
+        _collection = _get_client().get_or_create_collection(name=_COLLECTION_NAME)
     # returning the collection.
     return _collection
 
 
+# defining a function to get the prompt cache collection for the chroma service.
+def get_prompt_collection() -> Collection:
+    global _prompt_collection
+    if _prompt_collection is None:
+        # cosine distance, so the semantic cache threshold does not depend on vector norms.
+        _prompt_collection = _get_client().get_or_create_collection(
+            name=_PROMPT_COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+        )
+    return _prompt_collection
+
+
 # defining a function to get the embedder for the chroma service.
 def _get_embedder() -> SentenceTransformer:
     # getting the embedder for the chroma service.
@@ -69,6 +96,33 @@ def _get_embedder() -> SentenceTransformer:
     return _embedder
 
 
+# defining a function to get the embedding cache for the chroma service.
+def _get_embedding_cache() -> EmbeddingCache:
+    # getting the embedding cache for the chroma service.
+    global _embedding_cache
+    if _embedding_cache is None:
+        # if the cache is not set, create it from the settings.
+        _embedding_cache = EmbeddingCache(
+            model_name=settings.EMBEDDING_MODEL,
+            max_entries=settings.EMBEDDING_CACHE_SIZE,
+            path=settings.EMBEDDING_CACHE_PATH,
+            max_disk_entries=settings.EMBEDDING_CACHE_DISK_SIZE,
+        )
+    # returning the embedding cache.
+    return _embedding_cache
+
+
+# defining a function to get the embedding cache stats for the chroma service.
+def embedding_cache_stats() -> dict:
+    return _get_embedding_cache().stats()
+
+
+# defining a function to write buffered embedding cache access times on shutdown.
+def flush_embedding_cache() -> None:
+    if _embedding_cache is not None:
+        _embedding_cache.flush()
+
+
 # defining a function to build the document for the chroma service.
 def _build_document(todo: TodoItem) -> str:
     # getting the deadline for the todo item.
@@ -77,34 +131,25 @@ def _build_document(todo: TodoItem) -> str:
     return f"{todo.title}\nReason: {todo.reason or 'n/a'}\nPriority: {todo.priority}\nDeadline: {deadline}"
 
 
+# defining a function to build the metadata for the chroma service.
+def _build_metadata(todo: TodoItem) -> dict[str, str]:
+    # returning the metadata.
+    return {
+        "title": todo.title,
+        "priority": todo.priority,
+        "status": todo.status,
+        "reason": todo.reason or "",
+    }
+
+
 # defining a function to index the todo for the chroma service.
 def index_todo(todo: TodoItem) -> None:
     # if the todo id is not set, log a warning and return.
     if todo.id is None:
         logger.debug("skip indexing unsaved todo")
         return
-    # getting the collection for the chroma service.
-    collection = _get_collection()
-    # getting the embedder for the chroma service.
-    embedder = _get_embedder()
-    # building the document for the chroma service.
-    document = _build_document(todo)
-    # encoding the document for the chroma service.
-    embeddings = embedder.encode([document], convert_to_numpy=True)[0].tolist()
-    # upserting the document for the chroma service.
-    collection.upsert(
-        ids=[str(todo.id)],
-        documents=[document],
-        metadatas=[
-            {
-                "title": todo.title,
-                "priority": todo.priority,
-                "status": todo.status,
-                "reason": todo.reason or "",
-            }
-        ],
-        embeddings=[embeddings],
-    )
+    # indexing the todo as a batch of one.
+    index_many([todo])
 
 
 # defining a function to delete the todo for the chroma service.    
@@ -112,7 +157,8 @@ def delete_todo(todo_id: int) -> None:
     # getting the collection for the chroma service.
     collection = _get_collection()
     # deleting the todo for the chroma service.
-    collection.delete(ids=[str(todo_id)])
+    with metrics.CHROMA_SECONDS.time(operation="delete"):
+        collection.delete(ids=[str(todo_id)])
 
 
 # defining a function to search the memory for the chroma service.
@@ -123,7 +169,8 @@ def search_memory(query: str, limit: int = 5):
     # getting the collection for the chroma service.
     collection = _get_collection()
     # querying the memory for the chroma service.
-    result = collection.query(query_texts=[query], n_results=limit)
+    with metrics.CHROMA_SECONDS.time(operation="query"):
+        result = collection.query(query_texts=[query], n_results=limit)
     # getting the ids from the result.
     ids = result.get("ids", [[]])[0]
     # getting the documents from the result.
@@ -148,9 +195,54 @@ def search_memory(query: str, limit: int = 5):
     return formatted
 
 
-# defining a function to index many todos for the chroma service.   
-def index_many(todos: List[TodoItem]) -> None:
-    # iterating over the todos.
-    for todo in todos:
-        # indexing the todo for the chroma service.
-        index_todo(todo)
+# defining a function to embed texts for the chroma service.
+def embed_texts(texts: list[str], batch_size: int | None = None) -> list[list[float]]:
+    """Embed ``texts`` with the shared model, reusing cached vectors for text seen before."""
+    batch_size = max(1, batch_size or settings.EMBEDDING_BATCH_SIZE)
+    # reusing cached vectors for texts that have not changed.
+    cache = _get_embedding_cache()
+    keys = [cache.key(text) for text in texts]
+    embeddings = [cache.get(key) for key in keys]
+    missing = [idx for idx, vector in enumerate(embeddings) if vector is None]
+    if missing:
+        # encoding only the uncached texts in a single batched call.
+        with metrics.CHROMA_SECONDS.time(operation="embed"):
+            encoded = _get_embedder().encode(
+                [texts[idx] for idx in missing], batch_size=batch_size, convert_to_numpy=True
+            )
+        for idx, vector in zip(missing, encoded):
+            embeddings[idx] = vector.tolist()
+            cache.put(keys[idx], embeddings[idx])
+    return embeddings  # type: ignore[return-value]
+
+
+# defining a function to index many todos for the chroma service.
+def index_many(todos: Iterable[TodoItem], batch_size: int | None = None) -> None:
+    """Embed and upsert todos in batches: one encode call, one upsert per chunk.
+
+    Documents whose text is already in the embedding cache skip the model entirely;
+    only their metadata (e.g. status) changes in the upsert.
+    """
+    # skipping the todos that have not been saved yet.
+    pending = [todo for todo in todos if todo.id is not None]
+    if not pending:
+        return
+    # getting the batch size for the chroma service.
+    batch_size = max(1, batch_size or settings.EMBEDDING_BATCH_SIZE)
+    # getting the collection for the chroma service.
+    collection = _get_collection()
+    # building the documents for the chroma service.
+    documents = [_build_document(todo) for todo in pending]
+    # embedding the documents (cached vectors are reused).
+    embeddings = embed_texts(documents, batch_size=batch_size)
+    # upserting the documents chunk by chunk.
+    for start in range(0, len(pending), batch_size):
+        stop = start + batch_size
+        chunk = pending[start:stop]
+        with metrics.CHROMA_SECONDS.time(operation="upsert"):
+            collection.upsert(
+                ids=[str(todo.id) for todo in chunk],
+                documents=documents[start:stop],
+                metadatas=[_build_metadata(todo) for todo in chunk],
+                embeddings=embeddings[start:stop],
+            )
@@ -0,0 +1,234 @@
+"""Per-provider circuit breaker with rolling error-rate and latency windows."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Optional, Tuple
+
+from app.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# upper bound on samples kept per breaker, whatever the window length.
+_MAX_SAMPLES = 1_000
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"Circuit for {name} is open; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def _percentile(values: list[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class CircuitBreaker:
+    """Closed -> open -> half-open breaker for a single upstream.
+
+    While closed, every call lands in a time-bounded window. Once the window holds
+    ``min_calls`` samples and either the failure rate or the slow-call rate crosses its
+    threshold, the circuit opens and calls are rejected without touching the network.
+    After ``open_seconds`` a limited number of probe calls are let through (half-open):
+    if they all succeed the circuit closes with an empty window, any failure re-opens it.
+
+    ``before_call`` returns a ticket naming the state generation the call was admitted
+    in; every transition starts a new generation. Outcomes reported with an older ticket
+    (a call started while closed that finishes after the circuit opened or went half-open)
+    only update the counters, so they are never mistaken for probes or new samples.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window_seconds: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        failure_rate: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+        slow_call_rate: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        half_open_calls: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.window_seconds = (
+            settings.AGENT_BREAKER_WINDOW_SECONDS if window_seconds is None else window_seconds
+        )
+        self.min_calls = settings.AGENT_BREAKER_MIN_CALLS if min_calls is None else min_calls
+        self.failure_rate = (
+            settings.AGENT_BREAKER_FAILURE_RATE if failure_rate is None else failure_rate
+        )
+        self.slow_call_seconds = (
+            settings.AGENT_BREAKER_SLOW_CALL_SECONDS
+            if slow_call_seconds is None
+            else slow_call_seconds
+        )
+        self.slow_call_rate = (
+            settings.AGENT_BREAKER_SLOW_CALL_RATE if slow_call_rate is None else slow_call_rate
+        )
+        self.open_seconds = (
+            settings.AGENT_BREAKER_OPEN_SECONDS if open_seconds is None else open_seconds
+        )
+        self.half_open_calls = (
+            settings.AGENT_BREAKER_HALF_OPEN_CALLS if half_open_calls is None else half_open_calls
+        )
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (finished_at, ok, latency_seconds)
+        self._window: Deque[Tuple[float, bool, float]] = deque(maxlen=_MAX_SAMPLES)
+        self._state = CLOSED
+        self._generation = 0
+        self._opened_at: Optional[float] = None
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._successes = 0
+        self._failures = 0
+        self._rejected = 0
+        self._times_opened = 0
+        self._last_failure: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def before_call(self) -> int:
+        """Reserve a slot for a call and return its ticket, or raise ``CircuitOpenError``."""
+        with self._lock:
+            if not settings.AGENT_BREAKER_ENABLED:
+                return self._generation
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return self._generation
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_calls:
+                self._probes_in_flight += 1
+                return self._generation
+            self._rejected += 1
+            raise CircuitOpenError(self.name, self._retry_after())
+
+    def record_success(self, latency: float, ticket: Optional[int] = None) -> None:
+        with self._lock:
+            self._successes += 1
+            if self._is_stale(ticket):
+                return
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_calls:
+                    self._close()
+                return
+            self._add_sample(True, latency)
+            self._evaluate()
+
+    def record_failure(
+        self, latency: float, error: Optional[str] = None, ticket: Optional[int] = None
+    ) -> None:
+        with self._lock:
+            self._failures += 1
+            self._last_failure = error
+            if self._is_stale(ticket):
+                return
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._add_sample(False, latency)
+            self._evaluate()
+
+    def release(self, ticket: Optional[int] = None) -> None:
+        """Give back a reserved slot for a call that says nothing about upstream health."""
+        with self._lock:
+            if self._state == HALF_OPEN and not self._is_stale(ticket):
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._close()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            self._prune()
+            calls = len(self._window)
+            failures = sum(1 for _, ok, _ in self._window if not ok)
+            slow = sum(1 for _, _, latency in self._window if latency >= self.slow_call_seconds)
+            latencies = [latency for _, _, latency in self._window]
+            return {
+                "state": self._state,
+                "window_calls": calls,
+                "failure_rate": failures / calls if calls else 0.0,
+                "slow_call_rate": slow / calls if calls else 0.0,
+                "latency_p50": _percentile(latencies, 0.50),
+                "latency_p95": _percentile(latencies, 0.95),
+                "retry_after": self._retry_after() if self._state == OPEN else None,
+                "successes": self._successes,
+                "failures": self._failures,
+                "rejected": self._rejected,
+                "times_opened": self._times_opened,
+                "last_failure": self._last_failure,
+            }
+
+    # the helpers below expect self._lock to be held.
+
+    def _is_stale(self, ticket: Optional[int]) -> bool:
+        # no ticket: the caller reports on the current generation.
+        return ticket is not None and ticket != self._generation
+
+    def _add_sample(self, ok: bool, latency: float) -> None:
+        self._window.append((self._clock(), ok, latency))
+
+    def _prune(self) -> None:
+        horizon = self._clock() - self.window_seconds
+        while self._window and self._window[0][0] < horizon:
+            self._window.popleft()
+
+    def _evaluate(self) -> None:
+        if self._state != CLOSED:
+            return
+        self._prune()
+        calls = len(self._window)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for _, ok, _ in self._window if not ok)
+        slow = sum(1 for _, _, latency in self._window if latency >= self.slow_call_seconds)
+        if failures / calls >= self.failure_rate or slow / calls >= self.slow_call_rate:
+            self._open()
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._opened_at is not None:
+            if self._clock() - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+                self._generation += 1
+                self._probes_in_flight = 0
+                self._probe_successes = 0
+
+    def _retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.open_seconds - (self._clock() - self._opened_at))
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._generation += 1
+        self._opened_at = self._clock()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._times_opened += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._generation += 1
+        self._opened_at = None
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._window.clear()
@@ -0,0 +1,164 @@
+"""Content-addressed cache for todo document embeddings."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """In-memory LRU of document-hash -> vector with an optional SQLite spill file.
+
+    Keys include the embedding model name, so switching ``EMBEDDING_MODEL`` never
+    serves vectors from a different model. Disk hits only note their access time in
+    memory; the notes are written in one batch before the disk tier is trimmed, every
+    ``TOUCH_BATCH`` hits, or on ``flush``.
+    """
+
+    # writing buffered access times once this many disk hits have piled up.
+    TOUCH_BATCH = 256
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int,
+        path: Optional[str] = None,
+        max_disk_entries: int = 0,
+    ) -> None:
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_writes = 0
+        # key -> last access time of disk hits not yet written back.
+        self._touched: dict[str, float] = {}
+        self._db: sqlite3.Connection | None = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def key(self, document: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{document}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[list[float]]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return vector
+            vector = self._disk_get(key)
+            if vector is not None:
+                self._disk_hits += 1
+                self._remember(key, vector)
+                return vector
+            self._misses += 1
+            return None
+
+    def put(self, key: str, vector: list[float]) -> None:
+        with self._lock:
+            self._remember(key, vector)
+            self._disk_put(key, vector)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                "persistent": self._db is not None,
+            }
+
+    def flush(self) -> None:
+        """Write buffered access times to the disk tier."""
+        with self._lock:
+            self._flush_touched()
+            if self._db is not None:
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._touched.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _disk_get(self, key: str) -> Optional[list[float]]:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._touched[key] = time.time()
+        if len(self._touched) >= self.TOUCH_BATCH:
+            self._flush_touched()
+            self._db.commit()
+        return array("f", row[0]).tolist()
+
+    def _flush_touched(self) -> None:
+        if self._db is None or not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        try:
+            self._db.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in touched.items()],
+            )
+        except sqlite3.Error:  # pragma: no cover - the disk tier is best effort
+            logger.exception("Failed to record embedding access times")
+
+    def _disk_put(self, key: str, vector: list[float]) -> None:
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                (key, array("f", vector).tobytes(), time.time()),
+            )
+            self._disk_writes += 1
+            # trimming the least recently used rows every so often rather than on every write.
+            if self.max_disk_entries > 0 and self._disk_writes % 256 == 0:
+                # recent disk hits must count before choosing what to drop.
+                self._flush_touched()
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+            self._db.commit()
+        except sqlite3.Error:  # pragma: no cover - the disk tier is best effort
+            logger.exception("Failed to persist embedding %s", key)
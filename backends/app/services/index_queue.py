@@ -0,0 +1,230 @@
+"""Write-behind queue that moves Chroma indexing off the request thread."""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from app.config import settings
+from app.models import TodoItem
+from app.services import chroma_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingOp:
+    # either "upsert" or "delete".
+    op: str
+    # detached copy of the row for upserts, None for deletes.
+    todo: Optional[TodoItem]
+    # when the todo id first entered the queue, kept across coalesced updates.
+    enqueued_at: float
+
+
+def _snapshot(todo: TodoItem) -> TodoItem:
+    """Detach the row from its session so the worker never touches a closed Session."""
+    return TodoItem(**todo.model_dump())
+
+
+class IndexQueue:
+    """Bounded, coalescing queue drained by a single background worker thread.
+
+    Pending work is keyed by todo id, so repeated updates to the same todo collapse
+    into one embedding call carrying the latest snapshot.
+    """
+
+    def __init__(self) -> None:
+        self._pending: OrderedDict[int, _PendingOp] = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._in_flight = 0
+        self._in_flight_since: float | None = None
+        self._processed = 0
+        self._coalesced = 0
+        self._failed = 0
+        self._last_error: str | None = None
+        self._atexit_registered = False
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="index-queue", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Drain what is pending (up to ``timeout``) and stop the worker."""
+        timeout = settings.INDEX_QUEUE_DRAIN_TIMEOUT if timeout is None else timeout
+        self.flush(timeout=timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread:
+            thread.join(timeout=timeout)
+        self._thread = None
+
+    def submit(self, todo: TodoItem) -> None:
+        self.submit_many([todo])
+
+    def submit_many(self, todos: Iterable[TodoItem]) -> None:
+        saved = [todo for todo in todos if todo.id is not None]
+        if not saved:
+            return
+        if not settings.INDEX_ASYNC:
+            chroma_service.index_many(saved)
+            return
+        for todo in saved:
+            self._put(todo.id, _PendingOp("upsert", _snapshot(todo), time.monotonic()))
+
+    def submit_delete(self, todo_id: int) -> None:
+        if not settings.INDEX_ASYNC:
+            chroma_service.delete_todo(todo_id)
+            return
+        self._put(todo_id, _PendingOp("delete", None, time.monotonic()))
+
+    # async variants for the event loop: enqueueing never waits on the condition there, and
+    # inline indexing (INDEX_ASYNC=false or a full queue) runs on a worker thread.
+    async def submit_async(self, todo: TodoItem) -> None:
+        await self.submit_many_async([todo])
+
+    async def submit_many_async(self, todos: Iterable[TodoItem]) -> None:
+        saved = [todo for todo in todos if todo.id is not None]
+        if not saved:
+            return
+        if not settings.INDEX_ASYNC:
+            await asyncio.to_thread(chroma_service.index_many, saved)
+            return
+        overflow: list[tuple[int, _PendingOp]] = []
+        for todo in saved:
+            op = _PendingOp("upsert", _snapshot(todo), time.monotonic())
+            if not self._try_put(todo.id, op):
+                overflow.append((todo.id, op))
+        if overflow:
+            await asyncio.to_thread(self._put_many, overflow)
+
+    async def submit_delete_async(self, todo_id: int) -> None:
+        if not settings.INDEX_ASYNC:
+            await asyncio.to_thread(chroma_service.delete_todo, todo_id)
+            return
+        op = _PendingOp("delete", None, time.monotonic())
+        if not self._try_put(todo_id, op):
+            await asyncio.to_thread(self._put, todo_id, op)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every queued operation has been applied. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            oldest = [op.enqueued_at for op in self._pending.values()][:1]
+            if self._in_flight_since is not None:
+                oldest.append(self._in_flight_since)
+            return {
+                "depth": len(self._pending),
+                "in_flight": self._in_flight,
+                "lag_seconds": round(now - min(oldest), 3) if oldest else 0.0,
+                "processed": self._processed,
+                "coalesced": self._coalesced,
+                "failed": self._failed,
+                "last_error": self._last_error,
+                "running": bool(self._thread and self._thread.is_alive()),
+            }
+
+    def _try_put(self, todo_id: int, op: _PendingOp) -> bool:
+        """Enqueue without waiting; False when the queue is full."""
+        self.start()
+        with self._cond:
+            existing = self._pending.get(todo_id)
+            if existing is not None:
+                # coalescing: keep the queue position and age, replace the payload.
+                op.enqueued_at = existing.enqueued_at
+                self._pending[todo_id] = op
+                self._coalesced += 1
+                return True
+            if len(self._pending) < settings.INDEX_QUEUE_MAXSIZE:
+                self._pending[todo_id] = op
+                self._cond.notify_all()
+                return True
+        return False
+
+    def _put_many(self, ops: list[tuple[int, _PendingOp]]) -> None:
+        for todo_id, op in ops:
+            self._put(todo_id, op)
+
+    def _put(self, todo_id: int, op: _PendingOp) -> None:
+        if self._try_put(todo_id, op):
+            return
+        with self._cond:
+            # bounded: wait for the worker to make room, then fall back to indexing inline.
+            has_room = self._cond.wait_for(
+                lambda: len(self._pending) < settings.INDEX_QUEUE_MAXSIZE,
+                settings.INDEX_QUEUE_PUT_TIMEOUT,
+            )
+            if has_room:
+                self._pending[todo_id] = op
+                self._cond.notify_all()
+                return
+        logger.warning("Index queue full; indexing todo %s inline", todo_id)
+        self._apply([(todo_id, op)])
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping and not self._pending:
+                    return
+                batch: list[tuple[int, _PendingOp]] = []
+                while self._pending and len(batch) < settings.EMBEDDING_BATCH_SIZE:
+                    batch.append(self._pending.popitem(last=False))
+                self._in_flight = len(batch)
+                self._in_flight_since = min(op.enqueued_at for _, op in batch)
+                self._cond.notify_all()
+            try:
+                self._apply(batch)
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._in_flight_since = None
+                    self._cond.notify_all()
+
+    def _apply(self, batch: list[tuple[int, _PendingOp]]) -> None:
+        upserts = [op.todo for _, op in batch if op.op == "upsert" and op.todo is not None]
+        deletes = [todo_id for todo_id, op in batch if op.op == "delete"]
+        try:
+            if upserts:
+                chroma_service.index_many(upserts)
+            for todo_id in deletes:
+                chroma_service.delete_todo(todo_id)
+        except Exception as exc:  # pragma: no cover - depends on Chroma/embedder failures
+            logger.exception("Background indexing failed for %d todos", len(batch))
+            with self._cond:
+                self._failed += len(batch)
+                self._last_error = str(exc)
+            return
+        with self._cond:
+            self._processed += len(batch)
+
+
+index_queue = IndexQueue()
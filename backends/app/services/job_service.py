@@ -0,0 +1,372 @@
+"""Background AI generation jobs persisted in SQLite and run by an asyncio worker pool."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncContextManager, Callable, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import models, schemas
+from app.config import settings
+from app.database import async_session_scope
+from app.services import ai_service, todo_service
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands datetimes back naive; they were written in UTC.
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def to_read(job: models.AIJob) -> schemas.AIJobRead:
+    return schemas.AIJobRead(
+        id=job.id,
+        status=job.status,  # type: ignore[arg-type]
+        attempts=job.attempts,
+        result=schemas.AIGenerateResponse.model_validate_json(job.result) if job.result else None,
+        error=job.error,
+        error_status=job.error_status,
+        created_at=_as_utc(job.created_at),  # type: ignore[arg-type]
+        started_at=_as_utc(job.started_at),
+        finished_at=_as_utc(job.finished_at),
+        expires_at=_as_utc(job.expires_at),
+    )
+
+
+class AIJobRunner:
+    """Accept generation jobs, run them on ``workers`` tasks, and keep results for ``ttl_seconds``.
+
+    The ``ai_jobs`` table is the source of truth: ``start`` puts every queued job back on
+    the in-memory queue, so work survives a restart. Several processes may share the table:
+    a worker claims a job with a conditional update, so each attempt runs exactly once, and
+    holds a lease on it that it renews every ``lease_seconds / 3``. Only running jobs whose
+    lease lapsed (their worker died or hung) are requeued, at start and on every sweep.
+    Jobs picked up ``max_attempts`` times without finishing are failed instead of retried
+    forever.
+    """
+
+    def __init__(
+        self,
+        session_factory: SessionFactory = async_session_scope,
+        *,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        sweep_interval: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        lease_seconds: Optional[float] = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self.workers = settings.AI_JOB_WORKERS if workers is None else workers
+        self.max_queue = settings.AI_JOB_MAX_QUEUE if max_queue is None else max_queue
+        self.ttl_seconds = (
+            settings.AI_JOB_RESULT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        )
+        self.sweep_interval = (
+            settings.AI_JOB_SWEEP_INTERVAL_SECONDS if sweep_interval is None else sweep_interval
+        )
+        self.max_attempts = settings.AI_JOB_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.lease_seconds = (
+            settings.AI_JOB_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        )
+        self._queue: Optional[asyncio.Queue[str]] = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._running = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._rejected = 0
+        self._expired = 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        self._queue = asyncio.Queue()
+        # jobs whose worker died mid-flight go back to the queue; live leases belong to
+        # another process (or to this one before a quick restart) and are left alone.
+        await self.recover()
+        async with self._session_factory() as session:
+            pending = await session.exec(
+                select(models.AIJob.id)
+                .where(models.AIJob.status == "queued")
+                .order_by(models.AIJob.created_at)
+            )
+            for job_id in pending.all():
+                self._queue.put_nowait(job_id)
+        if self._queue.qsize():
+            logger.info("Requeued %d AI jobs", self._queue.qsize())
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ai-job-{idx}") for idx in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._sweeper(), name="ai-job-sweeper"))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+        self._running = 0
+
+    def depth(self) -> int:
+        return (self._queue.qsize() if self._queue else 0) + self._running
+
+    async def submit(self, payload: schemas.AIGenerateRequest) -> models.AIJob:
+        if not self.started:
+            await self.start()
+        assert self._queue is not None
+        if self.depth() >= self.max_queue:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="AI job queue is full, try again shortly",
+                headers={"Retry-After": "5"},
+            )
+        job = models.AIJob(
+            id=uuid.uuid4().hex,
+            user_input=payload.user_input,
+            save=payload.save,
+            use_cache=payload.use_cache,
+        )
+        async with self._session_factory() as session:
+            session.add(job)
+            await session.commit()
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def get(self, job_id: str) -> models.AIJob:
+        async with self._session_factory() as session:
+            job = await session.get(models.AIJob, job_id)
+        expires_at = _as_utc(job.expires_at) if job else None
+        if job is None or (expires_at is not None and expires_at <= _now()):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        return job
+
+    async def sweep(self) -> int:
+        """Delete finished jobs whose retention window has passed."""
+        async with self._session_factory() as session:
+            result = await session.exec(
+                delete(models.AIJob).where(
+                    models.AIJob.expires_at.is_not(None), models.AIJob.expires_at <= _now()
+                )
+            )
+            await session.commit()
+        removed = result.rowcount or 0
+        self._expired += removed
+        return removed
+
+    async def recover(self) -> list[str]:
+        """Put running jobs whose lease has lapsed back to queued and return their ids."""
+        lapsed = (
+            models.AIJob.status == "running",
+            or_(models.AIJob.lease_expires_at.is_(None), models.AIJob.lease_expires_at <= _now()),
+        )
+        async with self._session_factory() as session:
+            rows = await session.exec(select(models.AIJob.id).where(*lapsed))
+            job_ids = list(rows.all())
+            if job_ids:
+                # repeating the condition keeps a lease renewed in between untouched; a job
+                # that stayed running is simply not claimable when its id comes up.
+                await session.exec(
+                    update(models.AIJob)
+                    .where(models.AIJob.id.in_(job_ids), *lapsed)
+                    .values(status="queued", lease_expires_at=None)
+                )
+                await session.commit()
+        if job_ids:
+            logger.warning("Recovered %d AI jobs with a lapsed lease", len(job_ids))
+        return job_ids
+
+    async def stats(self) -> dict[str, Any]:
+        async with self._session_factory() as session:
+            rows = await session.exec(
+                select(models.AIJob.status, func.count()).group_by(models.AIJob.status)  # type: ignore[call-overload]
+            )
+            by_status = {job_status: count for job_status, count in rows.all()}
+        return {
+            "workers": self.workers,
+            "running": self.started,
+            "depth": self.depth(),
+            "max_queue": self.max_queue,
+            "by_status": by_status,
+            "succeeded": self._succeeded,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "expired": self._expired,
+        }
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            job_id = await queue.get()
+            self._running += 1
+            try:
+                await self._run(job_id)
+            except Exception:  # pragma: no cover - a broken job must not kill the worker
+                logger.exception("AI job %s crashed", job_id)
+            finally:
+                self._running -= 1
+                queue.task_done()
+
+    async def _sweeper(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+                for job_id in await self.recover():
+                    queue.put_nowait(job_id)
+            except Exception:  # pragma: no cover - retried on the next tick
+                logger.exception("AI job sweep failed")
+
+    async def _renew_lease(self, job_id: str, attempt: int) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with self._session_factory() as session:
+                    await session.exec(
+                        update(models.AIJob)
+                        .where(
+                            models.AIJob.id == job_id,
+                            models.AIJob.status == "running",
+                            models.AIJob.attempts == attempt,
+                        )
+                        .values(lease_expires_at=_now() + timedelta(seconds=self.lease_seconds))
+                    )
+                    await session.commit()
+            except Exception:  # pragma: no cover - retried on the next tick
+                logger.exception("Renewing the lease of AI job %s failed", job_id)
+
+    async def _run(self, job_id: str) -> None:
+        now = _now()
+        async with self._session_factory() as session:
+            # the conditional update is the claim: when several processes queue the same id,
+            # exactly one of them moves it from queued to running.
+            claim = await session.exec(
+                update(models.AIJob)
+                .where(
+                    models.AIJob.id == job_id,
+                    models.AIJob.status == "queued",
+                    models.AIJob.attempts < self.max_attempts,
+                )
+                .values(
+                    status="running",
+                    started_at=now,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    attempts=models.AIJob.attempts + 1,
+                )
+            )
+            await session.commit()
+            job = await session.get(models.AIJob, job_id)
+        if job is None:
+            return
+        if not claim.rowcount:
+            if job.status == "queued":
+                await self._finish(
+                    job_id,
+                    "failed",
+                    attempt=None,
+                    error=f"Abandoned after {job.attempts} attempts",
+                    error_status=500,
+                )
+            return
+        attempt = job.attempts
+        lease = asyncio.create_task(
+            self._renew_lease(job_id, attempt), name=f"ai-job-lease-{job_id}"
+        )
+
+        # no session is held while the model is thinking.
+        try:
+            todos = await ai_service.generate_structured_todos_async(
+                job.user_input, use_cache=job.use_cache
+            )
+            persisted_ids: list[int] = []
+            if job.save:
+                async with self._session_factory() as session:
+                    created = await todo_service.save_generated_tree_async(todos, session)
+                    persisted_ids = [todo.id for todo in created]
+            response = schemas.AIGenerateResponse(todos=todos, persisted_ids=persisted_ids)
+        except HTTPException as exc:
+            await self._finish(
+                job_id,
+                "failed",
+                attempt=attempt,
+                error=str(exc.detail),
+                error_status=exc.status_code,
+            )
+            return
+        except Exception as exc:
+            logger.exception("AI job %s failed", job_id)
+            await self._finish(job_id, "failed", attempt=attempt, error=str(exc), error_status=500)
+            return
+        finally:
+            lease.cancel()
+        await self._finish(job_id, "succeeded", attempt=attempt, result=response.model_dump_json())
+
+    async def _finish(
+        self,
+        job_id: str,
+        job_status: str,
+        *,
+        attempt: Optional[int],
+        result: Optional[str] = None,
+        error: Optional[str] = None,
+        error_status: Optional[int] = None,
+    ) -> None:
+        """Record the outcome of claim ``attempt``, or abandon a queued job when it is ``None``.
+
+        If the lease lapsed and the job was claimed again meanwhile, the stale outcome is dropped.
+        """
+        if attempt is None:
+            owned = (models.AIJob.status == "queued",)
+        else:
+            owned = (models.AIJob.status == "running", models.AIJob.attempts == attempt)
+        finished_at = _now()
+        async with self._session_factory() as session:
+            outcome = await session.exec(
+                update(models.AIJob)
+                .where(models.AIJob.id == job_id, *owned)
+                .values(
+                    status=job_status,
+                    result=result,
+                    error=error,
+                    error_status=error_status,
+                    finished_at=finished_at,
+                    expires_at=finished_at + timedelta(seconds=self.ttl_seconds),
+                    lease_expires_at=None,
+                )
+            )
+            await session.commit()
+        if not outcome.rowcount:
+            logger.warning(
+                "AI job %s was claimed again; dropping its %s outcome", job_id, job_status
+            )
+            return
+        if job_status == "succeeded":
+            self._succeeded += 1
+        else:
+            self._failed += 1
+
+
+ai_job_runner = AIJobRunner()
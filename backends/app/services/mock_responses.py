@@ -0,0 +1,146 @@
+"""Mock AI responses parsed once from ``MOCK_AI_RESPONSES_FILE``, reloaded when the file changes."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional
+
+from pydantic import TypeAdapter
+
+from app import schemas
+from app.services.response_cache import normalize_prompt
+
+logger = logging.getLogger(__name__)
+
+_NODES = TypeAdapter(List[schemas.GeneratedTodoNode])
+
+
+@dataclass(frozen=True)
+class MockResponse:
+    # the validated plan dumped back to plain data; rebuilding nodes from it skips JSON and
+    # defaults.
+    todos: tuple[dict[str, Any], ...]
+    keywords: tuple[str, ...] = ()
+
+
+def parse_mock_payload(data: Any) -> list[MockResponse]:
+    """Accept ``{"todos": [...]}``, a bare node list, ``{"responses": [...]}`` or a payload list.
+
+    Each payload may carry ``"keywords": [...]``; prompts containing one of them are
+    answered with that payload, everything else rotates through the payloads without keywords.
+    """
+    if isinstance(data, dict) and isinstance(data.get("responses"), list):
+        payloads = data["responses"]
+    elif isinstance(data, dict) and "todos" in data:
+        payloads = [data]
+    elif isinstance(data, list) and any(
+        isinstance(item, dict) and "todos" in item for item in data
+    ):
+        payloads = [item for item in data if isinstance(item, dict) and "todos" in item]
+    elif isinstance(data, list):
+        payloads = [{"todos": data}]
+    else:
+        raise ValueError("Mock AI file must contain either {\"todos\": [...]} or a list of nodes")
+    responses = []
+    for payload in payloads:
+        if not isinstance(payload, dict) or not isinstance(payload.get("todos"), list):
+            raise ValueError("Each mock AI response must be an object with a \"todos\" list")
+        responses.append(
+            MockResponse(
+                todos=tuple(node.model_dump() for node in _NODES.validate_python(payload["todos"])),
+                keywords=tuple(
+                    normalize_prompt(word) for word in payload.get("keywords", []) if word
+                ),
+            )
+        )
+    if not responses:
+        raise ValueError("Mock AI file contains no responses")
+    return responses
+
+
+class MockResponses:
+    """Serve validated mock plans from ``path`` without touching the file again until it changes.
+
+    Every call costs one ``os.stat``; the JSON is only re-read and re-validated when the
+    mtime or size differs from the last load. If a reload fails (say, the file is caught
+    half-written) the previous responses keep being served.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._signature: Optional[tuple[int, int]] = None
+        self._keyword: list[MockResponse] = []
+        self._default: list[MockResponse] = []
+        self._size = 0
+        self._cursor = 0
+        self._missing_logged = False
+        self.loads = 0
+        self.served = 0
+
+    def select(self, prompt: str) -> Optional[List[schemas.GeneratedTodoNode]]:
+        """Return a fresh copy of the plan for ``prompt``, or ``None`` when the file is missing."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if not self._missing_logged:
+                logger.warning("Mock AI file %s not found", self.path)
+                self._missing_logged = True
+            return None
+        self._missing_logged = False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if signature != self._signature:
+                self._reload(signature)
+            response = self._pick(prompt)
+            self.served += 1
+        # callers get their own nodes, so nothing downstream can edit the loaded plan
+        # (validating plain dicts is several times cheaper than deep-copying models).
+        return _NODES.validate_python(response.todos)
+
+    def _reload(self, signature: tuple[int, int]) -> None:
+        try:
+            responses = parse_mock_payload(json.loads(self.path.read_text()))
+        except (OSError, ValueError):
+            if not self._default:
+                raise
+            logger.warning(
+                "Reloading mock AI file %s failed; serving the previous responses",
+                self.path,
+                exc_info=True,
+            )
+            # a broken file is not retried on every call, only once it changes again.
+            self._signature = signature
+            return
+        self._signature = signature
+        self._keyword = [response for response in responses if response.keywords]
+        self._default = [response for response in responses if not response.keywords] or responses
+        self._size = len(responses)
+        self._cursor = 0
+        self.loads += 1
+        logger.info("Loaded %d mock AI responses from %s", len(responses), self.path)
+
+    def _pick(self, prompt: str) -> MockResponse:
+        if self._keyword:
+            normalized = normalize_prompt(prompt)
+            for response in self._keyword:
+                if any(word in normalized for word in response.keywords):
+                    return response
+        response = self._default[self._cursor % len(self._default)]
+        self._cursor += 1
+        return response
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "path": str(self.path),
+                "responses": self._size,
+                "keyword_responses": len(self._keyword),
+                "loads": self.loads,
+                "served": self.served,
+            }
@@ -0,0 +1,195 @@
+"""Exact-match cache for generated todo plans, keyed on the normalized prompt."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Fold case, Unicode forms and whitespace so trivially different prompts share a key."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+def cache_key(user_input: str, model: str, system_prompt: str) -> str:
+    """Key on prompt, model and system prompt, so changing either never serves a stale plan."""
+    prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    raw = f"{model}\0{prompt_hash}\0{normalize_prompt(user_input)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """TTL + LRU cache of key -> JSON-serializable payload with an optional SQLite file.
+
+    The in-memory tier holds the ``max_entries`` most recently used plans; the SQLite
+    tier (when ``path`` is set) keeps everything that has not expired so entries
+    survive restarts. Expired rows are dropped when they are read and trimmed in bulk.
+    The disk tier is best effort: SQLite errors are logged and treated as misses. Async
+    callers should go through a thread when ``persistent`` is true.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        path: Optional[str] = None,
+        max_disk_entries: int = 0,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        # key -> (expires_at, payload)
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._bypassed = 0
+        self._disk_writes = 0
+        self._db: sqlite3.Connection | None = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "last_used REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return payload
+                del self._entries[key]
+                self._expired += 1
+            disk = self._disk_get(key, now)
+            if disk is not None:
+                self._disk_hits += 1
+                self._remember(key, *disk)
+                return disk[1]
+            self._misses += 1
+            return None
+
+    def put(self, key: str, payload: Any) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, payload)
+            self._disk_put(key, expires_at, payload)
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._bypassed += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "bypassed": self._bypassed,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                "persistent": self._db is not None,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def _remember(self, key: str, expires_at: float, payload: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (expires_at, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple[float, Any]]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT payload, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self._expired += 1
+                return None
+            try:
+                payload = json.loads(row[0])
+            except ValueError:
+                logger.warning("Dropping unreadable cached AI response %s", key)
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return row[1], payload
+        except sqlite3.Error:
+            logger.warning(
+                "AI response cache lookup failed for %s; treating it as a miss", key, exc_info=True
+            )
+            return None
+
+    def _disk_put(self, key: str, expires_at: float, payload: Any) -> None:
+        if self._db is None:
+            return
+        try:
+            now = time.time()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(payload), expires_at, now),
+            )
+            self._disk_writes += 1
+            # trimming expired and least recently used rows every so often rather than on
+            # every write.
+            if self._disk_writes % 256 == 0:
+                self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+                if self.max_disk_entries > 0:
+                    self._db.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,),
+                    )
+            self._db.commit()
+        except sqlite3.Error:  # pragma: no cover - the disk tier is best effort
+            logger.exception("Failed to persist AI response %s", key)
@@ -0,0 +1,176 @@
+"""Near-duplicate prompt cache backed by a dedicated Chroma collection."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from chromadb.api.models.Collection import Collection
+
+from app.services.response_cache import cache_key, normalize_prompt
+
+logger = logging.getLogger(__name__)
+
+# evicting down to this fraction of max_entries so a full cache does not evict on every store.
+_EVICT_TO = 0.9
+
+
+class SemanticCache:
+    """Map prompt embeddings to generated plans and serve paraphrases within ``threshold``.
+
+    Entries live in their own cosine-space collection (never mixed with todo memory) and
+    carry the model and system-prompt hash they were generated with, so lookups only
+    match plans produced by the current configuration. Entries expire after
+    ``ttl_seconds``; past ``max_entries`` the least recently used are evicted.
+    """
+
+    def __init__(
+        self,
+        collection_getter: Callable[[], Collection],
+        embed: Callable[[list[str]], list[list[float]]],
+        *,
+        threshold: float,
+        max_entries: int,
+        ttl_seconds: float,
+        model: str,
+        system_prompt: str,
+    ) -> None:
+        self._collection_getter = collection_getter
+        self._embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.model = model
+        self.system_prompt = system_prompt
+        self._system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._stores = 0
+        self._errors = 0
+        self._hit_distance_total = 0.0
+
+    def _where(self) -> dict[str, Any]:
+        return {"$and": [{"model": self.model}, {"system_hash": self._system_hash}]}
+
+    def lookup(self, prompt: str) -> Optional[tuple[Any, float]]:
+        """Return ``(payload, distance)`` for the nearest cached prompt within the threshold."""
+        try:
+            return self._lookup(prompt)
+        except Exception:
+            # the semantic tier is an optimization; a broken embedder must not break generation.
+            logger.warning("Semantic cache lookup failed", exc_info=True)
+            with self._lock:
+                self._errors += 1
+            return None
+
+    def _lookup(self, prompt: str) -> Optional[tuple[Any, float]]:
+        collection = self._collection_getter()
+        vector = self._embed([normalize_prompt(prompt)])[0]
+        result = collection.query(
+            query_embeddings=[vector],
+            n_results=1,
+            where=self._where(),
+            include=["metadatas", "distances"],
+        )
+        ids = result.get("ids", [[]])[0]
+        if not ids:
+            with self._lock:
+                self._misses += 1
+            return None
+        metadata = dict(result["metadatas"][0][0])
+        distance = float(result["distances"][0][0])
+        now = time.time()
+        if metadata.get("expires_at", 0) <= now:
+            collection.delete(ids=[ids[0]])
+            with self._lock:
+                self._expired += 1
+                self._misses += 1
+            return None
+        if distance > self.threshold:
+            with self._lock:
+                self._misses += 1
+            return None
+        metadata["last_used"] = now
+        collection.update(ids=[ids[0]], metadatas=[metadata])
+        with self._lock:
+            self._hits += 1
+            self._hit_distance_total += distance
+        return json.loads(metadata["payload"]), distance
+
+    def store(self, prompt: str, payload: Any) -> None:
+        normalized = normalize_prompt(prompt)
+        now = time.time()
+        try:
+            collection = self._collection_getter()
+            vector = self._embed([normalized])[0]
+            collection.upsert(
+                ids=[cache_key(prompt, self.model, self.system_prompt)],
+                embeddings=[vector],
+                documents=[normalized],
+                metadatas=[
+                    {
+                        "model": self.model,
+                        "system_hash": self._system_hash,
+                        "payload": json.dumps(payload),
+                        "expires_at": now + self.ttl_seconds,
+                        "last_used": now,
+                    }
+                ],
+            )
+            with self._lock:
+                self._stores += 1
+            if collection.count() > self.max_entries:
+                self._evict(collection, now)
+        except Exception:
+            logger.warning("Semantic cache store failed", exc_info=True)
+            with self._lock:
+                self._errors += 1
+
+    def _evict(self, collection: Collection, now: float) -> None:
+        rows = collection.get(include=["metadatas"])
+        entries = sorted(
+            zip(rows["ids"], rows["metadatas"]),
+            key=lambda item: (item[1] or {}).get("last_used", 0),
+        )
+        expiry = [
+            (entry_id, (metadata or {}).get("expires_at", 0)) for entry_id, metadata in entries
+        ]
+        expired = [entry_id for entry_id, expires_at in expiry if expires_at <= now]
+        live = [entry_id for entry_id, expires_at in expiry if expires_at > now]
+        overflow = max(0, len(live) - int(self.max_entries * _EVICT_TO))
+        doomed = expired + live[:overflow]
+        if doomed:
+            collection.delete(ids=doomed)
+        with self._lock:
+            self._expired += len(expired)
+            self._evictions += overflow
+
+    def stats(self) -> dict[str, Any]:
+        try:
+            size: Optional[int] = self._collection_getter().count()
+        except Exception:
+            size = None
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": size,
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "stores": self._stores,
+                "errors": self._errors,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "avg_hit_distance": (
+                    round(self._hit_distance_total / self._hits, 4) if self._hits else None
+                ),
+            }
@@ -13,14 +13,25 @@
 
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Iterable, List, Optional
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional, Sequence
 
 from fastapi import HTTPException, status
+from sqlalchemy import and_, insert, literal, or_, tuple_
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app import models, schemas
-from app.services import chroma_service
+from app import metrics, models, schemas
+from app.services.index_queue import index_queue
+
+
+# timing each public query function under its own name (db_query_duration_seconds in /metrics).
+def _timed(fn):
+    return metrics.timed(metrics.DB_QUERY_SECONDS, function=fn.__name__)(fn)
 
 
 # defining a function to coerce the deadline for the todo service.
@@ -41,7 +52,10 @@ def _coerce_deadline(raw: Optional[str | datetime]) -> Optional[datetime]:
 
 
 # defining a function to create a todo for the todo service.
-def create_todo(payload: schemas.TodoCreate, session: Session) -> models.TodoItem:
+@_timed
+def create_todo(
+    payload: schemas.TodoCreate, session: Session, *, index: bool = True
+) -> models.TodoItem:
     # creating the todo for the todo service.
     todo = models.TodoItem(**payload.model_dump())
     # adding the todo to the session.
@@ -50,13 +64,17 @@ def create_todo(payload: schemas.TodoCreate, session: Session) -> models.TodoIte
     session.commit()
     # refreshing the todo.
     session.refresh(todo)
-    # indexing the todo for the chroma service.
-    chroma_service.index_todo(todo)
+    # queueing the todo for background indexing (async callers enqueue it themselves).
+    if index:
+        index_queue.submit(todo)
     return todo
 
 
 # defining a function to update a todo for the todo service.
-def update_todo(todo_id: int, payload: schemas.TodoUpdate, session: Session) -> models.TodoItem:
+@_timed
+def update_todo(
+    todo_id: int, payload: schemas.TodoUpdate, session: Session, *, index: bool = True
+) -> models.TodoItem:
     # getting the todo for the todo service.
     todo = session.get(models.TodoItem, todo_id)
     if not todo:
@@ -77,13 +95,15 @@ def update_todo(todo_id: int, payload: schemas.TodoUpdate, session: Session) ->
     session.commit()
     # refreshing the todo.
     session.refresh(todo)
-    # indexing the todo for the chroma service.
-    chroma_service.index_todo(todo)
+    # queueing the todo for background indexing.
+    if index:
+        index_queue.submit(todo)
     return todo
 
 
 # defining a function to delete a todo for the todo service.
-def delete_todo(todo_id: int, session: Session) -> None:
+@_timed
+def delete_todo(todo_id: int, session: Session, *, index: bool = True) -> None:
     # getting the todo for the todo service.
     todo = session.get(models.TodoItem, todo_id)
     if not todo:
@@ -93,27 +113,27 @@ def delete_todo(todo_id: int, session: Session) -> None:
     session.delete(todo)
     # committing the session.
     session.commit()
-    # deleting the todo from the chroma service.
-    chroma_service.delete_todo(todo_id)
+    # queueing the removal from the chroma index.
+    if index:
+        index_queue.submit_delete(todo_id)
 
 
-def complete_todo(todo_id: int, session: Session) -> models.TodoItem:
+@_timed
+def complete_todo(todo_id: int, session: Session, *, index: bool = True) -> models.TodoItem:
     """Mark the given todo as done."""
     payload = schemas.TodoUpdate(status="done")
-    return update_todo(todo_id, payload, session)
+    return update_todo(todo_id, payload, session, index=index)
 
 
-# defining a function to list todos for the todo service.
-def list_todos(
-    session: Session,
+# defining a function to apply the list filters for the todo service.
+def _apply_filters(
+    statement,
     *,
     status_filter: Optional[str] = None,
     priority_filter: Optional[str] = None,
     due_before: Optional[datetime] = None,
     due_after: Optional[datetime] = None,
-) -> List[models.TodoItem]:
-    # creating the statement for the todo service.
-    statement = select(models.TodoItem)
+):
     # if the status filter is set, add the status filter to the statement.
     if status_filter:
         statement = statement.where(models.TodoItem.status == status_filter)
@@ -126,26 +146,153 @@ def list_todos(
     # if the due after is set, add the due after to the statement.
     if due_after:
         statement = statement.where(models.TodoItem.deadline >= due_after)
+    return statement
+
+
+# defining a function to list todos for the todo service.
+@_timed
+def list_todos(
+    session: Session,
+    *,
+    status_filter: Optional[str] = None,
+    priority_filter: Optional[str] = None,
+    due_before: Optional[datetime] = None,
+    due_after: Optional[datetime] = None,
+) -> List[models.TodoItem]:
+    # creating the filtered statement for the todo service.
+    statement = _apply_filters(
+        select(models.TodoItem),
+        status_filter=status_filter,
+        priority_filter=priority_filter,
+        due_before=due_before,
+        due_after=due_after,
+    )
     # returning the list of todos.
     return list(session.exec(statement))
 
 
+# defining the columns that can be projected by list_todos_page.
+TODO_FIELDS = tuple(schemas.TodoRead.model_fields)
+
+
+# defining a function to encode a keyset cursor for the todo service.
+def _encode_cursor(order_by: str, value: Optional[datetime], todo_id: int) -> str:
+    raw = json.dumps([order_by, value.isoformat() if value else None, todo_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+# defining a function to decode a keyset cursor for the todo service.
+def _decode_cursor(cursor: str, order_by: str) -> tuple[Optional[datetime], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_order, value, todo_id = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_order != order_by:
+            raise ValueError("cursor was issued for a different order_by")
+        return (datetime.fromisoformat(value) if value else None), int(todo_id)
+    except (ValueError, TypeError, binascii.Error) as exc:
+        # raising an HTTP exception.
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid cursor: {exc}"
+        ) from exc
+
+
+# defining a function to list a page of todos for the todo service.
+@_timed
+def list_todos_page(
+    session: Session,
+    *,
+    status_filter: Optional[str] = None,
+    priority_filter: Optional[str] = None,
+    due_before: Optional[datetime] = None,
+    due_after: Optional[datetime] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    order_by: str = "updated_at",
+    fields: Optional[Sequence[str]] = None,
+) -> schemas.TodoPage:
+    """Keyset-paginated listing.
+
+    ``updated_at`` pages newest first on ``(updated_at, id)``; ``deadline`` pages soonest
+    first on ``(deadline, id)`` with unscheduled todos last. ``fields`` limits the
+    selected columns.
+    """
+    # validating the projection.
+    requested = list(dict.fromkeys(fields or TODO_FIELDS))
+    unknown = [field for field in requested if field not in TODO_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    if order_by not in ("updated_at", "deadline"):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown order_by '{order_by}'",
+        )
+    # selecting the requested columns plus the keyset columns.
+    sort_column = getattr(models.TodoItem, order_by)
+    selected = list(dict.fromkeys([*requested, order_by, "id"]))
+    statement = _apply_filters(
+        select(*[getattr(models.TodoItem, field) for field in selected]),
+        status_filter=status_filter,
+        priority_filter=priority_filter,
+        due_before=due_before,
+        due_after=due_after,
+    )
+    # if the cursor is set, continue strictly after the last row of the previous page.
+    if cursor:
+        value, last_id = _decode_cursor(cursor, order_by)
+        if order_by == "updated_at":
+            statement = statement.where(
+                tuple_(sort_column, models.TodoItem.id) < tuple_(value, last_id)
+            )
+        elif value is None:
+            statement = statement.where(and_(sort_column.is_(None), models.TodoItem.id > last_id))
+        else:
+            statement = statement.where(
+                or_(
+                    tuple_(sort_column, models.TodoItem.id) > tuple_(value, last_id),
+                    sort_column.is_(None),
+                )
+            )
+    # ordering by the keyset.
+    if order_by == "updated_at":
+        statement = statement.order_by(sort_column.desc(), models.TodoItem.id.desc())
+    else:
+        statement = statement.order_by(sort_column.is_(None), sort_column, models.TodoItem.id)
+    # fetching one extra row to know whether another page exists.
+    rows = list(session.exec(statement.limit(limit + 1)))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items: list[dict[str, Any]] = [
+        {field: row._mapping[field] for field in requested} for row in rows
+    ]
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]._mapping
+        next_cursor = _encode_cursor(order_by, last[order_by], last["id"])
+    return schemas.TodoPage(items=items, next_cursor=next_cursor)
+
+
+# defining a function to convert a todo into a tree node for the todo service.
+def _to_tree_node(todo: models.TodoItem) -> schemas.TodoTreeNode:
+    return schemas.TodoTreeNode(
+        id=todo.id,
+        title=todo.title,
+        reason=todo.reason,
+        priority=todo.priority,  # type: ignore[arg-type]
+        status=todo.status,  # type: ignore[arg-type]
+        deadline=todo.deadline,
+    )
+
+
 # defining a function to get the tree for the todo service.
+@_timed
 def get_tree(session: Session) -> List[schemas.TodoTreeNode]:
     # getting the list of todos for the todo service.
     todos = list(session.exec(select(models.TodoItem)))
     # creating the nodes for the todo service.
-    nodes: dict[int, schemas.TodoTreeNode] = {}
-    for todo in todos:
-        # creating the node for the todo service.
-        nodes[todo.id] = schemas.TodoTreeNode(
-            id=todo.id,
-            title=todo.title,
-            reason=todo.reason,
-            priority=todo.priority,  # type: ignore[arg-type]
-            status=todo.status,  # type: ignore[arg-type]
-            deadline=todo.deadline,
-        )
+    nodes: dict[int, schemas.TodoTreeNode] = {todo.id: _to_tree_node(todo) for todo in todos}
 
     # creating the roots for the todo service.
     roots: List[schemas.TodoTreeNode] = []
@@ -162,37 +309,220 @@ def get_tree(session: Session) -> List[schemas.TodoTreeNode]:
     return roots
 
 
-# defining a function to save a generated tree for the todo service.
-def save_generated_tree(nodes: Iterable[schemas.GeneratedTodoNode], session: Session) -> List[models.TodoItem]:
-    # creating the list of created todos for the todo service.
-    created: List[models.TodoItem] = []
-    # defining a function to walk the nodes for the todo service.
-
-    def _walk(node: schemas.GeneratedTodoNode, parent_id: Optional[int]) -> None:
-        todo = models.TodoItem(
-            title=node.title,
-            reason=node.reason,
-            priority=node.priority,
-            status=node.status,
-            deadline=_coerce_deadline(node.deadline),
-            parent_id=parent_id,
+# defining a function to get a single subtree for the todo service.
+@_timed
+def get_subtree(
+    root_id: int, session: Session, max_depth: Optional[int] = None
+) -> schemas.TodoTreeNode:
+    """Fetch one node and its descendants with a recursive CTE over ``parent_id``."""
+    # seeding the recursive query with the root row.
+    subtree = (
+        select(models.TodoItem.id, literal(0).label("depth"))
+        .where(models.TodoItem.id == root_id)
+        .cte("subtree", recursive=True)
+    )
+    # walking down to the children of every row found so far.
+    child = aliased(models.TodoItem)
+    step = select(child.id, subtree.c.depth + 1).join(subtree, child.parent_id == subtree.c.id)
+    # if the max depth is set, stop descending once it is reached.
+    if max_depth is not None:
+        step = step.where(subtree.c.depth < max_depth)
+    subtree = subtree.union_all(step)
+    # loading the rows of the subtree, parents before children.
+    statement = (
+        select(models.TodoItem)
+        .join(subtree, models.TodoItem.id == subtree.c.id)
+        .order_by(subtree.c.depth, models.TodoItem.id)
+    )
+    todos = list(session.exec(statement))
+    if not todos:
+        # raising an HTTP exception.
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Todo not found")
+    # linking the nodes; rows arrive breadth-first so parents always exist already.
+    nodes: dict[int, schemas.TodoTreeNode] = {}
+    for todo in todos:
+        nodes[todo.id] = _to_tree_node(todo)
+        if todo.id != root_id and todo.parent_id in nodes:
+            nodes[todo.parent_id].children.append(nodes[todo.id])
+    return nodes[root_id]
+
+
+# defining a function to get the ancestor path for the todo service.
+@_timed
+def get_ancestors(todo_id: int, session: Session) -> List[models.TodoItem]:
+    """Return the ancestors of ``todo_id`` ordered from the root down to its direct parent."""
+    # if the todo does not exist, raise an HTTP exception.
+    if session.get(models.TodoItem, todo_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Todo not found")
+    # seeding the recursive query with the todo itself.
+    chain = (
+        select(models.TodoItem.id, models.TodoItem.parent_id, literal(0).label("depth"))
+        .where(models.TodoItem.id == todo_id)
+        .cte("ancestors", recursive=True)
+    )
+    # walking up to the parent of every row found so far.
+    parent = aliased(models.TodoItem)
+    chain = chain.union_all(
+        select(parent.id, parent.parent_id, chain.c.depth + 1).join(
+            chain, parent.id == chain.c.parent_id
         )
-        session.add(todo)
-        session.flush()
-        created.append(todo)
-        for child in node.subitems:
-            _walk(child, todo.id)
-
-    # iterating over the nodes.
-    for node in nodes:
-        # walking the nodes.
-        _walk(node, None)
+    )
+    # loading the ancestors, root first.
+    statement = (
+        select(models.TodoItem)
+        .join(chain, models.TodoItem.id == chain.c.id)
+        .where(chain.c.depth > 0)
+        .order_by(chain.c.depth.desc())
+    )
+    return list(session.exec(statement))
+
+
+# defining a function to save a generated tree for the todo service.
+@_timed
+def save_generated_tree(
+    nodes: Iterable[schemas.GeneratedTodoNode], session: Session, *, index: bool = True
+) -> List[models.TodoItem]:
+    """Persist a generated forest in bulk.
+
+    On SQLite the first row is inserted alone, which takes the database write lock;
+    every other id is then assigned client-side and the rest go out in a single
+    executemany. Other backends insert one statement per tree level. The walk is
+    iterative, so deep AI output cannot hit the recursion limit, and the returned
+    todos keep depth-first order without a refresh per row.
+    """
+    # walking the forest depth-first with an explicit stack, recording (node, parent slot, depth).
+    ordered: List[tuple[schemas.GeneratedTodoNode, Optional[int], int]] = []
+    stack: List[tuple[schemas.GeneratedTodoNode, Optional[int], int]] = [
+        (node, None, 0) for node in reversed(list(nodes))
+    ]
+    while stack:
+        node, parent_slot, depth = stack.pop()
+        slot = len(ordered)
+        ordered.append((node, parent_slot, depth))
+        for child in reversed(node.subitems):
+            stack.append((child, slot, depth + 1))
+    if not ordered:
+        return []
+
+    # stamping every row with the same timestamps so nothing needs to be read back.
+    now = datetime.now(timezone.utc)
+    rows: List[dict[str, Any]] = [
+        {
+            "title": node.title,
+            "reason": node.reason,
+            "priority": node.priority,
+            "status": node.status,
+            "deadline": _coerce_deadline(node.deadline),
+            "parent_id": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for node, _parent_slot, _depth in ordered
+    ]
+    # a Core insert keeps every row in one executemany; ORM bulk mode would split rows
+    # by their None columns.
+    table = models.TodoItem.__table__
+    ids: List[Optional[int]] = [None] * len(ordered)
+    if session.get_bind().dialect.name == "sqlite":
+        # the anchor row takes sqlite's write lock, so anchor + slot is free for every other row.
+        ids[0] = session.execute(insert(table).returning(table.c.id), rows[0]).scalar_one()
+        for slot, (_node, parent_slot, _depth) in enumerate(ordered):
+            ids[slot] = ids[0] + slot
+            rows[slot]["id"] = ids[slot]
+            rows[slot]["parent_id"] = ids[parent_slot] if parent_slot is not None else None
+        if len(rows) > 1:
+            session.execute(insert(table), rows[1:])
+    else:
+        # grouping the slots by depth; parents are always written before their children.
+        levels: List[List[int]] = []
+        for slot, (_node, _parent_slot, depth) in enumerate(ordered):
+            if depth == len(levels):
+                levels.append([])
+            levels[depth].append(slot)
+        statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        for slots in levels:
+            for slot in slots:
+                parent_slot = ordered[slot][1]
+                rows[slot]["parent_id"] = ids[parent_slot] if parent_slot is not None else None
+            inserted = session.execute(statement, [rows[slot] for slot in slots]).scalars().all()
+            for slot, todo_id in zip(slots, inserted):
+                ids[slot] = todo_id
+                rows[slot]["id"] = todo_id
     # committing the session.
     session.commit()
-    # iterating over the created todos.
-    for todo in created:
-        session.refresh(todo)
-        # indexing the todo for the chroma service.
-        chroma_service.index_todo(todo)
+    # building the created todos from the values we already hold.
+    created = [models.TodoItem(**row) for row in rows]
+    # queueing the created todos for batched background indexing.
+    if index:
+        index_queue.submit_many(created)
     # returning the created todos.
     return created
+
+
+# async variants: the sync functions above run on the AsyncSession's connection via
+# run_sync, so every SQL round-trip is awaited instead of holding a threadpool slot.
+# run_sync executes on the event loop, so writes skip indexing there and enqueue once the
+# DB call has returned, through the queue's non-blocking async path.
+async def create_todo_async(payload: schemas.TodoCreate, session: AsyncSession) -> models.TodoItem:
+    todo = await session.run_sync(
+        lambda sync_session: create_todo(payload, sync_session, index=False)
+    )
+    await index_queue.submit_async(todo)
+    return todo
+
+
+async def update_todo_async(
+    todo_id: int, payload: schemas.TodoUpdate, session: AsyncSession
+) -> models.TodoItem:
+    todo = await session.run_sync(
+        lambda sync_session: update_todo(todo_id, payload, sync_session, index=False)
+    )
+    await index_queue.submit_async(todo)
+    return todo
+
+
+async def delete_todo_async(todo_id: int, session: AsyncSession) -> None:
+    await session.run_sync(lambda sync_session: delete_todo(todo_id, sync_session, index=False))
+    await index_queue.submit_delete_async(todo_id)
+
+
+async def complete_todo_async(todo_id: int, session: AsyncSession) -> models.TodoItem:
+    todo = await session.run_sync(
+        lambda sync_session: complete_todo(todo_id, sync_session, index=False)
+    )
+    await index_queue.submit_async(todo)
+    return todo
+
+
+async def list_todos_async(session: AsyncSession, **filters: Any) -> List[models.TodoItem]:
+    return await session.run_sync(lambda sync_session: list_todos(sync_session, **filters))
+
+
+async def list_todos_page_async(session: AsyncSession, **options: Any) -> schemas.TodoPage:
+    return await session.run_sync(lambda sync_session: list_todos_page(sync_session, **options))
+
+
+async def get_tree_async(session: AsyncSession) -> List[schemas.TodoTreeNode]:
+    return await session.run_sync(get_tree)
+
+
+async def get_subtree_async(
+    root_id: int, session: AsyncSession, max_depth: Optional[int] = None
+) -> schemas.TodoTreeNode:
+    return await session.run_sync(
+        lambda sync_session: get_subtree(root_id, sync_session, max_depth=max_depth)
+    )
+
+
+async def get_ancestors_async(todo_id: int, session: AsyncSession) -> List[models.TodoItem]:
+    return await session.run_sync(lambda sync_session: get_ancestors(todo_id, sync_session))
+
+
+async def save_generated_tree_async(
+    nodes: Iterable[schemas.GeneratedTodoNode], session: AsyncSession
+) -> List[models.TodoItem]:
+    created = await session.run_sync(
+        lambda sync_session: save_generated_tree(nodes, sync_session, index=False)
+    )
+    await index_queue.submit_many_async(created)
+    return created
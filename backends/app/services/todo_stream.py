@@ -0,0 +1,87 @@
+"""Incremental parser that yields top-level todo objects from a streamed JSON completion."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+
+class TodoStreamParser:
+    """Feed completion text chunk by chunk; get back each top-level todo once it is complete.
+
+    Understands ``{"todos": [ {...}, ... ]}`` (what the system prompt asks for) and a bare
+    ``[ {...}, ... ]``. Anything outside the root value, such as a markdown code fence,
+    is ignored. Each finished item (subitems included) is decoded with ``json.loads`` as
+    soon as its closing brace arrives, so callers never wait for the rest of the array.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._root: Optional[str] = None
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self.done = False
+        self.emitted = 0
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        self._text += chunk
+        items: list[dict[str, Any]] = []
+        text = self._text
+        while self._pos < len(text) and not self.done:
+            char = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._root == "{":
+                        self._last_key = text[self._string_start + 1 : self._pos]
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char in "{[":
+                if self._depth == 0:
+                    self._root = char
+                self._depth += 1
+                if self._array_depth is None and char == "[" and self._opens_todos():
+                    self._array_depth = self._depth
+                elif (
+                    self._array_depth is not None
+                    and char == "{"
+                    and self._depth == self._array_depth + 1
+                ):
+                    self._item_start = self._pos
+            elif char in "}]" and self._depth > 0:
+                if (
+                    char == "}"
+                    and self._array_depth is not None
+                    and self._depth == self._array_depth + 1
+                    and self._item_start is not None
+                ):
+                    items.append(json.loads(text[self._item_start : self._pos + 1]))
+                    self._item_start = None
+                    self.emitted += 1
+                elif char == "]" and self._depth == self._array_depth:
+                    self.done = True
+                self._depth -= 1
+            self._pos += 1
+        return items
+
+    def _opens_todos(self) -> bool:
+        # a bare top-level array, or the array under the root object's "todos" key.
+        if self._root == "[":
+            return self._depth == 1
+        return self._depth == 2 and self._last_key == "todos"
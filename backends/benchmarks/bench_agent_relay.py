@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Requests/second through HTTPAgentProvider against a local stub upstream."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from app.config import settings
+from app.services.agent_router import AgentResult, HTTPAgentProvider, _extract_text
+
+
+def stub_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/run")
+    async def run(payload: dict) -> dict:
+        return {"output": f"echo: {payload.get('input', '')}"}
+
+    return app
+
+
+def serve_stub() -> tuple[uvicorn.Server, str]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(stub_app(), host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}/run"
+
+
+class PerCallClientProvider(HTTPAgentProvider):
+    """The previous behaviour: a fresh AsyncClient (and TCP/TLS handshake) per request."""
+
+    async def run(self, model, user_input, metadata) -> AgentResult:
+        async with httpx.AsyncClient(timeout=settings.AGENT_HTTP_TIMEOUT) as client:
+            response = await client.post(self.base_url, json={"input": user_input})
+            response.raise_for_status()
+            data = response.json()
+            return AgentResult(
+                provider=self.name, model=model, output=_extract_text(data), raw=data
+            )
+
+
+async def _drive(provider: HTTPAgentProvider, total: int, concurrency: int) -> float:
+    await provider.open()
+    remaining = iter(range(total))
+
+    async def _worker() -> None:
+        for idx in remaining:
+            await provider.run(None, f"prompt {idx}", None)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await provider.aclose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call upstream clients")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--url", default=None, help="Existing upstream to hit instead of the local stub"
+    )
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = serve_stub()
+
+    for label, cls in (("per-call", PerCallClientProvider), ("pooled", HTTPAgentProvider)):
+        provider = cls(name="stub", base_url=url, api_key=None)
+        elapsed = asyncio.run(_drive(provider, args.requests, args.concurrency))
+        rate = args.requests / elapsed
+        print(f"{label:<9} {rate:9.1f} req/s  ({elapsed:.2f}s for {args.requests})")
+
+    if server is not None:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Load test: sync (threadpool) todo routes vs the async routes in app.api.routes_todos."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+_TMP = tempfile.TemporaryDirectory()
+# the engines read DB_URL at import time, so point them at a scratch database first.
+os.environ["DB_URL"] = f"sqlite:///{Path(_TMP.name) / 'bench.db'}"
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("INDEX_ASYNC", "false")
+
+import anyio.to_thread
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI
+from sqlmodel import Session
+
+from app import schemas
+from app.api import routes_todos
+from app.database import get_session, init_db
+from app.services import chroma_service, todo_service
+
+
+def _sync_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/todos", response_model=schemas.TodoPage)
+    def list_todos(session: Session = Depends(get_session)):
+        return todo_service.list_todos_page(session, status_filter="pending", limit=50)
+
+    @app.post("/todos", response_model=schemas.TodoRead, status_code=201)
+    def create_todo(todo: schemas.TodoCreate, session: Session = Depends(get_session)):
+        return todo_service.create_todo(todo, session)
+
+    return app
+
+
+def _async_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(routes_todos.router)
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(app: FastAPI, port: int, tokens: int) -> uvicorn.Server:
+    async def _limit_threadpool() -> None:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = tokens
+
+    app.router.on_startup.append(_limit_threadpool)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _load(
+    base_url: str, concurrency: int, seconds: float, write_every: int
+) -> tuple[int, int, list[float]]:
+    done = errors = 0
+    latencies: list[float] = []
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+
+        async def _worker(worker_id: int) -> None:
+            nonlocal done, errors
+            count = 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                if write_every and count % write_every == worker_id % write_every:
+                    response = await client.post("/todos", json={"title": "Load test"})
+                else:
+                    response = await client.get("/todos")
+                latencies.append(time.perf_counter() - started)
+                count += 1
+                if response.status_code >= 400:
+                    errors += 1
+                else:
+                    done += 1
+
+        await asyncio.gather(*(_worker(idx) for idx in range(concurrency)))
+    return done, errors, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare sync and async todo routes under load")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--write-every", type=int, default=5, help="Every Nth request is a POST (0 = reads only)"
+    )
+    parser.add_argument(
+        "--threadpool-tokens",
+        type=int,
+        default=40,
+        help="anyio threadpool size (FastAPI default 40)",
+    )
+    args = parser.parse_args()
+
+    chroma_service.index_many = lambda *_args, **_kwargs: None  # type: ignore[assignment]
+    init_db()
+
+    for label, factory in (("sync", _sync_app), ("async", _async_app)):
+        port = _free_port()
+        server = _serve(factory(), port, args.threadpool_tokens)
+        done, errors, latencies = asyncio.run(
+            _load(f"http://127.0.0.1:{port}", args.concurrency, args.seconds, args.write_every)
+        )
+        server.should_exit = True
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+        rate = done / args.seconds
+        print(f"{label:<6} {rate:9.1f} req/s  p99={p99 * 1000:8.1f} ms  errors={errors}")
+        time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    main()
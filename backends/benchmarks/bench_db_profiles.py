@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Mixed read/write concurrency benchmark: default SQLite engine vs the production profile."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel
+
+from app import models, schemas
+from app.config import settings
+from app.database import _create_engine
+from app.services import chroma_service, todo_service
+
+
+def _seed(engine, rows: int) -> None:
+    with Session(engine) as session:
+        session.add_all(
+            models.TodoItem(title=f"Seed {idx}", priority="medium") for idx in range(rows)
+        )
+        session.commit()
+
+
+def _worker(
+    engine, deadline: float, write_ratio: float, counters: dict, lock: threading.Lock
+) -> None:
+    rng = random.Random()
+    reads = writes = errors = 0
+    while time.perf_counter() < deadline:
+        try:
+            with Session(engine) as session:
+                if rng.random() < write_ratio:
+                    todo_service.create_todo(schemas.TodoCreate(title="Bench write"), session)
+                    writes += 1
+                else:
+                    todo_service.list_todos_page(session, status_filter="pending", limit=50)
+                    reads += 1
+        except OperationalError:
+            errors += 1
+    with lock:
+        counters["reads"] += reads
+        counters["writes"] += writes
+        counters["errors"] += errors
+
+
+def _run(profile: str, threads: int, seconds: float, write_ratio: float, seed_rows: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", profile=profile)
+        SQLModel.metadata.create_all(engine)
+        _seed(engine, seed_rows)
+        counters = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+        pool = [
+            threading.Thread(target=_worker, args=(engine, deadline, write_ratio, counters, lock))
+            for _ in range(threads)
+        ]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        engine.dispose()
+    total = counters["reads"] + counters["writes"]
+    print(
+        f"{profile:<11} {total / seconds:9.1f} ops/s  reads={counters['reads']:<7} "
+        f"writes={counters['writes']:<7} locked_errors={counters['errors']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare SQLite engine profiles under concurrent load"
+    )
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--seed-rows", type=int, default=5_000)
+    args = parser.parse_args()
+
+    # keep the benchmark about SQL: no SQL echo and no embedding work.
+    settings.DEBUG = False
+    settings.INDEX_ASYNC = False
+    chroma_service.index_many = lambda *_args, **_kwargs: None  # type: ignore[assignment]
+
+    for profile in ("default", "production"):
+        _run(profile, args.threads, args.seconds, args.write_ratio, args.seed_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Compare per-todo indexing with the batched chroma_service.index_many path."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import chromadb
+
+from app import models
+from app.services import chroma_service
+from app.services.embedding_cache import EmbeddingCache
+
+
+class StubVector(list):
+    def tolist(self):
+        return list(self)
+
+
+class StubEmbedder:
+    """Offline stand-in that charges a fixed cost per encode call plus a cost per document."""
+
+    def __init__(self, call_overhead: float, per_doc: float, dim: int = 384) -> None:
+        self.call_overhead = call_overhead
+        self.per_doc = per_doc
+        self.dim = dim
+
+    def encode(self, docs, **_kwargs):
+        time.sleep(self.call_overhead + self.per_doc * len(docs))
+        return [StubVector([float(len(doc) % 7)] * self.dim) for doc in docs]
+
+
+def _make_todos(count: int) -> list[models.TodoItem]:
+    return [
+        models.TodoItem(
+            id=idx, title=f"Benchmark task {idx}", reason="Synthetic", priority="medium"
+        )
+        for idx in range(1, count + 1)
+    ]
+
+
+def _fresh_collection(client, name: str):
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+    return client.create_collection(name)
+
+
+def _fresh_cache() -> EmbeddingCache:
+    return EmbeddingCache("bench", max_entries=10_000)
+
+
+def _run(label: str, todos: list[models.TodoItem], fn) -> float:
+    started = time.perf_counter()
+    fn(todos)
+    elapsed = time.perf_counter() - started
+    rate = len(todos) / elapsed if elapsed else float("inf")
+    print(f"  {label:<10} {elapsed * 1000:10.1f} ms  {rate:10.1f} todos/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark todo indexing throughput")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument(
+        "--batch-size", type=int, default=None, help="Override EMBEDDING_BATCH_SIZE"
+    )
+    parser.add_argument(
+        "--real-embedder",
+        action="store_true",
+        help="Use the configured SentenceTransformer instead of the offline stub",
+    )
+    parser.add_argument("--stub-call-ms", type=float, default=5.0, help="Stub cost per encode call")
+    parser.add_argument("--stub-doc-ms", type=float, default=0.2, help="Stub cost per document")
+    args = parser.parse_args()
+
+    if not args.real_embedder:
+        stub = StubEmbedder(args.stub_call_ms / 1000, args.stub_doc_ms / 1000)
+        chroma_service._get_embedder = lambda: stub  # type: ignore[assignment]
+
+    client = chromadb.EphemeralClient()
+    for size in args.sizes:
+        todos = _make_todos(size)
+        print(f"{size} todos")
+
+        chroma_service._collection = _fresh_collection(client, "bench_loop")
+        chroma_service._embedding_cache = _fresh_cache()
+        loop = _run(
+            "per-todo", todos, lambda items: [chroma_service.index_todo(todo) for todo in items]
+        )
+
+        chroma_service._collection = _fresh_collection(client, "bench_batch")
+        chroma_service._embedding_cache = _fresh_cache()
+        batch = _run(
+            "batched",
+            todos,
+            lambda items: chroma_service.index_many(items, batch_size=args.batch_size),
+        )
+        print(f"  speedup    {loop / batch:10.1f}x")
+
+        # status-only changes keep the document text, so every vector comes from the cache.
+        for todo in todos:
+            todo.status = "done"
+        _run(
+            "cached",
+            todos,
+            lambda items: chroma_service.index_many(items, batch_size=args.batch_size),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Measure what the metrics collectors cost per observation and per request."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from app import metrics
+from app.middleware import MetricsMiddleware
+
+
+async def endpoint(scope, receive, send) -> None:
+    headers = [(b"content-type", b"application/json")]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    await send({"type": "http.response.body", "body": b'{"ok":true}'})
+
+
+SCOPE = {
+    "type": "http",
+    "method": "GET",
+    "path": "/todos",
+    "headers": [],
+    "client": ("127.0.0.1", 50000),
+    "route": type("Route", (), {"path": "/todos"})(),
+}
+
+
+async def _drive(app, requests: int) -> float:
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_message: dict) -> None:
+        return None
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(SCOPE), receive, send)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark metrics collector overhead")
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    histogram = metrics.histogram("bench_seconds", "Benchmark histogram.", ("function",))
+    started = time.perf_counter()
+    for idx in range(args.iterations):
+        histogram.observe(idx * 1e-6, function="list_todos")
+    per_call = (time.perf_counter() - started) / args.iterations
+    print(f"  histogram.observe     {per_call * 1e9:8.0f} ns")
+
+    timed = metrics.timed(histogram, function="noop")(lambda: None)
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        timed()
+    per_call = (time.perf_counter() - started) / args.iterations
+    print(f"  @timed call           {per_call * 1e9:8.0f} ns")
+
+    bare = asyncio.run(_drive(endpoint, args.iterations))
+    wrapped = asyncio.run(_drive(MetricsMiddleware(endpoint), args.iterations))
+    print(f"  middleware overhead   {(wrapped - bare) / args.iterations * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
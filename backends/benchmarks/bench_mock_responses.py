@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark serving MOCK_AI_RESPONSES_FILE through MockResponses against re-reading it per call."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from app import schemas
+from app.services.mock_responses import MockResponses
+
+
+def _legacy_mock_todos(mock_file: str) -> list[schemas.GeneratedTodoNode]:
+    """The original per-call path: stat, read, parse and validate the whole file every time."""
+    path = Path(mock_file)
+    if not path.exists():
+        return []
+    data: Any = json.loads(path.read_text())
+    if isinstance(data, list):
+        for candidate in data:
+            if isinstance(candidate, dict) and "todos" in candidate:
+                data = candidate
+                break
+    todos_raw = data["todos"] if isinstance(data, dict) else data
+    return [schemas.GeneratedTodoNode(**item) for item in todos_raw]
+
+
+def make_payload(responses: int, nodes: int) -> list[dict[str, Any]]:
+    """``responses`` plans of ``nodes`` top-level todos with three subitems each."""
+    return [
+        {
+            "todos": [
+                {
+                    "title": f"Plan {plan} task {idx}",
+                    "reason": "Synthetic load-test plan",
+                    "priority": "medium",
+                    "subitems": [{"title": f"Step {step}"} for step in range(3)],
+                }
+                for idx in range(nodes)
+            ]
+        }
+        for plan in range(responses)
+    ]
+
+
+def _time(label: str, fn, calls: int) -> None:
+    started = time.perf_counter()
+    for idx in range(calls):
+        fn(f"goal {idx}")
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<8} {elapsed / calls * 1e6:10.1f} us/call  {calls / elapsed:10.0f} calls/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the mock AI response engine")
+    parser.add_argument("--calls", type=int, default=2_000)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[5, 50])
+    parser.add_argument("--responses", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mock_file = Path(tmp) / "mock.json"
+        for nodes in args.nodes:
+            mock_file.write_text(json.dumps(make_payload(args.responses, nodes)))
+            print(f"{args.responses} responses x {nodes} top-level todos")
+            _time("legacy", lambda _prompt: _legacy_mock_todos(str(mock_file)), args.calls)
+            _time("engine", MockResponses(str(mock_file)).select, args.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Benchmark per-request overhead and memory of the ASGI rate limiter (memory and shared
+SQLite backends) against the BaseHTTPMiddleware one."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Deque, DefaultDict
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from app.middleware import RateLimiterMiddleware
+from app.rate_limit import SQLiteRateLimiter
+
+
+class LegacyRateLimiterMiddleware(BaseHTTPMiddleware):
+    """The original limiter: a deque of timestamps per client IP, never evicted."""
+
+    def __init__(self, app, limit: int, window_seconds: int) -> None:  # type: ignore[override]
+        super().__init__(app)
+        self.limit = limit
+        self.window = window_seconds
+        self._hits: DefaultDict[str, Deque[float]] = defaultdict(deque)
+
+    async def dispatch(self, request: Request, call_next) -> Response:  # type: ignore[override]
+        key = request.client.host if request.client else "global"
+        now = time.monotonic()
+        bucket = self._hits[key]
+        while bucket and bucket[0] < now - self.window:
+            bucket.popleft()
+        if len(bucket) >= self.limit:
+            return JSONResponse({"detail": "Rate limit exceeded"}, status_code=429)
+        bucket.append(now)
+        return await call_next(request)
+
+
+async def endpoint(scope, receive, send) -> None:
+    headers = [(b"content-type", b"application/json")]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    await send({"type": "http.response.body", "body": b'{"ok":true}'})
+
+
+def _scope(host: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/todos",
+        "raw_path": b"/todos",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": (host, 50000),
+        "server": ("bench", 80),
+    }
+
+
+async def _drive(app, scopes: list[dict], requests: int) -> float:
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_message: dict) -> None:
+        return None
+
+    started = time.perf_counter()
+    for idx in range(requests):
+        await app(scopes[idx % len(scopes)], receive, send)
+    return time.perf_counter() - started
+
+
+def _run(label: str, make_app, scopes: list[dict], requests: int, baseline: float | None) -> float:
+    elapsed = asyncio.run(_drive(make_app(), scopes, requests))
+    # a second pass under tracemalloc measures what the limiter keeps between requests.
+    tracemalloc.start()
+    app = make_app()
+    asyncio.run(_drive(app, scopes, requests))
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_request = elapsed / requests * 1e6
+    overhead = f"  +{per_request - baseline:6.1f} us" if baseline is not None else " " * 11
+    print(
+        f"  {label:<8} {per_request:8.1f} us/request{overhead}  retained {retained / 1024:9.0f} KiB"
+    )
+    return per_request
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark rate limiter middleware overhead")
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 50_000])
+    parser.add_argument(
+        "--limit", type=int, default=None, help="default: --requests, so nothing is rejected"
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=3600,
+        help="long enough that no client state expires mid-run",
+    )
+    parser.add_argument("--max-keys", type=int, default=10_000)
+    args = parser.parse_args()
+    args.limit = args.limit or args.requests
+
+    for clients in args.clients:
+        print(f"{args.requests} requests from {clients} client(s)")
+        scopes = [
+            _scope(f"10.{idx >> 16 & 255}.{idx >> 8 & 255}.{idx & 255}") for idx in range(clients)
+        ]
+        baseline = _run("bare", lambda: endpoint, scopes, args.requests, None)
+        _run(
+            "legacy",
+            lambda: LegacyRateLimiterMiddleware(endpoint, args.limit, args.window),
+            scopes,
+            args.requests,
+            baseline,
+        )
+        _run(
+            "asgi",
+            lambda: RateLimiterMiddleware(
+                endpoint, args.limit, args.window, max_keys=args.max_keys
+            ),
+            scopes,
+            args.requests,
+            baseline,
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = iter(range(2))
+            _run(
+                "sqlite",
+                lambda: RateLimiterMiddleware(
+                    endpoint,
+                    args.limit,
+                    args.window,
+                    limiter=SQLiteRateLimiter(
+                        args.limit, args.window, path=f"{tmp}/limits-{next(paths)}.sqlite"
+                    ),
+                ),
+                scopes,
+                args.requests,
+                baseline,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark save_generated_tree against the previous flush-per-node implementation."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from sqlmodel import Session, SQLModel
+
+from app import models, schemas
+from app.config import settings
+from app.database import _create_engine
+from app.services import chroma_service, todo_service
+from benchmarks.datagen import generated_tree
+
+
+def _legacy_save(nodes: list[schemas.GeneratedTodoNode], session: Session) -> list[models.TodoItem]:
+    """The original recursive walk: one flush per node and one refresh per row."""
+    created: list[models.TodoItem] = []
+
+    def _walk(node: schemas.GeneratedTodoNode, parent_id: Optional[int]) -> None:
+        todo = models.TodoItem(
+            title=node.title,
+            reason=node.reason,
+            priority=node.priority,
+            status=node.status,
+            deadline=node.deadline,
+            parent_id=parent_id,
+        )
+        session.add(todo)
+        session.flush()
+        created.append(todo)
+        for child in node.subitems:
+            _walk(child, todo.id)
+
+    for node in nodes:
+        _walk(node, None)
+    session.commit()
+    for todo in created:
+        session.refresh(todo)
+    return created
+
+
+def _time(label: str, fn, nodes, engine) -> None:
+    with Session(engine) as session:
+        started = time.perf_counter()
+        try:
+            created = fn(nodes, session)
+        except RecursionError:
+            print(f"  {label:<8} RecursionError")
+            return
+        elapsed = time.perf_counter() - started
+    print(f"  {label:<8} {elapsed * 1000:10.1f} ms  {len(created) / elapsed:10.1f} nodes/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark generated-tree persistence")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--branching", type=int, nargs="+", default=[8, 1], help="1 = deep chain")
+    parser.add_argument("--profile", default="production", choices=["default", "production"])
+    args = parser.parse_args()
+
+    settings.DEBUG = False
+    settings.INDEX_ASYNC = False
+    chroma_service.index_many = lambda *_args, **_kwargs: None  # type: ignore[assignment]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", profile=args.profile)
+        SQLModel.metadata.create_all(engine)
+        for size in args.sizes:
+            for branching in args.branching:
+                shape = "deep chain" if branching == 1 else f"branching {branching}"
+                print(f"{size} nodes, {shape}")
+                nodes = generated_tree(size, branching)
+                _time("legacy", _legacy_save, nodes, engine)
+                _time("bulk", todo_service.save_generated_tree, nodes, engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
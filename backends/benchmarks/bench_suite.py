@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""Offline regression suite for the backend hot paths.
+
+``run`` writes JSON, ``compare`` flags regressions.
+
+Every case runs against seeded synthetic data (``benchmarks/datagen.py``), the mock AI file
+and a stub agent upstream, so no network, API key or embedding model is needed::
+
+    uv run python benchmarks/bench_suite.py run --output bench-results/base.json
+    uv run python benchmarks/bench_suite.py run --output bench-results/new.json
+    uv run python benchmarks/bench_suite.py compare bench-results/base.json bench-results/new.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import chromadb
+import httpx
+from sqlmodel import Session, SQLModel, delete
+
+from app import models
+from app.config import settings
+from app.database import _create_engine
+from app.rate_limit import MemoryRateLimiter, SQLiteRateLimiter
+from app.services import ai_service, chroma_service, todo_service
+from app.services.agent_router import AgentRouter, HTTPAgentProvider
+from app.services.embedding_cache import EmbeddingCache
+from benchmarks import datagen
+
+SCHEMA_VERSION = 1
+MOCK_FILE = ROOT / "mocks" / "ai_responses_mix.json"
+
+
+@dataclass
+class Case:
+    name: str
+    # one timed iteration.
+    fn: Callable[[], Any]
+    # work units per iteration (rows, nodes, queries, requests), for throughput.
+    items: int
+    # untimed, before every iteration (e.g. emptying the table a write case fills).
+    setup: Optional[Callable[[], Any]] = None
+
+
+def _sizes(scale: float) -> dict[str, int]:
+    def size(full: int, floor: int = 10) -> int:
+        return max(floor, int(full * scale))
+
+    return {
+        "flat": size(20_000),
+        "wide": size(10_000),
+        "deep": size(2_000),
+        "save": size(5_000),
+        "corpus": size(20_000),
+        "index": size(1_000),
+        "queries": size(50, 5),
+        "calls": size(2_000, 20),
+    }
+
+
+def _db_cases(tmp: Path, sizes: dict[str, int]) -> Iterator[Case]:
+    engine = _create_engine(f"sqlite:///{tmp / 'read.db'}", profile="production")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        seeded = datagen.seed_database(
+            session, flat=sizes["flat"], trees=((sizes["wide"], 8), (sizes["deep"], 1))
+        )
+    rows = sizes["flat"] + sizes["wide"] + sizes["deep"]
+    wide, deep = seeded["trees"]
+
+    # a fresh session per iteration, so the identity map never answers for the database.
+    def with_session(fn: Callable[[Session], Any]) -> Callable[[], Any]:
+        def run() -> Any:
+            with Session(engine) as session:
+                return fn(session)
+
+        return run
+
+    def walk_pages(session: Session) -> int:
+        seen, cursor = 0, None
+        while True:
+            page = todo_service.list_todos_page(
+                session, limit=500, cursor=cursor, fields=["id", "title", "status"]
+            )
+            seen += len(page.items)
+            if not page.next_cursor:
+                return seen
+            cursor = page.next_cursor
+
+    yield Case("list_todos.all", with_session(lambda s: todo_service.list_todos(s)), rows)
+    yield Case(
+        "list_todos.filtered",
+        with_session(
+            lambda s: todo_service.list_todos(s, status_filter="pending", priority_filter="high")
+        ),
+        rows,
+    )
+    yield Case(
+        "list_todos_page.first_page",
+        with_session(lambda s: [todo_service.list_todos_page(s, limit=100) for _ in range(20)]),
+        20,
+    )
+    yield Case("list_todos_page.walk", with_session(walk_pages), rows)
+    yield Case("get_tree", with_session(todo_service.get_tree), rows)
+    yield Case(
+        "get_subtree.wide",
+        with_session(lambda s: todo_service.get_subtree(wide["root_id"], s)),
+        wide["size"],
+    )
+    yield Case(
+        "get_subtree.deep",
+        with_session(lambda s: todo_service.get_subtree(deep["root_id"], s)),
+        deep["size"],
+    )
+    yield Case(
+        "get_ancestors.deep",
+        with_session(lambda s: todo_service.get_ancestors(deep["leaf_id"], s)),
+        deep["size"],
+    )
+
+    write_engine = _create_engine(f"sqlite:///{tmp / 'write.db'}", profile="production")
+    SQLModel.metadata.create_all(write_engine)
+
+    def empty_table() -> None:
+        with Session(write_engine) as session:
+            session.exec(delete(models.TodoItem))  # type: ignore[call-overload]
+            session.commit()
+
+    for shape, branching in (("wide", 8), ("deep", 1)):
+        nodes = datagen.generated_tree(sizes["save"], branching)
+
+        def save(nodes=nodes) -> None:
+            with Session(write_engine) as session:
+                todo_service.save_generated_tree(nodes, session)
+
+        yield Case(f"save_generated_tree.{shape}", save, sizes["save"], setup=empty_table)
+
+
+def _chroma_cases(sizes: dict[str, int]) -> Iterator[Case]:
+    embedder = datagen.HashEmbedder()
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection("bench_suite_memory", embedding_function=embedder)
+    ids, documents, metadatas = datagen.memory_documents(sizes["corpus"])
+    step = client.get_max_batch_size()
+    for start in range(0, len(ids), step):
+        stop = start + step
+        collection.add(
+            ids=ids[start:stop],
+            documents=documents[start:stop],
+            metadatas=metadatas[start:stop],  # type: ignore[arg-type]
+            embeddings=embedder.encode(documents[start:stop]),
+        )
+    pairs = zip(datagen.VERBS * 10, datagen.OBJECTS * 10)
+    queries = [f"{verb} {obj}" for verb, obj in pairs][: sizes["queries"]]
+
+    def search() -> None:
+        chroma_service._collection = collection
+        for query in queries:
+            chroma_service.search_memory(query, limit=5)
+
+    yield Case("chroma.search_memory", search, len(queries))
+
+    index_collection = client.get_or_create_collection(
+        "bench_suite_index", embedding_function=embedder
+    )
+    todos = [
+        models.TodoItem(
+            id=idx + 1,
+            title=todo.title,
+            reason=todo.reason,
+            priority=todo.priority,
+            status=todo.status,
+        )
+        for idx, todo in enumerate(datagen.flat_todos(sizes["index"]))
+    ]
+
+    def reset_index() -> None:
+        # cold embedding cache: every document goes through the (stub) model.
+        chroma_service._collection = index_collection
+        chroma_service._embedding_cache = EmbeddingCache(
+            "bench-suite", max_entries=len(todos) * 2
+        )
+
+    yield Case(
+        "chroma.index_many",
+        lambda: chroma_service.index_many(todos),
+        len(todos),
+        setup=reset_index,
+    )
+
+
+def _rate_limit_cases(tmp: Path, sizes: dict[str, int]) -> Iterator[Case]:
+    calls = sizes["calls"] * 10
+    keys = [f"10.0.{idx >> 8 & 255}.{idx & 255}" for idx in range(1_000)]
+    memory = MemoryRateLimiter(calls, 3600, max_keys=10_000)
+    sqlite = SQLiteRateLimiter(calls, 3600, path=str(tmp / "limits.sqlite"))
+
+    def drive(limiter) -> Callable[[], None]:
+        def run() -> None:
+            for idx in range(calls):
+                limiter.hit(keys[idx % len(keys)])
+
+        return run
+
+    yield Case("rate_limiter.memory", drive(memory), calls)
+    yield Case("rate_limiter.sqlite", drive(sqlite), calls)
+
+
+def _ai_cases(loop: asyncio.AbstractEventLoop, sizes: dict[str, int]) -> Iterator[Case]:
+    prompts = [
+        f"Plan my {obj} for week {idx}" for idx, obj in enumerate(datagen.OBJECTS * 10)
+    ][: sizes["queries"]]
+
+    def generate(use_cache: bool) -> Callable[[], None]:
+        async def run() -> None:
+            for prompt in prompts:
+                await ai_service.generate_structured_todos_async(prompt, use_cache=use_cache)
+
+        return lambda: loop.run_until_complete(run())
+
+    yield Case("ai.generate_mock", generate(False), len(prompts))
+    yield Case("ai.generate_cached", generate(True), len(prompts))
+
+
+def _agent_cases(loop: asyncio.AbstractEventLoop, sizes: dict[str, int]) -> Iterator[Case]:
+    def upstream(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        return httpx.Response(200, json={"output": f"echo: {payload['input']}"})
+
+    router = AgentRouter()
+    # every provider answers from an in-process transport: real client, breaker and routing
+    # code, no sockets.
+    for name in list(router.providers):
+        router.providers[name] = HTTPAgentProvider(
+            name=name,
+            base_url=f"http://{name}.stub/run",
+            api_key=None,
+            transport=httpx.MockTransport(upstream),
+        )
+    calls = sizes["calls"]
+
+    async def single() -> None:
+        for idx in range(calls):
+            await router.run("fetchai", None, f"prompt {idx}", None)
+
+    async def race() -> None:
+        for idx in range(calls // 4):
+            await router.run_many(["fetchai", "letta"], "race", None, f"prompt {idx}", None)
+
+    yield Case("agent.run", lambda: loop.run_until_complete(single()), calls)
+    yield Case("agent.run_many_race", lambda: loop.run_until_complete(race()), calls // 4)
+
+
+def _measure(case: Case, repeat: int, warmup: int) -> dict[str, Any]:
+    samples = []
+    for iteration in range(warmup + repeat):
+        if case.setup is not None:
+            case.setup()
+        started = time.perf_counter()
+        case.fn()
+        elapsed = time.perf_counter() - started
+        if iteration >= warmup:
+            samples.append(elapsed)
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    return {
+        "items": case.items,
+        "samples": samples,
+        "min": ordered[0],
+        "median": median,
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+        "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "items_per_second": case.items / median if median else None,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    # offline and quiet: mock AI, inline indexing into a no-op, no SQL echo.
+    settings.DEBUG = False
+    settings.INDEX_ASYNC = False
+    settings.MOCK_AI_RESPONSES_FILE = str(MOCK_FILE)
+    settings.AI_CACHE_PATH = None
+    settings.AI_SEMANTIC_CACHE_ENABLED = False
+    settings.AGENT_FALLBACK_ENABLED = False
+    embedder = datagen.HashEmbedder()
+    chroma_service._get_embedder = lambda: embedder  # type: ignore[assignment]
+    index_many = chroma_service.index_many
+    chroma_service.index_many = lambda *_args, **_kwargs: None  # type: ignore[assignment]
+
+    only = re.compile(args.only) if args.only else None
+    sizes = _sizes(args.scale)
+    results: dict[str, Any] = {}
+    loop = asyncio.new_event_loop()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        groups: list[Callable[[], Iterator[Case]]] = [
+            lambda: _db_cases(tmp, sizes),
+            lambda: _rate_limit_cases(tmp, sizes),
+            lambda: _ai_cases(loop, sizes),
+            lambda: _agent_cases(loop, sizes),
+        ]
+        for group in groups:
+            for case in group():
+                if only and not only.search(case.name):
+                    continue
+                results[case.name] = _measure(case, args.repeat, args.warmup)
+                _print_result(case.name, results[case.name])
+        # the chroma cases need the real index_many back.
+        chroma_service.index_many = index_many  # type: ignore[assignment]
+        for case in _chroma_cases(sizes):
+            if only and not only.search(case.name):
+                continue
+            results[case.name] = _measure(case, args.repeat, args.warmup)
+            _print_result(case.name, results[case.name])
+    loop.close()
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+
+
+def _print_result(name: str, result: dict[str, Any]) -> None:
+    rate = result["items_per_second"]
+    print(
+        f"  {name:<30} median {result['median'] * 1000:10.2f} ms  "
+        f"min {result['min'] * 1000:10.2f} ms  {rate:12.0f} items/s"
+    )
+
+
+def compare(
+    base: dict[str, Any], new: dict[str, Any], threshold: float, min_delta: float
+) -> list[dict[str, Any]]:
+    """Median-to-median comparison per case.
+
+    A case regresses when its median is more than ``threshold`` (a fraction) and at least
+    ``min_delta`` seconds slower, and even its fastest new sample is slower than the old
+    median; one noisy iteration on a busy machine is not enough to fail a run.
+    """
+    rows = []
+    base_results, new_results = base.get("results", {}), new.get("results", {})
+    for name in sorted(set(base_results) | set(new_results)):
+        before, after = base_results.get(name), new_results.get(name)
+        if before is None or after is None:
+            only = "only in new" if before is None else "only in base"
+            rows.append({"name": name, "status": only})
+            continue
+        change = after["median"] / before["median"] - 1 if before["median"] else 0.0
+        delta = after["median"] - before["median"]
+        if change > threshold and delta >= min_delta and after["min"] > before["median"]:
+            status = "regression"
+        elif change < -threshold and -delta >= min_delta and after["median"] < before["min"]:
+            status = "improvement"
+        else:
+            status = "ok"
+        if before.get("items") != after.get("items"):
+            # different data sizes (e.g. another --scale): the timings are not comparable.
+            status = "size-changed"
+        rows.append(
+            {
+                "name": name,
+                "status": status,
+                "base": before["median"],
+                "new": after["median"],
+                "change": change,
+            }
+        )
+    return rows
+
+
+def _print_comparison(rows: list[dict[str, Any]]) -> None:
+    print(f"  {'case':<30} {'base ms':>10} {'new ms':>10} {'change':>9}  status")
+    for row in rows:
+        if "base" not in row:
+            print(f"  {row['name']:<30} {'':>10} {'':>10} {'':>9}  {row['status']}")
+            continue
+        print(
+            f"  {row['name']:<30} {row['base'] * 1000:10.2f} {row['new'] * 1000:10.2f} "
+            f"{row['change'] * 100:+8.1f}%  {row['status']}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backend benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and write results as JSON")
+    run_parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="JSON file to write (default: stdout summary only)",
+    )
+    run_parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiply every data size (0.1 for a quick run)"
+    )
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--warmup", type=int, default=1)
+    run_parser.add_argument(
+        "--only", default=None, help="Regex on case names, e.g. 'get_tree|list_todos'"
+    )
+
+    compare_parser = commands.add_parser(
+        "compare", help="Compare two result files and flag regressions"
+    )
+    compare_parser.add_argument("base", type=Path)
+    compare_parser.add_argument("new", type=Path)
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.10, help="Allowed slowdown (0.10 = 10%%)"
+    )
+    compare_parser.add_argument(
+        "--min-delta-ms", type=float, default=0.5, help="Ignore slowdowns smaller than this"
+    )
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run(args)
+        if args.output is not None:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+            print(f"wrote {args.output}")
+        return
+
+    base = json.loads(args.base.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    for report in (base, new):
+        if report.get("schema") != SCHEMA_VERSION:
+            sys.exit(
+                f"unsupported result schema {report.get('schema')!r} (expected {SCHEMA_VERSION})"
+            )
+    print(f"base {base['meta'].get('git_revision')}  new {new['meta'].get('git_revision')}")
+    rows = compare(base, new, args.threshold, args.min_delta_ms / 1000)
+    _print_comparison(rows)
+    regressions = [row["name"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        sys.exit(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Seeded synthetic data for the benchmarks.
+
+Flat todo lists, deep and wide trees, and Chroma corpora.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from sqlmodel import Session
+
+from app import models, schemas
+from app.services import todo_service
+
+STATUSES = ("pending", "in-progress", "done")
+PRIORITIES = ("low", "medium", "high")
+VERBS = (
+    "Plan", "Review", "Draft", "Book", "Call", "Prepare",
+    "Clean", "Study", "Fix", "Email", "Buy", "Schedule",
+)
+OBJECTS = (
+    "finals week", "team offsite", "tax return", "garage", "grant proposal",
+    "flight to Denver", "dentist", "quarterly report", "birthday party", "thesis chapter",
+    "car service", "moving boxes", "lecture notes", "release notes", "budget sheet",
+    "gym routine", "client demo", "kitchen", "reading list", "job application",
+)
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _title(rng: random.Random, idx: int) -> str:
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} #{idx}"
+
+
+def flat_todos(count: int, seed: int = 0) -> list[models.TodoItem]:
+    """``count`` parentless todos with a realistic spread of status, priority and deadlines."""
+    rng = random.Random(seed)
+    todos = []
+    for idx in range(count):
+        # roughly a third of real todos have no deadline.
+        deadline = EPOCH + timedelta(hours=rng.randrange(24 * 365)) if rng.random() < 0.66 else None
+        todos.append(
+            models.TodoItem(
+                title=_title(rng, idx),
+                reason="Synthetic benchmark row",
+                priority=rng.choice(PRIORITIES),
+                status=rng.choice(STATUSES),
+                deadline=deadline,
+                updated_at=EPOCH + timedelta(seconds=idx),
+            )
+        )
+    return todos
+
+
+def generated_tree(total: int, branching: int, seed: int = 0) -> list[schemas.GeneratedTodoNode]:
+    """A single-root forest of ``total`` nodes; ``branching=1`` yields one deep chain."""
+    rng = random.Random(seed)
+    # building bottom-up so construction itself never recurses.
+    nodes = [
+        schemas.GeneratedTodoNode(
+            title=_title(rng, idx), reason="Synthetic", priority=rng.choice(PRIORITIES)
+        )
+        for idx in range(total)
+    ]
+    for idx in range(total - 1, 0, -1):
+        nodes[(idx - 1) // branching].subitems.insert(0, nodes[idx])
+    return [nodes[0]]
+
+
+def seed_database(
+    session: Session,
+    flat: int = 0,
+    trees: tuple[tuple[int, int], ...] = (),
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Insert ``flat`` loose todos plus one generated tree per ``(total, branching)`` pair.
+
+    Trees go through ``todo_service.save_generated_tree``, so they get real parent ids;
+    returns the root id of each tree for subtree and ancestor lookups.
+    """
+    if flat:
+        session.add_all(flat_todos(flat, seed=seed))
+        session.commit()
+    roots = []
+    for total, branching in trees:
+        created = todo_service.save_generated_tree(
+            generated_tree(total, branching, seed=seed), session
+        )
+        roots.append(
+            {
+                "root_id": created[0].id,
+                "leaf_id": created[-1].id,
+                "size": total,
+                "branching": branching,
+            }
+        )
+    return {"flat": flat, "trees": roots}
+
+
+def memory_documents(
+    count: int, seed: int = 0
+) -> tuple[list[str], list[str], list[dict[str, str]]]:
+    """Ids, documents and metadata shaped like ``chroma_service`` writes them."""
+    rng = random.Random(seed)
+    ids, documents, metadatas = [], [], []
+    for idx in range(count):
+        title = _title(rng, idx)
+        reason = f"Needed before the {rng.choice(OBJECTS)}"
+        ids.append(str(idx + 1))
+        documents.append(f"{title}\n{reason}")
+        metadatas.append(
+            {
+                "title": title,
+                "reason": reason,
+                "status": rng.choice(STATUSES),
+                "priority": rng.choice(PRIORITIES),
+            }
+        )
+    return ids, documents, metadatas
+
+
+class HashEmbedder(EmbeddingFunction[Documents]):
+    """Offline, deterministic stand-in for the sentence-transformers model.
+
+    Tokens are hashed into a fixed number of buckets and the counts normalised, so texts
+    that share words land close together and nearest-neighbour queries stay meaningful.
+    It doubles as a Chroma embedding function (``__call__``) and a ``SentenceTransformer``
+    (``encode``) so both paths in ``chroma_service`` can use it.
+    """
+
+    def __init__(self, dim: int = 384) -> None:
+        self.dim = dim
+
+    @staticmethod
+    def name() -> str:
+        return "bench-hash"
+
+    def get_config(self) -> dict[str, Any]:
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config: dict[str, Any]) -> "HashEmbedder":
+        return HashEmbedder(**config)
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _TOKEN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest()
+            vector[int.from_bytes(digest, "little") % self.dim] += 1.0
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def encode(self, texts: list[str], **_kwargs: Any) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), np.float32)
+        return np.stack([self._vector(text) for text in texts])
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [self._vector(text) for text in input]
@@ -0,0 +1,26 @@
+"""add composite indexes for todo filters"""
+
+revision = '3f2a9c1d7b40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+from alembic import op
+
+# (name, columns) pairs mirrored from TodoItem.__table_args__.
+_INDEXES = [
+    ("ix_todo_items_status_priority_updated_at", ["status", "priority", "updated_at", "id"]),
+    ("ix_todo_items_status_updated_at", ["status", "updated_at", "id"]),
+    ("ix_todo_items_priority_updated_at", ["priority", "updated_at", "id"]),
+    ("ix_todo_items_deadline", ["deadline", "id"]),
+    ("ix_todo_items_updated_at", ["updated_at", "id"]),
+]
+
+def upgrade() -> None:
+    # init_db() creates these for fresh databases, so stay idempotent.
+    for name, columns in _INDEXES:
+        op.create_index(name, "todo_items", columns, if_not_exists=True)
+
+def downgrade() -> None:
+    for name, _columns in reversed(_INDEXES):
+        op.drop_index(name, table_name="todo_items", if_exists=True)
@@ -0,0 +1,26 @@
+"""add a lease to ai_jobs so only jobs of dead workers are recovered"""
+
+revision = '5d1e7c3a2f86'
+down_revision = '8c4e1b2a9d53'
+branch_labels = None
+depends_on = None
+
+import sqlalchemy as sa
+from alembic import op
+
+
+def _columns() -> set[str]:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns("ai_jobs")}
+
+
+def upgrade() -> None:
+    # init_db() creates the column for fresh databases, so stay idempotent.
+    if "lease_expires_at" not in _columns():
+        with op.batch_alter_table("ai_jobs") as batch:
+            batch.add_column(sa.Column("lease_expires_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    if "lease_expires_at" in _columns():
+        with op.batch_alter_table("ai_jobs") as batch:
+            batch.drop_column("lease_expires_at")
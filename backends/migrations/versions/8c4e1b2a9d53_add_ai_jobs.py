@@ -0,0 +1,40 @@
+"""add ai_jobs table for background generation"""
+
+revision = '8c4e1b2a9d53'
+down_revision = '3f2a9c1d7b40'
+branch_labels = None
+depends_on = None
+
+import sqlalchemy as sa
+from alembic import op
+
+
+def upgrade() -> None:
+    # init_db() creates this table for fresh databases, so stay idempotent.
+    op.create_table(
+        "ai_jobs",
+        sa.Column("id", sa.String(length=32), primary_key=True),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("user_input", sa.String(), nullable=False),
+        sa.Column("save", sa.Boolean(), nullable=False),
+        sa.Column("use_cache", sa.Boolean(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("result", sa.String(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("error_status", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_ai_jobs_status_created_at", "ai_jobs", ["status", "created_at"], if_not_exists=True
+    )
+    op.create_index("ix_ai_jobs_expires_at", "ai_jobs", ["expires_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ai_jobs_expires_at", table_name="ai_jobs", if_exists=True)
+    op.drop_index("ix_ai_jobs_status_created_at", table_name="ai_jobs", if_exists=True)
+    op.drop_table("ai_jobs", if_exists=True)
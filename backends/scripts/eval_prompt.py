@@ -16,6 +16,13 @@ from app import schemas
 from app.services import ai_service
 
 
+def load_prompts(path: Path) -> list:
+    prompts = json.loads(path.read_text())
+    if not isinstance(prompts, list):
+        raise ValueError("Prompts file must be a JSON list of strings")
+    return prompts
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Evaluate prompts through the AI service")
     parser.add_argument("prompts", type=Path, help="Path to a JSON array of prompt strings")
@@ -27,9 +34,7 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    prompts = json.loads(args.prompts.read_text())
-    if not isinstance(prompts, list):
-        raise ValueError("Prompts file must be a JSON list of strings")
+    prompts = load_prompts(args.prompts)
 
     aggregated: list[dict] = []
     for prompt in prompts:
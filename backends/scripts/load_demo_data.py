@@ -17,6 +17,7 @@ from sqlmodel import delete
 from app import models, schemas
 from app.database import session_scope, init_db
 from app.services import todo_service
+from app.services.index_queue import index_queue
 
 
 def load_payload(path: Path) -> list[schemas.GeneratedTodoNode]:
@@ -44,6 +45,8 @@ def main() -> None:
             session.exec(delete(models.TodoItem))
             session.commit()
         todo_service.save_generated_tree(nodes, session)
+    # waiting for the background indexer before the process exits.
+    index_queue.flush()
     print(f"Inserted {len(nodes)} root tasks from {args.payload}")
 
 
@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from typing import Optional
 
 from fastapi import FastAPI
 import uvicorn
@@ -38,7 +39,7 @@ def mock_tree():
 
 
 @app.get("/todos")
-def mock_todos():
+def mock_todos(limit: Optional[int] = None, cursor: Optional[str] = None):
     tree = _load("todo_tree_sample.json")
     flat = []
     stack = tree["todos"]
@@ -46,7 +47,9 @@ def mock_todos():
         node = stack.pop(0)
         flat.append({k: v for k, v in node.items() if k != "children"})
         stack.extend(node.get("children", []))
-    return flat
+    if limit is None and cursor is None:
+        return flat
+    return {"items": flat[: limit or 100], "next_cursor": None}
 
 
 @app.post("/memory/search")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Pick AI_SEMANTIC_CACHE_THRESHOLD from labelled paraphrases or eval_prompt results."""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import numpy as np
+
+from app.services import chroma_service
+from app.services.response_cache import normalize_prompt
+from scripts.eval_prompt import load_prompts
+
+
+def _groups_from_prompts(path: Path) -> list[list[str]]:
+    """Each item is a prompt or a list of paraphrases that should share one cached plan."""
+    groups: list[list[str]] = []
+    for item in load_prompts(path):
+        group = [item] if isinstance(item, str) else item
+        if not group or not all(isinstance(prompt, str) for prompt in group):
+            raise ValueError("Each item must be a prompt string or a list of prompt strings")
+        groups.append(group)
+    return groups
+
+
+def _titles(todos: list[dict]) -> set[str]:
+    titles: set[str] = set()
+    stack = list(todos)
+    while stack:
+        node = stack.pop()
+        titles.add(normalize_prompt(node.get("title", "")))
+        stack.extend(node.get("subitems", []))
+    return titles
+
+
+def _groups_from_eval(path: Path, min_overlap: float) -> list[list[str]]:
+    """Treat prompts whose generated plans share enough titles (Jaccard) as paraphrases."""
+    results = json.loads(path.read_text())
+    prompts = [item["prompt"] for item in results]
+    titles = [_titles(item["todos"]["todos"]) for item in results]
+    parent = list(range(len(prompts)))
+
+    def _find(idx: int) -> int:
+        while parent[idx] != idx:
+            parent[idx] = parent[parent[idx]]
+            idx = parent[idx]
+        return idx
+
+    for left, right in itertools.combinations(range(len(prompts)), 2):
+        union = titles[left] | titles[right]
+        if union and len(titles[left] & titles[right]) / len(union) >= min_overlap:
+            parent[_find(left)] = _find(right)
+    grouped: dict[int, list[str]] = {}
+    for idx, prompt in enumerate(prompts):
+        grouped.setdefault(_find(idx), []).append(prompt)
+    return list(grouped.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Tune the semantic prompt cache distance threshold"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--prompts", type=Path, help="JSON list of prompts or lists of paraphrases")
+    source.add_argument("--eval-results", type=Path, help="Output of scripts/eval_prompt.py")
+    parser.add_argument(
+        "--plan-overlap",
+        type=float,
+        default=0.5,
+        help="Title Jaccard that makes two eval plans equivalent",
+    )
+    parser.add_argument(
+        "--thresholds",
+        type=float,
+        nargs="+",
+        default=[round(0.02 * step, 2) for step in range(1, 21)],
+    )
+    parser.add_argument("--max-false-hit-rate", type=float, default=0.0)
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    if args.prompts:
+        groups = _groups_from_prompts(args.prompts)
+    else:
+        groups = _groups_from_eval(args.eval_results, args.plan_overlap)
+    prompts = [prompt for group in groups for prompt in group]
+    labels = [idx for idx, group in enumerate(groups) for _ in group]
+    if len(prompts) < 2:
+        raise ValueError("Need at least two prompts to compare")
+
+    # same normalization and embedder the cache itself uses.
+    vectors = np.asarray(
+        chroma_service.embed_texts([normalize_prompt(prompt) for prompt in prompts]), dtype=float
+    )
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    distances = 1.0 - vectors @ vectors.T
+
+    same: list[float] = []
+    different: list[float] = []
+    for left, right in itertools.combinations(range(len(prompts)), 2):
+        (same if labels[left] == labels[right] else different).append(float(distances[left, right]))
+    if not same:
+        print("No paraphrase pairs given; only false hits can be measured.")
+
+    rows = []
+    print(f"{'threshold':>9}  {'hit_rate':>8}  {'false_hits':>10}")
+    for threshold in sorted(args.thresholds):
+        hit_rate = sum(d <= threshold for d in same) / len(same) if same else 0.0
+        false_rate = sum(d <= threshold for d in different) / len(different) if different else 0.0
+        rows.append({"threshold": threshold, "hit_rate": hit_rate, "false_hit_rate": false_rate})
+        print(f"{threshold:9.3f}  {hit_rate:8.2%}  {false_rate:10.2%}")
+
+    safe = [row for row in rows if row["false_hit_rate"] <= args.max_false_hit_rate]
+    best = max(safe, key=lambda row: (row["hit_rate"], row["threshold"])) if safe else None
+    if best:
+        print(f"Suggested AI_SEMANTIC_CACHE_THRESHOLD={best['threshold']}")
+    else:
+        print("No threshold meets the false-hit budget; tighten the candidates.")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        report = {
+            "pairs": {"same": same, "different": different},
+            "thresholds": rows,
+            "suggested": best,
+        }
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Saved report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
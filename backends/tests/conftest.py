@@ -1,27 +1,51 @@
 from __future__ import annotations
 
+import asyncio
 import sys
 from pathlib import Path
 
 import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel, Session, create_engine
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
-from app import models
+# importing the models registers their tables on SQLModel.metadata for the engine fixtures.
+from app import models  # noqa: F401
+from app.config import settings
 from app.services import chroma_service
 
 
 @pytest.fixture()
-def session(monkeypatch: pytest.MonkeyPatch) -> Session:
-    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
-    SQLModel.metadata.create_all(engine)
-
+def no_vector_db(monkeypatch: pytest.MonkeyPatch) -> None:
     # Avoid hitting the real vector DB in unit tests
+    monkeypatch.setattr(settings, "INDEX_ASYNC", False)
     monkeypatch.setattr(chroma_service, "index_todo", lambda *args, **kwargs: None)
+    monkeypatch.setattr(chroma_service, "index_many", lambda *args, **kwargs: None)
     monkeypatch.setattr(chroma_service, "delete_todo", lambda *args, **kwargs: None)
 
+
+@pytest.fixture()
+def session(no_vector_db) -> Session:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+
     with Session(engine) as session_obj:
         yield session_obj
+
+
+@pytest.fixture()
+def async_engine(no_vector_db, tmp_path):
+    # NullPool: each asyncio.run() in a test gets its own loop, so connections cannot be shared.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}", poolclass=NullPool)
+
+    async def _create_all() -> None:
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+
+    asyncio.run(_create_all())
+    yield engine
+    asyncio.run(engine.dispose())
@@ -2,8 +2,15 @@ from __future__ import annotations
 
 import pytest
 
-from app.services.agent_router import agent_router
+import httpx
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services import ai_service
+from app.services.agent_router import AgentRouter, FallbackExecutor, HTTPAgentProvider, agent_router
 import asyncio
+import threading
+import time
 
 
 def test_agent_router_fallback(monkeypatch):
@@ -11,3 +18,171 @@ def test_agent_router_fallback(monkeypatch):
     result = asyncio.run(agent_router.run("fetchai", model=None, user_input="Test fallback", metadata=None))
     assert result.used_fallback is True
     assert "Test" in result.output
+
+
+def test_provider_reuses_pooled_client():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"output": "pong"})
+
+    provider = HTTPAgentProvider(
+        name="stub",
+        base_url="http://stub.local/run",
+        api_key="key",
+        transport=httpx.MockTransport(handler),
+    )
+
+    async def scenario():
+        await provider.open()
+        client = provider.client
+        first = await provider.run(None, "ping", None)
+        second = await provider.run("model-x", "ping", {"k": "v"})
+        assert provider.client is client
+        await provider.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.output == "pong"
+    assert second.model == "model-x"
+    assert len(calls) == 2
+    assert calls[0].headers["Authorization"] == "Bearer key"
+    assert provider._client is None
+
+
+def _stub_router(delays: dict[str, float], failing: tuple[str, ...] = ()) -> AgentRouter:
+    router = AgentRouter()
+    for name, delay in delays.items():
+
+        async def handler(request: httpx.Request, name=name, delay=delay) -> httpx.Response:
+            await asyncio.sleep(delay)
+            if name in failing:
+                return httpx.Response(503, json={"error": "down"})
+            return httpx.Response(200, json={"output": f"from {name}"})
+
+        router.providers[name] = HTTPAgentProvider(
+            name=name,
+            base_url=f"http://{name}.local/run",
+            api_key=None,
+            transport=httpx.MockTransport(handler),
+        )
+    return router
+
+
+def test_race_returns_fastest_and_cancels_the_rest():
+    router = _stub_router({"fetchai": 0.5, "letta": 0.01})
+    result = asyncio.run(router.run_many(["fetchai", "letta"], "race", None, "hi", None))
+    assert result.provider == "letta"
+    outcomes = {attempt["provider"]: attempt["outcome"] for attempt in result.attempts}
+    assert outcomes == {"letta": "won", "fetchai": "cancelled"}
+    assert router.status()["letta"]["wins"] == 1
+    # the cancelled attempt neither succeeded nor failed as far as the breaker is concerned.
+    assert router.status()["fetchai"]["window_calls"] == 0
+
+
+def test_hedge_fires_after_delay_when_primary_is_slow():
+    router = _stub_router({"fetchai": 1.0, "letta": 0.01})
+    result = asyncio.run(
+        router.run_many(["fetchai", "letta"], "hedge", None, "hi", None, hedge_delay=0.05)
+    )
+    assert result.provider == "letta"
+    letta = next(attempt for attempt in result.attempts if attempt["provider"] == "letta")
+    assert letta["started_ms"] >= 50
+    assert router.multi_status()["hedges_fired"] == 1
+
+
+def test_hedge_moves_on_immediately_when_primary_fails(monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_FALLBACK_ENABLED", False)
+    router = _stub_router({"fetchai": 0.0, "letta": 0.0}, failing=("fetchai",))
+    result = asyncio.run(
+        router.run_many(["fetchai", "letta"], "hedge", None, "hi", None, hedge_delay=10)
+    )
+    assert result.provider == "letta"
+    assert [attempt["outcome"] for attempt in result.attempts] == ["error", "won"]
+    assert router.multi_status()["hedges_fired"] == 0
+
+
+def test_hedge_delay_tracks_primary_p95():
+    router = _stub_router({"fetchai": 0.0})
+    assert router.hedge_delay("fetchai") == settings.AGENT_HEDGE_DEFAULT_DELAY_MS / 1000
+    for _ in range(10):
+        router.breakers["fetchai"].record_success(0.8)
+    assert router.hedge_delay("fetchai") == pytest.approx(0.8)
+
+
+def test_fallback_does_not_block_other_requests(monkeypatch):
+    def slow_planner(_user_input):
+        time.sleep(0.5)  # the sync client + tenacity backoff
+        return []
+
+    monkeypatch.setattr(ai_service, "generate_structured_todos", slow_planner)
+    router = _stub_router({"letta": 0.0})
+    router.providers["fetchai"].base_url = None
+
+    async def scenario():
+        finished: dict[str, float] = {}
+        started = time.perf_counter()
+
+        async def fallback_call():
+            result = await router.run("fetchai", None, "hi", None)
+            finished["fallback"] = time.perf_counter() - started
+            return result
+
+        async def fast_calls():
+            for _ in range(20):
+                await router.run("letta", None, "hi", None)
+            finished["fast"] = time.perf_counter() - started
+
+        fallback_result, _ = await asyncio.gather(fallback_call(), fast_calls())
+        return fallback_result, finished
+
+    result, finished = asyncio.run(scenario())
+    router.fallback.shutdown()
+    assert result.used_fallback is True
+    assert finished["fast"] < 0.4 < finished["fallback"]
+    assert router.fallback.stats()["completed"] == 1
+
+
+def test_fallback_limits_and_timeout(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(
+        ai_service, "generate_structured_todos", lambda _input: release.wait(5) and []
+    )
+    executor = FallbackExecutor(max_workers=1, max_pending=1, timeout=0.1)
+
+    async def scenario():
+        first = asyncio.create_task(executor.run("a"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as saturated:
+            await executor.run("b")
+        with pytest.raises(HTTPException) as timed_out:
+            await first
+        return saturated.value.status_code, timed_out.value.status_code
+
+    assert asyncio.run(scenario()) == (503, 504)
+    release.set()
+    executor.shutdown()
+    stats = executor.stats()
+    assert stats["rejected"] == 1 and stats["timed_out"] == 1
+
+
+def test_fallback_cancelled_while_queued_is_not_completed(monkeypatch):
+    monkeypatch.setattr(ai_service, "generate_structured_todos", lambda _input: [])
+    executor = FallbackExecutor(max_workers=1, max_pending=2, timeout=0.1)
+    release = threading.Event()
+    # something else holds the only worker, so the next fallback times out still queued.
+    blocker = executor._get_executor().submit(release.wait, 5)
+
+    async def scenario():
+        with pytest.raises(HTTPException) as timed_out:
+            await executor.run("queued")
+        release.set()
+        await asyncio.wrap_future(blocker)
+        return timed_out.value.status_code, await executor.run("served")
+
+    status_code, served = asyncio.run(scenario())
+    executor.shutdown()
+    assert status_code == 504 and served.used_fallback is True
+    stats = executor.stats()
+    assert (stats["completed"], stats["cancelled"], stats["pending"]) == (1, 1, 0)
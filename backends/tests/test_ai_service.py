@@ -1,8 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 
-from app.services import ai_service
+import chromadb
+import pytest
+from fastapi import HTTPException
+from tenacity import wait_none
+
+from app.services import ai_service, response_cache
+from app.services.response_cache import ResponseCache, cache_key
+from app.services.semantic_cache import SemanticCache
+from app.services.single_flight import SingleFlight
 
 
 def test_mock_ai_generation(tmp_path, monkeypatch):
@@ -15,3 +30,332 @@ def test_mock_ai_generation(tmp_path, monkeypatch):
     todos = ai_service.generate_structured_todos("ignored")
     assert len(todos) == 1
     assert todos[0].title == "Sample"
+
+
+class _FakeCompletions:
+    def __init__(self, fail: bool = False, delay: float = 0.0) -> None:
+        self.fail = fail
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, **_kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("upstream down")
+            content = json.dumps({"todos": [{"title": "Async"}]})
+            message = SimpleNamespace(content=content)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        finally:
+            self.in_flight -= 1
+
+
+def _use_fake_client(monkeypatch, completions: _FakeCompletions) -> None:
+    monkeypatch.setattr(ai_service.settings, "MOCK_AI_RESPONSES_FILE", None)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(ai_service, "_get_async_client", lambda: client)
+    monkeypatch.setattr(ai_service, "_RETRY_WAIT", wait_none())
+    monkeypatch.setattr(ai_service, "_semaphores", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(ai_service, "_response_cache", ResponseCache(max_entries=0, ttl_seconds=0))
+
+
+def test_async_generation_caps_in_flight_completions(monkeypatch):
+    completions = _FakeCompletions(delay=0.02)
+    _use_fake_client(monkeypatch, completions)
+    monkeypatch.setattr(ai_service.settings, "AI_MAX_CONCURRENCY", 2)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(ai_service.generate_structured_todos_async(f"goal {idx}") for idx in range(6))
+        )
+
+    results = asyncio.run(scenario())
+    assert [todos[0].title for todos in results] == ["Async"] * 6
+    assert completions.max_in_flight == 2
+
+
+def test_retry_budget_is_shared_across_requests(monkeypatch):
+    completions = _FakeCompletions(fail=True)
+    _use_fake_client(monkeypatch, completions)
+    budget = ai_service.RetryBudget(ratio=0.0, min_per_second=0.0, max_balance=2)
+    monkeypatch.setattr(ai_service, "_retry_budget", budget)
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(HTTPException) as excinfo:
+                await ai_service.generate_structured_todos_async("goal")
+            assert excinfo.value.status_code == 502
+
+    asyncio.run(scenario())
+    # 3 first attempts + only the 2 retries the budget could pay for (not 3 * 2).
+    assert completions.calls == 5
+    assert budget.stats()["exhausted"] >= 1
+
+
+def test_final_attempt_does_not_spend_the_retry_budget(monkeypatch):
+    completions = _FakeCompletions(fail=True)
+    _use_fake_client(monkeypatch, completions)
+    monkeypatch.setattr(ai_service.settings, "AI_MAX_ATTEMPTS", 3)
+    # more tokens than one request can use (AI_MAX_ATTEMPTS - 1 retries).
+    budget = ai_service.RetryBudget(ratio=0.0, min_per_second=0.0, max_balance=3)
+    monkeypatch.setattr(ai_service, "_retry_budget", budget)
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(HTTPException):
+                await ai_service.generate_structured_todos_async("goal")
+
+    asyncio.run(scenario())
+    # the first request retries twice and leaves a token for the second one's single retry.
+    assert completions.calls == 6
+    assert budget.stats()["retries"] == completions.calls - 3
+
+
+def test_response_cache_serves_repeats_and_honours_bypass(monkeypatch, tmp_path):
+    completions = _FakeCompletions()
+    _use_fake_client(monkeypatch, completions)
+    cache_path = tmp_path / "ai_cache.sqlite"
+    monkeypatch.setattr(ai_service, "_response_cache", ResponseCache(8, 3600, path=str(cache_path)))
+
+    async def scenario():
+        await ai_service.generate_structured_todos_async("Plan my week")
+        await ai_service.generate_structured_todos_async("  plan   MY week ")
+        await ai_service.generate_structured_todos_async("plan my week", use_cache=False)
+
+    asyncio.run(scenario())
+    assert completions.calls == 2
+    stats = ai_service.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (1, 1, 1)
+
+    # a fresh process (new in-memory tier) still finds the plan on disk.
+    monkeypatch.setattr(ai_service, "_response_cache", ResponseCache(8, 3600, path=str(cache_path)))
+    todos = asyncio.run(ai_service.generate_structured_todos_async("plan my week"))
+    assert todos[0].title == "Async"
+    assert completions.calls == 2
+    assert ai_service.cache_stats()["disk_hits"] == 1
+
+
+def test_response_cache_key_tracks_model_and_system_prompt():
+    base = cache_key("Study for finals", "model-a", "prompt")
+    assert base == cache_key("study  for FINALS", "model-a", "prompt")
+    assert base != cache_key("Study for finals", "model-b", "prompt")
+    assert base != cache_key("Study for finals", "model-a", "prompt v2")
+
+
+def test_response_cache_ttl_and_lru(monkeypatch):
+    clock = [1_000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: clock[0])
+    cache = ResponseCache(max_entries=2, ttl_seconds=10)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    cache.get("a")
+    cache.put("c", [3])  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    clock[0] += 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["expired"] == 1
+
+
+def test_response_cache_disk_errors_are_misses(tmp_path):
+    # no memory tier, so every lookup reads the file.
+    cache = ResponseCache(max_entries=0, ttl_seconds=3600, path=str(tmp_path / "ai_cache.sqlite"))
+    cache.put("good", [{"title": "A"}])
+    cache.put("bad", [{"title": "B"}])
+    cache._db.execute("UPDATE responses SET payload = '{' WHERE key = 'bad'")
+    cache._db.commit()
+
+    assert cache.get("bad") is None
+    assert cache._db.execute("SELECT COUNT(*) FROM responses WHERE key = 'bad'").fetchone() == (0,)
+    assert cache.get("good") == [{"title": "A"}]
+
+    cache._db.close()
+    assert cache.get("good") is None
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["misses"]) == (1, 2)
+
+
+def test_file_backed_response_cache_stays_off_the_event_loop(monkeypatch, tmp_path):
+    completions = _FakeCompletions()
+    _use_fake_client(monkeypatch, completions)
+    cache = ResponseCache(8, 3600, path=str(tmp_path / "ai_cache.sqlite"))
+    monkeypatch.setattr(ai_service, "_response_cache", cache)
+    # another thread busy in the disk tier holds the cache lock for a while.
+    cache._lock.acquire()
+    threading.Timer(0.3, cache._lock.release).start()
+
+    async def scenario() -> float:
+        gaps: list[float] = []
+        loop = asyncio.get_running_loop()
+
+        async def ticker() -> None:
+            last = loop.time()
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+                gaps.append(loop.time() - last)
+                last = loop.time()
+
+        ticking = asyncio.create_task(ticker())
+        await asyncio.sleep(0.02)
+        await ai_service.generate_structured_todos_async("Plan my week")
+        await ticking
+        return max(gaps)
+
+    assert asyncio.run(scenario()) < 0.15
+    assert completions.calls == 1
+    assert ai_service.cache_stats()["misses"] == 1
+
+
+def test_semantic_cache_answers_paraphrases(monkeypatch):
+    completions = _FakeCompletions()
+    _use_fake_client(monkeypatch, completions)
+    vectors = {
+        "plan my week": [1.0, 0.0],
+        "help me plan this week": [0.99, 0.05],
+        "study for finals": [0.0, 1.0],
+    }
+    collection = chromadb.EphemeralClient().create_collection(
+        f"prompt_cache_{uuid.uuid4().hex}", metadata={"hnsw:space": "cosine"}
+    )
+    semantic = SemanticCache(
+        lambda: collection,
+        lambda texts: [vectors[text] for text in texts],
+        threshold=0.05,
+        max_entries=10,
+        ttl_seconds=60,
+        model=ai_service.settings.DEFAULT_MODEL,
+        system_prompt=ai_service._SYSTEM_PROMPT,
+    )
+    monkeypatch.setattr(ai_service.settings, "AI_SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(ai_service, "_semantic_cache", semantic)
+
+    async def scenario():
+        await ai_service.generate_structured_todos_async("Plan my week")
+        paraphrased = await ai_service.generate_structured_todos_async("Help me plan this week")
+        await ai_service.generate_structured_todos_async("Study for finals")
+        return paraphrased
+
+    paraphrased = asyncio.run(scenario())
+    assert paraphrased[0].title == "Async"
+    assert completions.calls == 2
+    stats = ai_service.semantic_cache_stats()
+    assert (stats["hits"], stats["stores"]) == (1, 2)
+
+
+def test_identical_concurrent_generations_share_one_call(monkeypatch):
+    completions = _FakeCompletions(delay=0.05)
+    _use_fake_client(monkeypatch, completions)
+    monkeypatch.setattr(ai_service, "_in_flight", SingleFlight())
+
+    async def scenario():
+        return await asyncio.gather(
+            *(
+                ai_service.generate_structured_todos_async(prompt)
+                for prompt in ["Plan my week", "plan  my WEEK"] * 3
+            ),
+            ai_service.generate_structured_todos_async("Study for finals"),
+        )
+
+    results = asyncio.run(scenario())
+    assert completions.calls == 2
+    # each caller gets its own copy of the shared plan.
+    assert results[0] == results[1] and results[0][0] is not results[1][0]
+    assert ai_service.single_flight_stats() == {"in_flight": 0, "executed": 2, "coalesced": 5}
+
+
+def test_single_flight_shares_results_and_errors_across_threads():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "plan"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flight.do, "key", work) for _ in range(4)]
+        while flight.stats()["coalesced"] < 3:
+            time.sleep(0.01)
+        release.set()
+        assert [future.result() for future in futures] == ["plan"] * 4
+    assert len(calls) == 1
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        flight.do("key", boom)
+    assert flight.stats()["in_flight"] == 0
+
+
+def _plan(title: str, **extra) -> dict:
+    return {"todos": [{"title": title, "subitems": [{"title": f"{title} step"}]}], **extra}
+
+
+def test_mock_file_is_parsed_once_and_reloaded_on_change(tmp_path, monkeypatch):
+    mock_file = tmp_path / "mock.json"
+    mock_file.write_text(json.dumps(_plan("First")))
+    monkeypatch.setattr(ai_service.settings, "MOCK_AI_RESPONSES_FILE", str(mock_file))
+    monkeypatch.setattr(ai_service, "_mock_responses", None)
+
+    first = ai_service.generate_structured_todos("a")
+    first[0].title = "edited by caller"
+    again = ai_service.generate_structured_todos("b")
+    assert again[0].title == "First"
+    assert ai_service.mock_stats()["loads"] == 1
+
+    mock_file.write_text(json.dumps(_plan("Second, longer")))
+    assert ai_service.generate_structured_todos("c")[0].title == "Second, longer"
+    assert ai_service.mock_stats()["loads"] == 2
+
+    # a half-written file keeps serving the last good responses.
+    mock_file.write_text('{"todos": [')
+    assert ai_service.generate_structured_todos("d")[0].title == "Second, longer"
+    assert ai_service.mock_stats() == {
+        "path": str(mock_file),
+        "responses": 1,
+        "keyword_responses": 0,
+        "loads": 2,
+        "served": 4,
+    }
+
+
+def test_mock_responses_rotate_and_match_keywords(tmp_path, monkeypatch):
+    mock_file = tmp_path / "mock.json"
+    mock_file.write_text(
+        json.dumps(
+            {
+                "responses": [
+                    _plan("Small"),
+                    _plan("Large"),
+                    _plan("Exam prep", keywords=["Exam", "midterm"]),
+                ]
+            }
+        )
+    )
+    monkeypatch.setattr(ai_service.settings, "MOCK_AI_RESPONSES_FILE", str(mock_file))
+    monkeypatch.setattr(ai_service, "_mock_responses", None)
+
+    titles = [ai_service.generate_structured_todos(f"goal {idx}")[0].title for idx in range(4)]
+    assert titles == ["Small", "Large", "Small", "Large"]
+    assert ai_service.generate_structured_todos("Study for my  MIDTERM")[0].title == "Exam prep"
+    assert ai_service.mock_stats()["keyword_responses"] == 1
+
+
+def test_missing_mock_file_falls_through(tmp_path, monkeypatch):
+    completions = _FakeCompletions()
+    _use_fake_client(monkeypatch, completions)
+    monkeypatch.setattr(
+        ai_service.settings, "MOCK_AI_RESPONSES_FILE", str(tmp_path / "absent.json")
+    )
+    monkeypatch.setattr(ai_service, "_mock_responses", None)
+
+    todos = asyncio.run(ai_service.generate_structured_todos_async("goal"))
+    assert todos[0].title == "Async"
+    assert completions.calls == 1
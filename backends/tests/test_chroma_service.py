@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import sqlite3
+
 from app import models
 from app.services import chroma_service
+from app.services.embedding_cache import EmbeddingCache
 
 
 class DummyVector(list):
@@ -10,8 +13,12 @@ class DummyVector(list):
 
 
 class DummyEmbedder:
+    def __init__(self) -> None:
+        self.calls = []
+
     def encode(self, docs, **_kwargs):
-        return [DummyVector([0.0 for _ in docs])]
+        self.calls.append(list(docs))
+        return [DummyVector([0.0, 1.0]) for _ in docs]
 
 
 class DummyCollection:
@@ -35,6 +42,7 @@ class DummyCollection:
 
 def test_index_and_search(monkeypatch):
     dummy_collection = DummyCollection()
+    monkeypatch.setattr(chroma_service, "_embedding_cache", EmbeddingCache("dummy", max_entries=8))
     monkeypatch.setattr(chroma_service, "_get_collection", lambda: dummy_collection)
     monkeypatch.setattr(chroma_service, "_get_embedder", lambda: DummyEmbedder())
 
@@ -45,3 +53,74 @@ def test_index_and_search(monkeypatch):
     results = chroma_service.search_memory("study")
     assert results[0]["id"] == 1
     assert results[0]["title"] == "Match"
+
+
+def test_index_many_batches(monkeypatch):
+    dummy_collection = DummyCollection()
+    embedder = DummyEmbedder()
+    monkeypatch.setattr(chroma_service, "_get_collection", lambda: dummy_collection)
+    monkeypatch.setattr(chroma_service, "_get_embedder", lambda: embedder)
+    monkeypatch.setattr(chroma_service, "_embedding_cache", EmbeddingCache("dummy", max_entries=8))
+
+    todos = [models.TodoItem(id=idx, title=f"Task {idx}") for idx in range(1, 6)]
+    todos.append(models.TodoItem(title="Unsaved"))
+    chroma_service.index_many(todos, batch_size=2)
+
+    assert len(embedder.calls) == 1
+    assert len(embedder.calls[0]) == 5
+    assert [len(upsert["ids"]) for upsert in dummy_collection.upserts] == [2, 2, 1]
+    assert dummy_collection.upserts[-1]["ids"] == ["5"]
+
+
+def test_unchanged_document_reuses_cached_vector(monkeypatch):
+    dummy_collection = DummyCollection()
+    embedder = DummyEmbedder()
+    monkeypatch.setattr(chroma_service, "_get_collection", lambda: dummy_collection)
+    monkeypatch.setattr(chroma_service, "_get_embedder", lambda: embedder)
+    monkeypatch.setattr(chroma_service, "_embedding_cache", EmbeddingCache("dummy", max_entries=8))
+
+    todo = models.TodoItem(id=1, title="Study", priority="high", status="pending")
+    chroma_service.index_todo(todo)
+    todo.status = "done"
+    chroma_service.index_todo(todo)
+
+    assert len(embedder.calls) == 1
+    assert dummy_collection.upserts[-1]["metadatas"][0]["status"] == "done"
+    assert dummy_collection.upserts[-1]["embeddings"] == [[0.0, 1.0]]
+    stats = chroma_service.embedding_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_embedding_cache_eviction_and_disk(tmp_path):
+    path = tmp_path / "embeddings.db"
+    cache = EmbeddingCache("dummy", max_entries=2, path=str(path))
+    for name in ("a", "b", "c"):
+        cache.put(cache.key(name), [1.0, 2.0])
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+    reloaded = EmbeddingCache("dummy", max_entries=2, path=str(path))
+    assert reloaded.get(reloaded.key("a")) == [1.0, 2.0]
+    assert reloaded.get(reloaded.key("missing")) is None
+    assert reloaded.stats()["disk_hits"] == 1
+    assert reloaded.stats()["misses"] == 1
+
+
+def test_embedding_cache_batches_disk_access_times(tmp_path):
+    path = tmp_path / "embeddings.db"
+    writer = EmbeddingCache("dummy", max_entries=2, path=str(path))
+    for name in ("a", "b"):
+        writer.put(writer.key(name), [1.0, 2.0])
+
+    # no memory tier, so every lookup is a disk hit.
+    reader = EmbeddingCache("dummy", max_entries=0, path=str(path))
+    changes = reader._db.total_changes
+    for _ in range(5):
+        assert reader.get(reader.key("a")) == [1.0, 2.0]
+    assert reader._db.total_changes == changes
+    assert reader.stats()["disk_hits"] == 5
+
+    reader.flush()
+    rows = dict(sqlite3.connect(path).execute("SELECT key, last_used FROM embeddings"))
+    assert rows[reader.key("a")] > rows[reader.key("b")]
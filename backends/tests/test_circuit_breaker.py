@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services.agent_router import AgentRouter, HTTPAgentProvider
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock: FakeClock, **overrides) -> CircuitBreaker:
+    params = {
+        "window_seconds": 60,
+        "min_calls": 4,
+        "failure_rate": 0.5,
+        "slow_call_seconds": 5,
+        "slow_call_rate": 0.8,
+        "open_seconds": 30,
+        "half_open_calls": 1,
+    }
+    params.update(overrides)
+    return CircuitBreaker("stub", clock=clock, **params)
+
+
+def test_breaker_opens_on_error_rate_and_recovers_through_half_open():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED  # below min_calls
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == pytest.approx(30)
+
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one probe at a time
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["window_calls"] == 0
+
+
+def test_half_open_failure_reopens():
+    clock = FakeClock()
+    breaker = _breaker(clock, min_calls=1)
+    breaker.record_failure(0.1)
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["times_opened"] == 2
+
+
+def test_outcomes_of_calls_admitted_before_a_transition_are_ignored():
+    clock = FakeClock()
+    breaker = _breaker(clock, min_calls=1, half_open_calls=1)
+    slow_success = breaker.before_call()
+    slow_failure = breaker.before_call()
+    breaker.record_failure(0.1, ticket=breaker.before_call())
+    assert breaker.state == OPEN
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    probe = breaker.before_call()
+
+    # calls admitted while closed finish now: neither is the probe.
+    breaker.record_success(0.1, ticket=slow_success)
+    assert breaker.state == HALF_OPEN
+    breaker.record_failure(0.1, ticket=slow_failure)
+    assert breaker.state == HALF_OPEN
+    breaker.release(ticket=slow_success)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # the probe slot is still taken
+
+    breaker.record_success(0.1, ticket=probe)
+    assert breaker.state == CLOSED
+    snapshot = breaker.snapshot()
+    assert snapshot["window_calls"] == 0
+    assert (snapshot["successes"], snapshot["failures"]) == (2, 2)
+
+
+def test_slow_calls_trip_and_old_samples_expire():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(3):
+        breaker.record_success(6.0)
+    clock.now += 61
+    breaker.record_success(6.0)
+    assert breaker.state == CLOSED  # the earlier slow calls left the window
+    for _ in range(3):
+        breaker.record_success(6.0)
+    assert breaker.state == OPEN
+    snap = breaker.snapshot()
+    assert snap["slow_call_rate"] == 1.0
+    assert snap["latency_p95"] == 6.0
+
+
+def test_router_sheds_failing_provider(monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_FALLBACK_ENABLED", False)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        raise httpx.ConnectError("down", request=request)
+
+    router = AgentRouter()
+    router.providers["fetchai"] = HTTPAgentProvider(
+        name="fetchai",
+        base_url="http://stub.local/run",
+        api_key=None,
+        transport=httpx.MockTransport(handler),
+    )
+    router.breakers["fetchai"] = CircuitBreaker(
+        "fetchai", min_calls=3, failure_rate=0.5, open_seconds=30
+    )
+
+    async def scenario():
+        codes = []
+        for _ in range(5):
+            try:
+                await router.run("fetchai", None, "ping", None)
+            except HTTPException as exc:
+                codes.append((exc.status_code, (exc.headers or {}).get("Retry-After")))
+        return codes
+
+    codes = asyncio.run(scenario())
+    assert len(calls) == 3
+    assert [code for code, _ in codes] == [500, 500, 500, 503, 503]
+    assert codes[-1][1] == "30"
+    status = router.status()["fetchai"]
+    assert status["state"] == OPEN
+    assert status["rejected"] == 2
+    assert status["configured"] is True
+
+
+def test_status_endpoint_lists_every_provider():
+    from fastapi.testclient import TestClient
+
+    from app.agent_server import app
+
+    with TestClient(app) as client:
+        response = client.get("/agents/status")
+    assert response.status_code == 200
+    providers = response.json()["providers"]
+    assert set(providers) == {"fetchai", "janitorai", "wordware", "letta"}
+    assert all(entry["state"] in {CLOSED, OPEN, HALF_OPEN} for entry in providers.values())
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from sqlalchemy.pool import QueuePool
+
+from app.database import _create_engine
+
+
+def test_production_profile_applies_pragmas(tmp_path):
+    engine = _create_engine(f"sqlite:///{tmp_path / 'prod.db'}", profile="production")
+    assert isinstance(engine.pool, QueuePool)
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        # 1 == NORMAL
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() > 0
+    engine.dispose()
+
+
+def test_default_profile_keeps_defaults(tmp_path):
+    engine = _create_engine(f"sqlite:///{tmp_path / 'dev.db'}", profile="default")
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+    engine.dispose()
+
+    memory = _create_engine("sqlite://", profile="production")
+    assert not isinstance(memory.pool, QueuePool)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from app import models
+from app.config import settings
+from app.services import chroma_service
+from app.services.index_queue import IndexQueue
+
+
+def test_queue_coalesces_and_flushes(monkeypatch):
+    monkeypatch.setattr(settings, "INDEX_ASYNC", True)
+    release = threading.Event()
+    indexed: list[list[tuple[int, str]]] = []
+    deleted: list[int] = []
+
+    def fake_index_many(todos):
+        release.wait(timeout=5)
+        indexed.append([(todo.id, todo.status) for todo in todos])
+
+    monkeypatch.setattr(chroma_service, "index_many", fake_index_many)
+    monkeypatch.setattr(chroma_service, "delete_todo", deleted.append)
+
+    queue = IndexQueue()
+    queue.submit(models.TodoItem(id=1, title="Blocker"))
+    # wait until the worker has picked up the first batch and is blocked on it.
+    assert not queue.flush(timeout=0.2)
+    queue.submit(models.TodoItem(id=2, title="Study", status="pending"))
+    queue.submit(models.TodoItem(id=2, title="Study", status="done"))
+    queue.submit_delete(3)
+
+    stats = queue.stats()
+    assert stats["depth"] == 2
+    assert stats["in_flight"] == 1
+    assert stats["coalesced"] == 1
+    assert stats["lag_seconds"] > 0
+
+    release.set()
+    assert queue.flush(timeout=5)
+    queue.stop(timeout=1)
+
+    assert indexed == [[(1, "pending")], [(2, "done")]]
+    assert deleted == [3]
+    assert queue.stats()["processed"] == 3
+    assert queue.stats()["depth"] == 0
+
+
+def test_queue_inline_when_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "INDEX_ASYNC", False)
+    indexed: list[int] = []
+    monkeypatch.setattr(
+        chroma_service, "index_many", lambda todos: indexed.extend(t.id for t in todos)
+    )
+
+    queue = IndexQueue()
+    queue.submit(models.TodoItem(id=7, title="Inline"))
+    assert indexed == [7]
+    assert queue.stats()["running"] is False
+
+
+def test_async_submit_never_blocks_the_loop(monkeypatch):
+    monkeypatch.setattr(settings, "INDEX_ASYNC", True)
+    monkeypatch.setattr(settings, "INDEX_QUEUE_MAXSIZE", 1)
+    monkeypatch.setattr(settings, "INDEX_QUEUE_PUT_TIMEOUT", 0.3)
+    release = threading.Event()
+    inline: list[int] = []
+    monkeypatch.setattr(chroma_service, "index_many", lambda todos: release.wait(timeout=5))
+    queue = IndexQueue()
+    queue.submit(models.TodoItem(id=1, title="Blocker"))
+    assert not queue.flush(timeout=0.1)
+    # the queue holds one more op, so id 3 overflows and has to wait for room.
+    queue.submit(models.TodoItem(id=2, title="Queued"))
+    monkeypatch.setattr(
+        queue, "_apply", lambda batch: inline.extend(todo_id for todo_id, _ in batch)
+    )
+
+    async def scenario() -> float:
+        gaps: list[float] = []
+
+        async def ticker() -> None:
+            loop = asyncio.get_running_loop()
+            last = loop.time()
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+                gaps.append(loop.time() - last)
+                last = loop.time()
+
+        await asyncio.gather(queue.submit_async(models.TodoItem(id=3, title="Overflow")), ticker())
+        return max(gaps)
+
+    assert asyncio.run(scenario()) < 0.15
+    # the put timed out on a worker thread and fell back to indexing inline there.
+    assert inline == [3]
+    release.set()
+    queue.stop(timeout=1)
+
+
+def test_async_inline_indexing_runs_off_the_loop(monkeypatch):
+    monkeypatch.setattr(settings, "INDEX_ASYNC", False)
+    threads: list[int] = []
+
+    def record(*_args) -> None:
+        threads.append(threading.get_ident())
+
+    monkeypatch.setattr(chroma_service, "index_many", record)
+    monkeypatch.setattr(chroma_service, "delete_todo", record)
+
+    async def scenario() -> int:
+        await IndexQueue().submit_async(models.TodoItem(id=7, title="Inline"))
+        await IndexQueue().submit_delete_async(7)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(threads) == 2
+    assert loop_thread not in threads
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import models, schemas
+from app.services import ai_service, job_service
+from app.services.job_service import AIJobRunner
+
+
+def _factory(engine):
+    @asynccontextmanager
+    async def scope():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    return scope
+
+
+def _fake_generate(monkeypatch, delay: float = 0.0, fail: bool = False) -> None:
+    async def generate(user_input: str, use_cache: bool = True):
+        await asyncio.sleep(delay)
+        if fail:
+            raise HTTPException(status_code=502, detail="AI generation failed")
+        return [schemas.GeneratedTodoNode(title=user_input)]
+
+    monkeypatch.setattr(ai_service, "generate_structured_todos_async", generate)
+
+
+def _runner(engine, **overrides) -> AIJobRunner:
+    options = {"workers": 1, "max_queue": 10, "ttl_seconds": 60, "sweep_interval": 60, **overrides}
+    return AIJobRunner(_factory(engine), **options)
+
+
+async def _wait_for(runner: AIJobRunner, job_id: str) -> models.AIJob:
+    for _ in range(200):
+        job = await runner.get(job_id)
+        if job.status in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never finished")
+
+
+def test_job_runs_in_background_and_saves(async_engine, monkeypatch):
+    _fake_generate(monkeypatch)
+    runner = _runner(async_engine, workers=2)
+
+    async def scenario():
+        job = await runner.submit(schemas.AIGenerateRequest(user_input="Plan a trip", save=True))
+        assert job.status == "queued"
+        done = await _wait_for(runner, job.id)
+        stats = await runner.stats()
+        await runner.stop()
+        return done, stats
+
+    done, stats = asyncio.run(scenario())
+    read = job_service.to_read(done)
+    assert read.status == "succeeded"
+    assert read.attempts == 1
+    assert [node.title for node in read.result.todos] == ["Plan a trip"]
+    assert len(read.result.persisted_ids) == 1
+    assert read.expires_at > read.finished_at
+    assert stats["succeeded"] == 1 and stats["by_status"] == {"succeeded": 1}
+
+
+def test_failed_generation_is_recorded(async_engine, monkeypatch):
+    _fake_generate(monkeypatch, fail=True)
+    runner = _runner(async_engine)
+
+    async def scenario():
+        job = await runner.submit(schemas.AIGenerateRequest(user_input="Plan a trip", save=False))
+        done = await _wait_for(runner, job.id)
+        await runner.stop()
+        return done
+
+    done = asyncio.run(scenario())
+    assert done.status == "failed"
+    assert done.error_status == 502
+    assert done.result is None
+
+
+def test_full_queue_rejects_with_retry_after(async_engine, monkeypatch):
+    _fake_generate(monkeypatch, delay=0.2)
+    runner = _runner(async_engine, max_queue=2)
+
+    async def scenario():
+        payload = schemas.AIGenerateRequest(user_input="Plan a trip", save=False)
+        await runner.submit(payload)
+        await runner.submit(payload)
+        with pytest.raises(HTTPException) as excinfo:
+            await runner.submit(payload)
+        await runner.stop()
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.headers["Retry-After"]
+    assert runner._rejected == 1
+
+
+def test_expired_results_are_hidden_then_swept(async_engine, monkeypatch):
+    _fake_generate(monkeypatch)
+    runner = _runner(async_engine)
+
+    async def scenario():
+        job = await runner.submit(schemas.AIGenerateRequest(user_input="Plan a trip", save=False))
+        await _wait_for(runner, job.id)
+        await runner.stop()
+        async with _factory(async_engine)() as session:
+            stored = await session.get(models.AIJob, job.id)
+            stored.expires_at = job_service._now() - timedelta(seconds=1)
+            session.add(stored)
+            await session.commit()
+        with pytest.raises(HTTPException) as excinfo:
+            await runner.get(job.id)
+        removed = await runner.sweep()
+        async with _factory(async_engine)() as session:
+            gone = await session.get(models.AIJob, job.id)
+        return excinfo.value, removed, gone
+
+    error, removed, gone = asyncio.run(scenario())
+    assert error.status_code == 404
+    assert removed == 1
+    assert gone is None
+
+
+def test_start_requeues_jobs_interrupted_by_a_restart(async_engine, monkeypatch):
+    _fake_generate(monkeypatch)
+    runner = _runner(async_engine)
+
+    async def scenario():
+        async with _factory(async_engine)() as session:
+            # rows written before leases existed carry none, so they count as lapsed.
+            for job_id, attempts in (("interrupted", 1), ("stuck", 3)):
+                session.add(
+                    models.AIJob(id=job_id, user_input=job_id, status="running", attempts=attempts)
+                )
+            await session.commit()
+        await runner.start()
+        resumed = await _wait_for(runner, "interrupted")
+        abandoned = await _wait_for(runner, "stuck")
+        await runner.stop()
+        return resumed, abandoned
+
+    resumed, abandoned = asyncio.run(scenario())
+    assert resumed.status == "succeeded"
+    assert resumed.attempts == 2
+    assert abandoned.status == "failed"
+    assert "Abandoned" in abandoned.error
+
+
+def test_start_leaves_jobs_with_a_live_lease_alone(async_engine, monkeypatch):
+    _fake_generate(monkeypatch)
+    runner = _runner(async_engine)
+    now = job_service._now()
+
+    async def scenario():
+        async with _factory(async_engine)() as session:
+            # another process is working on this one and keeps renewing its lease.
+            session.add(
+                models.AIJob(
+                    id="owned",
+                    user_input="busy elsewhere",
+                    status="running",
+                    attempts=1,
+                    lease_expires_at=now + timedelta(seconds=60),
+                )
+            )
+            session.add(
+                models.AIJob(
+                    id="orphaned",
+                    user_input="worker died",
+                    status="running",
+                    attempts=1,
+                    lease_expires_at=now - timedelta(seconds=1),
+                )
+            )
+            await session.commit()
+        await runner.start()
+        resumed = await _wait_for(runner, "orphaned")
+        owned = await runner.get("owned")
+        await runner.stop()
+        return resumed, owned
+
+    resumed, owned = asyncio.run(scenario())
+    assert resumed.status == "succeeded"
+    assert owned.status == "running"
+    assert owned.attempts == 1
+
+
+def test_sweeper_recovers_jobs_whose_lease_lapses(async_engine, monkeypatch):
+    _fake_generate(monkeypatch)
+    runner = _runner(async_engine, sweep_interval=0.05)
+
+    async def scenario():
+        async with _factory(async_engine)() as session:
+            session.add(
+                models.AIJob(
+                    id="lapsing",
+                    user_input="worker about to die",
+                    status="running",
+                    attempts=1,
+                    lease_expires_at=job_service._now() + timedelta(seconds=0.2),
+                )
+            )
+            await session.commit()
+        await runner.start()
+        done = await _wait_for(runner, "lapsing")
+        await runner.stop()
+        return done
+
+    done = asyncio.run(scenario())
+    assert done.status == "succeeded"
+    assert done.attempts == 2
+
+
+def test_shared_table_runs_each_job_once(async_engine, monkeypatch):
+    calls: list[str] = []
+
+    async def generate(user_input: str, use_cache: bool = True):
+        calls.append(user_input)
+        await asyncio.sleep(0.05)
+        return [schemas.GeneratedTodoNode(title=user_input)]
+
+    monkeypatch.setattr(ai_service, "generate_structured_todos_async", generate)
+    # two processes sharing one database both queue every pending id at start.
+    first, second = _runner(async_engine, workers=2), _runner(async_engine, workers=2)
+
+    async def scenario():
+        async with _factory(async_engine)() as session:
+            for idx in range(4):
+                session.add(models.AIJob(id=f"job-{idx}", user_input=f"plan {idx}", save=False))
+            await session.commit()
+        await asyncio.gather(first.start(), second.start())
+        jobs = [await _wait_for(first, f"job-{idx}") for idx in range(4)]
+        await asyncio.gather(first.stop(), second.stop())
+        return jobs
+
+    jobs = asyncio.run(scenario())
+    assert sorted(calls) == [f"plan {idx}" for idx in range(4)]
+    assert all(job.status == "succeeded" and job.attempts == 1 for job in jobs)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import weakref
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from tenacity import wait_none
+
+from app import metrics, schemas
+from app.middleware import MetricsMiddleware
+from app.metrics import Counter, Histogram, Registry
+from app.services import ai_service, todo_service
+from app.services.response_cache import ResponseCache
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.register(Histogram("op_seconds", "Op latency.", ("op",), buckets=(0.1, 1.0)))
+    hits = registry.register(Counter("hits_total", "Hits.", ("path",)))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, op="read")
+    hits.inc(path='a "quoted"\npath')
+
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="read",le="1"} 3' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 4' in text
+    assert 'op_seconds_sum{op="read"} 4.05' in text
+    assert 'op_seconds_count{op="read"} 4' in text
+    assert 'hits_total{path="a \\"quoted\\"\\npath"} 1' in text
+    # registering the same name again hands back the live metric.
+    assert registry.register(Histogram("op_seconds", "Op latency.", ("op",))) is latency
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int) -> dict:
+        return {"id": item_id}
+
+    return app
+
+
+def test_middleware_labels_requests_by_route_template():
+    client = TestClient(_app())
+    before = metrics.HTTP_REQUEST_SECONDS.count(method="GET", route="/items/{item_id}")
+    for item_id in (1, 2, 3):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    client.get("/nowhere")
+
+    assert metrics.HTTP_REQUEST_SECONDS.count(method="GET", route="/items/{item_id}") == before + 3
+    assert metrics.HTTP_REQUESTS.value(method="GET", route="unmatched", status="404") >= 1
+    assert metrics.HTTP_IN_FLIGHT.value() == 0
+
+
+def test_both_apps_expose_metrics():
+    from app.agent_server import app as agent_app
+    from app.main import app as main_app
+
+    for app in (main_app, agent_app):
+        client = TestClient(app)
+        client.get("/health")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'http_request_duration_seconds_count{method="GET",route="/health"}' in response.text
+
+
+def test_todo_service_functions_are_timed(session):
+    before = metrics.DB_QUERY_SECONDS.count(function="list_todos")
+    todo_service.create_todo(schemas.TodoCreate(title="Timed"), session)
+    todo_service.list_todos(session)
+    assert metrics.DB_QUERY_SECONDS.count(function="list_todos") == before + 1
+    assert metrics.DB_QUERY_SECONDS.count(function="create_todo") >= 1
+
+
+def test_completion_attempts_and_retries_are_counted(monkeypatch):
+    calls = {"n": 0}
+
+    async def create(**_kwargs):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise RuntimeError("flaky upstream")
+        content = json.dumps({"todos": [{"title": "Counted"}]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai_service.settings, "MOCK_AI_RESPONSES_FILE", None)
+    monkeypatch.setattr(ai_service, "_get_async_client", lambda: client)
+    monkeypatch.setattr(ai_service, "_RETRY_WAIT", wait_none())
+    monkeypatch.setattr(ai_service, "_semaphores", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(ai_service, "_response_cache", ResponseCache(max_entries=0, ttl_seconds=0))
+    attempts = metrics.AI_COMPLETION_ATTEMPTS.value(mode="async")
+    retries = metrics.AI_COMPLETION_RETRIES.value(mode="async")
+    errors = metrics.AI_COMPLETION_SECONDS.count(mode="async", outcome="error")
+
+    todos = asyncio.run(ai_service.generate_structured_todos_async("count my retries"))
+
+    assert todos[0].title == "Counted"
+    assert metrics.AI_COMPLETION_ATTEMPTS.value(mode="async") == attempts + 2
+    assert metrics.AI_COMPLETION_RETRIES.value(mode="async") == retries + 1
+    assert metrics.AI_COMPLETION_SECONDS.count(mode="async", outcome="error") == errors + 1
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.config import settings
+from app.middleware import ProfilingMiddleware
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILING_ALLOWED_CLIENTS", "127.0.0.1,10.0.0.0/8")
+    return tmp_path
+
+
+def _busy_work(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/slow")
+    def slow() -> dict:
+        return {"n": _busy_work(0.05)}
+
+    return app
+
+
+def test_flagged_request_writes_collapsed_stacks(profile_dir):
+    client = TestClient(_app(), client=("127.0.0.1", 50000))
+
+    response = client.get("/slow", headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    name = response.headers["x-profile-file"]
+    lines = (profile_dir / name).read_text().splitlines()
+    assert lines
+    # every line is "frame;frame;... count", root first.
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("_busy_work (test_profiling.py" in line for line in lines)
+
+
+def test_query_flag_and_allowlist(profile_dir):
+    allowed = TestClient(_app(), client=("10.1.2.3", 50000))
+    denied = TestClient(_app(), client=("192.168.1.5", 50000))
+
+    assert "x-profile-file" in allowed.get("/slow?profile=1").headers
+    assert "x-profile-file" not in denied.get("/slow?profile=1").headers
+    assert "x-profile-file" not in allowed.get("/slow").headers
+    assert len(list(profile_dir.iterdir())) == 1
+
+
+def test_concurrent_profile_is_skipped(profile_dir):
+    client = TestClient(_app(), client=("127.0.0.1", 50000))
+    running = profiling.try_start("other")
+    try:
+        response = client.get("/slow", headers={"X-Profile": "1"})
+    finally:
+        profiling.finish(running)
+
+    assert response.headers["x-profile-file"] == "busy"
+
+
+def test_prune_keeps_newest_within_limits(profile_dir, monkeypatch):
+    for idx in range(5):
+        path = profile_dir / f"{idx}.collapsed"
+        path.write_text("x" * 100)
+        os.utime(path, ns=(idx * 10**9, idx * 10**9))
+
+    monkeypatch.setattr(settings, "PROFILING_MAX_FILES", 3)
+    profiling.prune(profile_dir)
+    names = sorted(path.name for path in profile_dir.iterdir())
+    assert names == ["2.collapsed", "3.collapsed", "4.collapsed"]
+
+    monkeypatch.setattr(settings, "PROFILING_MAX_BYTES", 250)
+    profiling.prune(profile_dir)
+    assert sorted(path.name for path in profile_dir.iterdir()) == ["3.collapsed", "4.collapsed"]
+
+
+def test_prune_never_removes_the_profile_just_written(profile_dir, monkeypatch):
+    older = profile_dir / "0.collapsed"
+    older.write_text("x" * 10)
+    os.utime(older, ns=(0, 0))
+    monkeypatch.setattr(settings, "PROFILING_MAX_BYTES", 1)
+    client = TestClient(_app(), client=("127.0.0.1", 50000))
+
+    name = client.get("/slow", headers={"X-Profile": "1"}).headers["x-profile-file"]
+
+    # the new profile alone is over budget, but the header already points at it.
+    assert [path.name for path in profile_dir.iterdir()] == [name]
+
+    # an explicitly kept file survives even when it is not the newest.
+    newer = profile_dir / "1.collapsed"
+    newer.write_text("y")
+    profiling.prune(profile_dir, keep=profile_dir / name)
+    assert [path.name for path in profile_dir.iterdir()] == [name]
+
+
+def test_profile_tool_wraps_only_listed_tools(profile_dir, monkeypatch):
+    def listed(n: int) -> int:
+        return _busy_work(0.02) and n
+
+    async def listed_async(n: int) -> int:
+        await asyncio.sleep(0.02)
+        return n
+
+    def unlisted() -> None:
+        return None
+
+    monkeypatch.setattr(settings, "PROFILING_MCP_TOOLS", "listed, listed_async")
+    assert profiling.profile_tool(unlisted) is unlisted
+
+    wrapped = profiling.profile_tool(listed)
+    wrapped_async = profiling.profile_tool(listed_async)
+    assert wrapped.__wrapped__ is listed
+    assert wrapped(3) == 3
+    assert asyncio.run(wrapped_async(4)) == 4
+    slugs = sorted(path.name.split("-", 3)[-1] for path in profile_dir.iterdir())
+    assert slugs == ["mcp-listed-async.collapsed", "mcp-listed.collapsed"]
+
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", False)
+    assert profiling.profile_tool(listed) is listed
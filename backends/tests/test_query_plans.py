@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import itertools
+import re
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.services import todo_service
+
+# an unbounded listing must seek with an index ("SEARCH todo_items USING ... INDEX"); any
+# "SCAN todo_items" there reads every row, even when it walks an index to do so.
+_INDEX_SEARCH = re.compile(r"\bSEARCH todo_items USING (COVERING )?INDEX\b")
+_ANY_SCAN = re.compile(r"\bSCAN todo_items\b")
+# a paged listing may also walk an index in keyset order: LIMIT stops it after one page.
+_INDEX_WALK = re.compile(r"\bSCAN todo_items USING (COVERING )?INDEX\b")
+
+_FILTERS = {
+    "status_filter": "pending",
+    "priority_filter": "high",
+    "due_before": datetime(2024, 10, 21),
+    "due_after": datetime(2024, 10, 1),
+}
+
+
+def _filter_combinations():
+    names = list(_FILTERS)
+    for size in range(1, len(names) + 1):
+        for combo in itertools.combinations(names, size):
+            yield {name: _FILTERS[name] for name in combo}
+
+
+def _plans(session, list_fn, **options) -> list[tuple[str, list[str]]]:
+    """EXPLAIN QUERY PLAN details for every SELECT that ``list_fn(session, **options)`` runs."""
+    connection = session.connection()
+    captured: list[tuple[str, object]] = []
+
+    def _capture(_conn, _cursor, statement, parameters, _context, _executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", _capture)
+    try:
+        list_fn(session, **options)
+    finally:
+        event.remove(connection, "before_cursor_execute", _capture)
+    assert captured
+    plans = []
+    for statement, parameters in captured:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plans.append((statement, [row[-1] for row in rows]))
+    return plans
+
+
+def test_unbounded_list_searches_an_index(session):
+    offenders = []
+    for filters in _filter_combinations():
+        for _statement, details in _plans(session, todo_service.list_todos, **filters):
+            searched = any(_INDEX_SEARCH.search(detail) for detail in details)
+            if not searched or any(_ANY_SCAN.search(detail) for detail in details):
+                offenders.append((filters, details))
+    assert not offenders, offenders
+
+
+def test_paged_list_searches_or_walks_an_index(session):
+    offenders = []
+    for filters in _filter_combinations():
+        for order_by in ("updated_at", "deadline"):
+            plans = _plans(session, todo_service.list_todos_page, order_by=order_by, **filters)
+            for statement, details in plans:
+                assert " LIMIT " in statement
+                for detail in details:
+                    if _ANY_SCAN.search(detail) and not _INDEX_WALK.search(detail):
+                        offenders.append((filters, order_by, details))
+    assert not offenders, offenders
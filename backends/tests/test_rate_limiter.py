@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import sqlite3
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import RateLimiterMiddleware
+from app.rate_limit import MemoryRateLimiter, SQLiteRateLimiter, create_rate_limiter
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_gcra_allows_a_burst_then_refills_gradually():
+    clock = _Clock()
+    limiter = MemoryRateLimiter(limit=3, window_seconds=3, clock=clock)
+
+    decisions = [limiter.hit("a") for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions[:3]] == [2, 1, 0]
+    assert decisions[3].retry_after == 1.0
+    assert decisions[3].reset_after == 3.0
+    # other clients have their own budget.
+    assert limiter.hit("b").allowed
+
+    clock.now += 1
+    assert limiter.hit("a").allowed
+    assert not limiter.hit("a").allowed
+
+
+def test_idle_and_cold_keys_are_evicted():
+    clock = _Clock()
+    limiter = MemoryRateLimiter(limit=10, window_seconds=10, max_keys=3, clock=clock)
+    for idx in range(5):
+        limiter.hit(f"client-{idx}")
+    assert len(limiter) == 3
+    assert limiter.evictions == 2
+
+    # a key whose bucket has refilled carries no state, so it is dropped once idle.
+    clock.now += 2
+    limiter.hit("fresh")
+    assert len(limiter) == 1
+
+
+def test_a_key_with_burst_debt_does_not_block_expiry_behind_it():
+    clock = _Clock()
+    limiter = MemoryRateLimiter(limit=10, window_seconds=10, clock=clock)
+    # "busy" is coldest by last use but owes ten seconds; "idle" behind it owes one.
+    for _ in range(10):
+        limiter.hit("busy")
+    limiter.hit("idle")
+
+    clock.now += 2
+    limiter.hit("fresh")
+    assert len(limiter) == 2
+    # "busy" kept its debt: two seconds refilled two requests, not a fresh burst of ten.
+    assert limiter.hit("busy").remaining == 1
+
+
+def _app(limit: int, limiter=None) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RateLimiterMiddleware, limit=limit, window_seconds=60, limiter=limiter)
+
+    @app.get("/ping")
+    def ping() -> dict:
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream() -> StreamingResponse:
+        return StreamingResponse(
+            (f"data: {idx}\n\n" for idx in range(3)), media_type="text/event-stream"
+        )
+
+    return app
+
+
+def test_middleware_sets_headers_and_rejects_with_retry_after():
+    client = TestClient(_app(limit=2))
+    first = client.get("/ping")
+    assert first.status_code == 200
+    assert first.headers["x-ratelimit-limit"] == "2"
+    assert first.headers["x-ratelimit-remaining"] == "1"
+    assert client.get("/ping").headers["x-ratelimit-remaining"] == "0"
+
+    rejected = client.get("/ping")
+    assert rejected.status_code == 429
+    assert rejected.json() == {"detail": "Rate limit exceeded"}
+    assert rejected.headers["retry-after"] == "30"
+    assert rejected.headers["x-ratelimit-remaining"] == "0"
+
+
+def test_middleware_passes_streams_through_and_can_be_disabled():
+    client = TestClient(_app(limit=5))
+    with client.stream("GET", "/stream") as response:
+        assert response.headers["x-ratelimit-remaining"] == "4"
+        assert "".join(response.iter_text()) == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+
+    unlimited = TestClient(_app(limit=0))
+    responses = [unlimited.get("/ping") for _ in range(3)]
+    assert all(r.status_code == 200 and "x-ratelimit-limit" not in r.headers for r in responses)
+
+
+def test_sqlite_backend_matches_the_memory_algorithm(tmp_path):
+    clock = _Clock()
+    limiter = SQLiteRateLimiter(
+        limit=3, window_seconds=3, path=str(tmp_path / "limits.sqlite"), clock=clock
+    )
+
+    decisions = [limiter.hit("a") for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions[:3]] == [2, 1, 0]
+    assert decisions[3].retry_after == 1.0
+    clock.now += 1
+    assert limiter.hit("a").allowed
+    assert asyncio.run(limiter.acquire("b")).allowed
+    assert len(limiter) == 2
+
+
+def test_sqlite_backend_fails_open_when_the_store_is_unusable(tmp_path):
+    blocker = tmp_path / "not-a-db"
+    blocker.mkdir()
+    limiter = SQLiteRateLimiter(limit=1, window_seconds=60, path=str(blocker))
+    assert all(limiter.hit("a").allowed for _ in range(3))
+    assert limiter.errors == 3
+
+
+def test_sqlite_acquire_waits_for_locks_off_the_event_loop(tmp_path):
+    path = tmp_path / "limits.sqlite"
+    limiter = SQLiteRateLimiter(limit=5, window_seconds=60, path=str(path), busy_timeout_ms=300)
+    limiter.hit("warm")
+    # another worker holding the write lock makes the check wait out busy_timeout_ms.
+    holder = sqlite3.connect(str(path), isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+
+    async def scenario() -> tuple[float, bool]:
+        gaps: list[float] = []
+        loop = asyncio.get_running_loop()
+
+        async def ticker() -> None:
+            last = loop.time()
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+                gaps.append(loop.time() - last)
+                last = loop.time()
+
+        ticking = asyncio.create_task(ticker())
+        await asyncio.sleep(0.02)
+        decision = await limiter.acquire("a")
+        await ticking
+        return max(gaps), decision.allowed
+
+    try:
+        max_gap, allowed = asyncio.run(scenario())
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert max_gap < 0.15
+    # the locked store failed open after the timeout.
+    assert allowed and limiter.errors == 1
+
+
+def test_middleware_uses_the_configured_backend(tmp_path):
+    path = str(tmp_path / "limits.sqlite")
+    # two app instances stand in for two workers sharing the file.
+    workers = [
+        TestClient(_app(limit=2, limiter=SQLiteRateLimiter(2, 60, path=path))) for _ in range(2)
+    ]
+    statuses = [workers[idx % 2].get("/ping").status_code for idx in range(3)]
+    assert statuses == [200, 200, 429]
+
+
+def test_create_rate_limiter_reads_settings(tmp_path, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_SQLITE_PATH", str(tmp_path / "limits.sqlite"))
+    assert isinstance(create_rate_limiter("memory"), MemoryRateLimiter)
+    assert isinstance(create_rate_limiter("sqlite"), SQLiteRateLimiter)
+
+
+def _hammer(path: str, attempts: int, start, results) -> None:
+    limiter = SQLiteRateLimiter(limit=50, window_seconds=3600, path=path)
+    start.wait()
+    results.put(sum(limiter.hit("shared-client").allowed for _ in range(attempts)))
+
+
+def test_sqlite_backend_enforces_one_limit_across_processes(tmp_path):
+    # four "workers" fire 160 requests for one client at once; exactly the limit gets through.
+    ctx = multiprocessing.get_context("spawn")
+    path = str(tmp_path / "limits.sqlite")
+    start = ctx.Event()
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_hammer, args=(path, 40, start, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    start.set()
+    allowed = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=60)
+    # a store that failed open would have let more through.
+    assert sum(allowed) == 50
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api import routes_todos
+from app.database import get_async_session
+
+
+def _client(async_engine) -> TestClient:
+    app = FastAPI()
+    app.include_router(routes_todos.router)
+
+    async def session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = session_override
+    return TestClient(app)
+
+
+def test_list_returns_a_plain_array_unless_paging_is_requested(async_engine):
+    client = _client(async_engine)
+    for idx in range(3):
+        client.post("/todos", json={"title": f"Todo {idx}", "priority": "high"})
+
+    plain = client.get("/todos", params={"priority": "high"}).json()
+    assert isinstance(plain, list)
+    assert sorted(todo["title"] for todo in plain) == ["Todo 0", "Todo 1", "Todo 2"]
+    assert {"id", "status", "updated_at"} <= set(plain[0])
+
+    first = client.get("/todos", params={"limit": 2}).json()
+    assert len(first["items"]) == 2 and first["next_cursor"]
+    rest = client.get("/todos", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert len(rest["items"]) == 1 and rest["next_cursor"] is None
+
+    projected = client.get("/todos", params={"fields": "id,title"}).json()
+    assert set(projected["items"][0]) == {"id", "title"}
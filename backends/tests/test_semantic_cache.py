@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import uuid
+
+import chromadb
+import pytest
+
+from app.services import semantic_cache
+from app.services.semantic_cache import SemanticCache
+
+VECTORS = {
+    "plan my week": [1.0, 0.0, 0.0],
+    "help me plan this week": [0.98, 0.15, 0.0],
+    "study for finals": [0.0, 1.0, 0.0],
+    "clean the garage": [0.0, 0.0, 1.0],
+}
+
+
+@pytest.fixture
+def collection():
+    client = chromadb.EphemeralClient()
+    return client.create_collection(
+        f"prompt_cache_{uuid.uuid4().hex}", metadata={"hnsw:space": "cosine"}
+    )
+
+
+def _cache(collection, **overrides) -> SemanticCache:
+    params = {
+        "threshold": 0.05,
+        "max_entries": 100,
+        "ttl_seconds": 3600,
+        "model": "model-a",
+        "system_prompt": "prompt",
+    }
+    params.update(overrides)
+    return SemanticCache(
+        lambda: collection, lambda texts: [VECTORS[text] for text in texts], **params
+    )
+
+
+def test_paraphrase_hits_and_unrelated_prompt_misses(collection):
+    cache = _cache(collection)
+    cache.store("Plan my week", [{"title": "Monday"}])
+
+    hit = cache.lookup("Help me plan this week")
+    assert hit is not None
+    payload, distance = hit
+    assert payload == [{"title": "Monday"}]
+    assert distance < 0.05
+
+    assert cache.lookup("study for finals") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_entries_are_scoped_to_model_and_system_prompt(collection):
+    _cache(collection).store("plan my week", [{"title": "Monday"}])
+    assert _cache(collection, model="model-b").lookup("plan my week") is None
+    assert _cache(collection, system_prompt="prompt v2").lookup("plan my week") is None
+
+
+def test_expired_entries_are_dropped(collection, monkeypatch):
+    clock = [1_000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: clock[0])
+    cache = _cache(collection, ttl_seconds=10)
+    cache.store("plan my week", [{"title": "Monday"}])
+    clock[0] += 11
+    assert cache.lookup("plan my week") is None
+    assert cache.stats()["expired"] == 1
+    assert collection.count() == 0
+
+
+def test_least_recently_used_entries_are_evicted(collection, monkeypatch):
+    clock = [1_000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: clock[0])
+    cache = _cache(collection, max_entries=2)
+    for prompt in ("plan my week", "study for finals"):
+        cache.store(prompt, [{"title": prompt}])
+        clock[0] += 1
+    cache.lookup("plan my week")  # refreshes last_used
+    clock[0] += 1
+    cache.store("clean the garage", [{"title": "garage"}])
+    assert collection.count() == 1
+    assert cache.lookup("clean the garage") is not None
+    assert cache.stats()["evictions"] == 2
+
+
+def test_broken_embedder_is_a_miss(collection):
+    def broken(_texts):
+        raise RuntimeError("sentence-transformers is not installed")
+
+    cache = SemanticCache(
+        lambda: collection,
+        broken,
+        threshold=0.1,
+        max_entries=10,
+        ttl_seconds=60,
+        model="m",
+        system_prompt="p",
+    )
+    assert cache.lookup("plan my week") is None
+    cache.store("plan my week", [])
+    assert cache.stats()["errors"] == 2
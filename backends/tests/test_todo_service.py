@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
 
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
+
 from app import schemas
 from app.services import todo_service
 
@@ -73,3 +79,139 @@ def test_complete_todo(session):
     )
     updated = todo_service.complete_todo(todo.id, session)
     assert updated.status == "done"
+
+
+def test_subtree_and_ancestors(session):
+    payload = [
+        schemas.GeneratedTodoNode(
+            title="Root",
+            subitems=[
+                schemas.GeneratedTodoNode(
+                    title="Child",
+                    subitems=[schemas.GeneratedTodoNode(title="Grandchild")],
+                ),
+                schemas.GeneratedTodoNode(title="Sibling"),
+            ],
+        ),
+        schemas.GeneratedTodoNode(title="Other root"),
+    ]
+    created = {todo.title: todo.id for todo in todo_service.save_generated_tree(payload, session)}
+
+    subtree = todo_service.get_subtree(created["Child"], session)
+    assert subtree.title == "Child"
+    assert [node.title for node in subtree.children] == ["Grandchild"]
+
+    shallow = todo_service.get_subtree(created["Root"], session, max_depth=1)
+    assert sorted(node.title for node in shallow.children) == ["Child", "Sibling"]
+    assert all(not node.children for node in shallow.children)
+
+    ancestors = todo_service.get_ancestors(created["Grandchild"], session)
+    assert [todo.title for todo in ancestors] == ["Root", "Child"]
+    assert todo_service.get_ancestors(created["Other root"], session) == []
+
+    with pytest.raises(HTTPException):
+        todo_service.get_subtree(9999, session)
+
+
+def test_keyset_pagination_and_projection(session):
+    deadlines = [datetime(2024, 10, 22), None, datetime(2024, 10, 20), None, datetime(2024, 10, 21)]
+    for idx, deadline in enumerate(deadlines):
+        todo_service.create_todo(
+            schemas.TodoCreate(title=f"Task {idx}", deadline=deadline), session
+        )
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        page = todo_service.list_todos_page(session, limit=2, cursor=cursor, fields=["id", "title"])
+        assert all(set(item) == {"id", "title"} for item in page.items)
+        seen.extend(item["id"] for item in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+
+    titles: list[str] = []
+    cursor = None
+    while True:
+        page = todo_service.list_todos_page(session, limit=2, cursor=cursor, order_by="deadline")
+        titles.extend(item["title"] for item in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert titles == ["Task 2", "Task 4", "Task 0", "Task 1", "Task 3"]
+
+    with pytest.raises(HTTPException):
+        todo_service.list_todos_page(session, cursor="not-a-cursor")
+    with pytest.raises(HTTPException):
+        todo_service.list_todos_page(session, fields=["password"])
+
+
+def test_async_service_round_trip(async_engine):
+    async def scenario():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            parent = await todo_service.create_todo_async(
+                schemas.TodoCreate(title="Async parent"), session
+            )
+            child = await todo_service.create_todo_async(
+                schemas.TodoCreate(title="Async child", parent_id=parent.id), session
+            )
+            done = await todo_service.complete_todo_async(child.id, session)
+            subtree = await todo_service.get_subtree_async(parent.id, session)
+            page = await todo_service.list_todos_page_async(
+                session, status_filter="done", fields=["title"]
+            )
+            await todo_service.delete_todo_async(parent.id, session)
+            remaining = await todo_service.list_todos_async(session)
+            return done, subtree, page, remaining
+
+    done, subtree, page, remaining = asyncio.run(scenario())
+    assert done.status == "done"
+    assert [node.title for node in subtree.children] == ["Async child"]
+    assert page.items == [{"title": "Async child"}]
+    assert [todo.title for todo in remaining] == ["Async child"]
+
+
+def test_save_generated_tree_inserts_per_level(session):
+    payload = [
+        schemas.GeneratedTodoNode(
+            title="A",
+            subitems=[
+                schemas.GeneratedTodoNode(
+                    title="A.1", subitems=[schemas.GeneratedTodoNode(title="A.1.a")]
+                ),
+                schemas.GeneratedTodoNode(title="A.2"),
+            ],
+        ),
+        schemas.GeneratedTodoNode(title="B", subitems=[schemas.GeneratedTodoNode(title="B.1")]),
+    ]
+    inserts: list[str] = []
+
+    def _count(_conn, _cursor, statement, *_args):
+        if statement.startswith("INSERT"):
+            inserts.append(statement)
+
+    connection = session.connection()
+    event.listen(connection, "before_cursor_execute", _count)
+    created = todo_service.save_generated_tree(payload, session)
+    event.remove(connection, "before_cursor_execute", _count)
+
+    # one anchor row, then a single executemany for the rest of the forest.
+    assert len(inserts) == 2
+    assert [todo.title for todo in created] == ["A", "A.1", "A.1.a", "A.2", "B", "B.1"]
+    by_title = {todo.title: todo for todo in created}
+    assert by_title["A.1.a"].parent_id == by_title["A.1"].id
+    assert by_title["B.1"].parent_id == by_title["B"].id
+    assert by_title["A"].parent_id is None
+
+
+def test_save_generated_tree_handles_deep_chains(session):
+    depth = 2_000
+    node = schemas.GeneratedTodoNode(title=f"Level {depth - 1}")
+    for level in range(depth - 2, -1, -1):
+        node = schemas.GeneratedTodoNode(title=f"Level {level}", subitems=[node])
+
+    created = todo_service.save_generated_tree([node], session)
+    assert len(created) == depth
+    ancestors = todo_service.get_ancestors(created[-1].id, session)
+    assert len(ancestors) == depth - 1
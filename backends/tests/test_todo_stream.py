@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import weakref
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from tenacity import wait_fixed
+
+from app.api import routes_ai
+from app.services import ai_service
+from app.services.response_cache import ResponseCache
+from app.services.todo_stream import TodoStreamParser
+
+COMPLETION = json.dumps(
+    {
+        "todos": [
+            {
+                "title": "Map {exams}",
+                "reason": "say \"hi\" [now]",
+                "subitems": [{"title": "List dates", "subitems": []}],
+            },
+            {"title": "Book library room", "subitems": []},
+        ]
+    }
+)
+
+
+def _feed_in_chunks(parser: TodoStreamParser, text: str, size: int) -> list[tuple[int, dict]]:
+    seen = []
+    for start in range(0, len(text), size):
+        for item in parser.feed(text[start : start + size]):
+            seen.append((start + size, item))
+    return seen
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_parser_emits_each_top_level_todo_as_it_completes(size):
+    parser = TodoStreamParser()
+    seen = _feed_in_chunks(parser, COMPLETION, size)
+    assert [item["title"] for _, item in seen] == ["Map {exams}", "Book library room"]
+    assert seen[0][1]["subitems"][0]["title"] == "List dates"
+    if size < len(COMPLETION):
+        # the first todo is out long before the completion ends.
+        assert seen[0][0] < len(COMPLETION) * 0.75
+    assert parser.done
+
+
+def test_parser_handles_code_fences_and_bare_arrays():
+    parser = TodoStreamParser()
+    items = parser.feed("```json\n[{\"title\": \"A\"}, {\"title\": \"B\"}]\n```")
+    assert [item["title"] for item in items] == ["A", "B"]
+
+    parser = TodoStreamParser()
+    assert parser.feed('{"note": ["ignored"], "todos": [{"title": "C"}]}') == [{"title": "C"}]
+
+
+class _StreamingCompletions:
+    def __init__(self, text: str, size: int, failures: int = 0, delay: float = 0.0) -> None:
+        self.chunks = [text[start : start + size] for start in range(0, len(text), size)]
+        self.pulled = 0
+        self.failures = failures
+        self.delay = delay
+        self.closed = False
+
+    async def create(self, **kwargs):
+        assert kwargs["stream"] is True
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("upstream down")
+
+        async def _iterate():
+            try:
+                for chunk in self.chunks:
+                    # a network read suspends between chunks.
+                    await asyncio.sleep(self.delay)
+                    self.pulled += 1
+                    delta = SimpleNamespace(content=chunk)
+                    yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+            finally:
+                self.closed = True
+
+        return _iterate()
+
+
+def _use_streaming_client(monkeypatch, completions) -> None:
+    monkeypatch.setattr(ai_service.settings, "MOCK_AI_RESPONSES_FILE", None)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(ai_service, "_get_async_client", lambda: client)
+    monkeypatch.setattr(ai_service, "_semaphores", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(ai_service, "_response_cache", ResponseCache(max_entries=8, ttl_seconds=60))
+
+
+def test_stream_yields_nodes_before_the_completion_finishes(monkeypatch):
+    completions = _StreamingCompletions(COMPLETION, 10)
+    _use_streaming_client(monkeypatch, completions)
+
+    async def scenario():
+        pulled_at_node = []
+        async for node in ai_service.stream_structured_todos("Study for finals"):
+            pulled_at_node.append((node.title, completions.pulled))
+        return pulled_at_node
+
+    pulled_at_node = asyncio.run(scenario())
+    assert [title for title, _ in pulled_at_node] == ["Map {exams}", "Book library room"]
+    assert pulled_at_node[0][1] < len(completions.chunks)
+    # the finished plan lands in the response cache like a non-streamed one.
+    cached = asyncio.run(ai_service.generate_structured_todos_async("study for finals"))
+    assert [node.title for node in cached] == ["Map {exams}", "Book library room"]
+
+
+def test_stream_slot_is_released_when_the_upstream_ends(monkeypatch):
+    completions = _StreamingCompletions(COMPLETION, 10)
+    _use_streaming_client(monkeypatch, completions)
+    monkeypatch.setattr(ai_service.settings, "AI_MAX_CONCURRENCY", 1)
+
+    async def scenario():
+        stream = ai_service.stream_structured_todos("Study for finals", use_cache=False)
+        first = await anext(stream)
+        # the consumer stalls on the first node while the upstream finishes on its own.
+        await asyncio.sleep(0.05)
+        held = ai_service._get_semaphore().locked()
+        rest = [node async for node in stream]
+        return first, rest, held
+
+    first, rest, held = asyncio.run(scenario())
+    assert [node.title for node in [first, *rest]] == ["Map {exams}", "Book library room"]
+    assert completions.closed
+    assert not held
+
+
+def test_abandoned_stream_closes_the_upstream_and_frees_the_slot(monkeypatch):
+    completions = _StreamingCompletions(COMPLETION, 10, delay=0.01)
+    _use_streaming_client(monkeypatch, completions)
+    monkeypatch.setattr(ai_service.settings, "AI_MAX_CONCURRENCY", 1)
+
+    async def scenario():
+        stream = ai_service.stream_structured_todos("Study for finals", use_cache=False)
+        await anext(stream)
+        # the client disconnected.
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+        return ai_service._get_semaphore().locked()
+
+    held = asyncio.run(scenario())
+    assert completions.closed
+    assert completions.pulled < len(completions.chunks)
+    assert not held
+
+
+def test_stream_retry_backoff_holds_no_slot(monkeypatch):
+    completions = _StreamingCompletions(COMPLETION, 10, failures=1)
+    _use_streaming_client(monkeypatch, completions)
+    monkeypatch.setattr(ai_service.settings, "AI_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(ai_service, "_RETRY_WAIT", wait_fixed(0.1))
+
+    async def scenario():
+        async def observe() -> bool:
+            await asyncio.sleep(0.05)
+            return ai_service._get_semaphore().locked()
+
+        async def consume() -> list[str]:
+            stream = ai_service.stream_structured_todos("Study for finals", use_cache=False)
+            return [node.title async for node in stream]
+
+        return await asyncio.gather(consume(), observe())
+
+    titles, held_during_backoff = asyncio.run(scenario())
+    assert titles == ["Map {exams}", "Book library room"]
+    assert not held_during_backoff
+
+
+def test_stream_endpoint_emits_sse_events(monkeypatch, tmp_path):
+    mock_file = tmp_path / "mock.json"
+    mock_file.write_text(COMPLETION)
+    monkeypatch.setattr(ai_service.settings, "MOCK_AI_RESPONSES_FILE", str(mock_file))
+    app = FastAPI()
+    app.include_router(routes_ai.router)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/ai/generate/stream", json={"user_input": "Study for finals", "save": False}
+        )
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    names = [lines[0].removeprefix("event: ") for lines in events]
+    payloads = [json.loads(lines[1].removeprefix("data: ")) for lines in events]
+    assert names == ["todo", "todo", "done"]
+    assert payloads[0]["todo"]["title"] == "Map {exams}"
+    assert payloads[-1] == {"count": 2, "persisted_ids": []}
+
+
+def test_stream_endpoint_reports_a_failed_save_as_an_error_event(monkeypatch, tmp_path):
+    mock_file = tmp_path / "mock.json"
+    mock_file.write_text(COMPLETION)
+    monkeypatch.setattr(ai_service.settings, "MOCK_AI_RESPONSES_FILE", str(mock_file))
+
+    @contextlib.asynccontextmanager
+    async def session_scope():
+        yield None
+
+    saved: list[str] = []
+
+    async def save(nodes, _session):
+        if saved:
+            raise RuntimeError("database is locked")
+        saved.append(nodes[0].title)
+        return [SimpleNamespace(id=1), SimpleNamespace(id=2)]
+
+    monkeypatch.setattr(routes_ai, "async_session_scope", session_scope)
+    monkeypatch.setattr(routes_ai.todo_service, "save_generated_tree_async", save)
+    app = FastAPI()
+    app.include_router(routes_ai.router)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/ai/generate/stream", json={"user_input": "Study for finals", "save": True}
+        )
+
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    names = [lines[0].removeprefix("event: ") for lines in events]
+    payloads = [json.loads(lines[1].removeprefix("data: ")) for lines in events]
+    assert names == ["todo", "error"]
+    assert payloads[0]["persisted_ids"] == [1, 2]
+    assert payloads[1] == {
+        "status_code": 500,
+        "detail": "Streaming generation failed",
+        "persisted_ids": [1, 2],
+    }